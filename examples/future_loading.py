@@ -6,6 +6,7 @@ Example demonstrating ways to use future loading. Run using the command `python
 """
 
 from prog_models.models import BatteryCircuit
+from prog_models.loading import PiecewiseConstantLoad
 from statistics import mean
 from prog_models.visualize import plot_timeseries
 import matplotlib.pyplot as plt
@@ -39,6 +40,16 @@ def run_example():
     plot_timeseries(times, inputs, options={'ylabel': 'Variable Load Current (amps)'})
     plot_timeseries(times, event_states, options={'ylabel': 'Variable Load Event State'})
 
+    # The same variable loading can be defined with a loading object, which avoids evaluating the if/elif chain at every step
+    # The load changes at each time in the first list. There is one more load than time- the last applies after the last time
+    future_loading = PiecewiseConstantLoad([600, 900, 1800, 3000], {'i': [2, 1, 4, 2, 3]})
+    (times_piecewise, inputs_piecewise, _, _, event_states_piecewise) = m.simulate_to_threshold(future_loading, {'t': 18.95, 'v': 4.183}, **options)
+
+    # The result is the same as with the if/elif loading above
+    print('EOD with if/elif loading: {}s, with PiecewiseConstantLoad: {}s'.format(times[-1], times_piecewise[-1]))
+    plot_timeseries(times_piecewise, inputs_piecewise, options={'ylabel': 'Piecewise Constant Load Current (amps)'})
+    plot_timeseries(times_piecewise, event_states_piecewise, options={'ylabel': 'Piecewise Constant Load Event State'})
+
     ## Example 2: Moving Average loading 
     # This is useful in cases where you are running reoccuring simulations, and are measuring the actual load on the system, 
     # but dont have a good way of predicting it, and you expect loading to be steady
@@ -85,6 +85,15 @@ def run_example():
     print('\t- states: {}'.format(['{}s: {}'.format(round(t,2), x) for (t,x) in zip(times, states)])) 
     print('\t- impact time: {}s'.format(times[-1]))
 
+    # Ex8: Correlated noise- a covariance matrix (in order of m.states) instead of a value for each state
+    # Here noise on x and v is positively correlated
+    process_noise = [[0.0625, 0.09], [0.09, 0.5625]]
+    m = ThrownObject(process_noise = process_noise)
+    print('\nExample with correlated process noise')
+    (times, inputs, states, outputs, event_states) = m.simulate_to_threshold(future_load, {'x':m.parameters['thrower_height']}, threshold_keys=[event], dt=0.005, save_freq=1)
+    print('\t- states: {}'.format(['{}s: {}'.format(round(t,2), x) for (t,x) in zip(times, states)])) 
+    print('\t- impact time: {}s'.format(times[-1]))
+
 # This allows the module to be executed directly 
 if __name__=='__main__':
     run_example()
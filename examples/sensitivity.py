@@ -22,13 +22,10 @@ def run_example():
     thrower_height_range = np.arange(1.2, 2.1, 0.1)
 
     # Step 4: Sim for each 
+    # Each height is simulated with its own copy of the model (see m.sweep), divided between worker processes
     event = 'impact'
-    eods = np.empty(len(thrower_height_range))
-    for (i, thrower_height) in zip(range(len(thrower_height_range)), thrower_height_range):
-        m.parameters['thrower_height'] = thrower_height
-        z_i = {'x': thrower_height} # First output 
-        (times, inputs, states, outputs, event_states) = m.simulate_to_threshold(future_load, z_i, threshold_keys=[event], dt =1e-3, save_freq =10)
-        eods[i] = times[-1]
+    results = m.sweep({'thrower_height': thrower_height_range}, future_load, {'x': m.parameters['thrower_height']}, threshold_keys=[event], dt =1e-3, save_freq =10)
+    eods = results['time_of_event'][event]
 
     # Step 5: Analysis
     print('For a reasonable range of heights, impact time is between {} and {}'.format(round(eods[0],3), round(eods[-1],3)))
@@ -38,17 +35,23 @@ def run_example():
 
     # Now lets repeat for throw speed
     throw_speed_range = np.arange(20, 40, 1)
-    eods = np.empty(len(throw_speed_range))
-    for (i, throw_speed) in zip(range(len(throw_speed_range)), throw_speed_range):
-        m.parameters['throwing_speed'] = throw_speed
-        (times, inputs, states, outputs, event_states) = m.simulate_to_threshold(future_load, {'x':m.parameters['thrower_height']}, threshold_keys=[event], options={'dt':1e-3, 'save_freq':10})
-        eods[i] = times[-1]
+    results = m.sweep({'throwing_speed': throw_speed_range}, future_load, {'x': m.parameters['thrower_height']}, threshold_keys=[event], dt =1e-3, save_freq =10)
+    eods = results['time_of_event'][event]
 
     print('\nFor a reasonable range of throwing speeds, impact time is between {} and {}'.format(round(eods[0],3), round(eods[-1],3)))
     sensitivity = (eods[-1]-eods[0])/(throw_speed_range[-1] - throw_speed_range[0])
     print('  - Average sensitivity: {} s per m/s speed'.format(round(sensitivity/100, 6)))
     print("  - It seems impact time is much more dependent on throwing speed")
 
+    # Finally, vary both at once (global sensitivity analysis)
+    # Sobol indices are the fraction of the variance of impact time due to each parameter alone (first order), or including its interactions with other parameters (total)
+    from prog_models.sensitivity import sobol_indices
+    bounds = {'thrower_height': (1.2, 2.1), 'throwing_speed': (20, 40)}
+    results = sobol_indices(m, bounds, future_load, {'x': m.parameters['thrower_height']}, batch_size=64, max_samples=256, threshold_keys=[event], dt=1e-2, seed=42)
+    print('\nVarying height and speed together ({} samples):'.format(results['n_samples']))
+    for key in bounds:
+        print('  - {}: first order index {}, total index {}'.format(key, round(results['first_order'][event][key], 3), round(results['total'][event][key], 3)))
+
 # This allows the module to be executed directly 
 if __name__=='__main__':
     run_example()
@@ -118,6 +118,7 @@ class ProgModelTemplate(PrognosticsModel):
         # NOTE: KEYS FOR x0 MATCH 'states' LIST ABOVE
 
         # YOU CAN ACCESS ANY PARAMETERS USING self.parameters[key]
+        # IN EQUATIONS CALLED EVERY STEP (E.G., dx, output), self.p.key IS FASTER
         x0 = {
             'Examples State 1': 99.2,
             'Examples State 2': False,
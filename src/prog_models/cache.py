@@ -0,0 +1,130 @@
+# Copyright © 2021 United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration.  All Rights Reserved.
+
+"""
+Memoization of the error of runs in parameter estimation. Optimizers (e.g., Nelder-Mead) often evaluate the same (or nearly the same) parameters more than once, each requiring the model to be simulated from initialize for every run.
+
+See: PrognosticsModel.estimate_params
+"""
+
+from collections import OrderedDict, namedtuple
+import sys
+
+# Cached result for a run: the error (see PrognosticsModel.calc_error), and the simulated outputs at each time of the run (or None, if not kept)
+CacheEntry = namedtuple('CacheEntry', ['error', 'outputs'])
+
+
+class ErrorCache():
+    """
+    Least recently used (LRU) cache of the error for a run, given the estimated parameters. Entries are keyed by the estimated parameters (rounded), the run, and the time step, so a cache is only valid for one model, set of runs, and set of estimated keys. Use clear() (or a new cache) otherwise
+
+    Args:
+        max_bytes (int, optional): Memory budget. The least recently used entries are removed when entries (approximately) exceed this size. Default is 64 MB
+        significant_digits (int, optional): Parameters are rounded to this many significant digits, so parameters that are equal within rounding error share an entry. Default is 12
+        keep_outputs (bool, optional): Keep the simulated outputs at each time of the run (see outputs) in each entry, as well as the error. Default is False
+
+    Example:
+        | cache = ErrorCache(keep_outputs = True)
+        | m.estimate_params(runs, keys, cache = cache)
+        | print(cache.stats)
+    """
+    def __init__(self, max_bytes = 64*2**20, significant_digits = 12, keep_outputs = False):
+        self.max_bytes = max_bytes
+        self.significant_digits = significant_digits
+        self.keep_outputs = keep_outputs
+        self.clear()
+
+    def clear(self):
+        """Remove all entries and reset statistics"""
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, params, run, dt):
+        """
+        Key of the entry for a run
+
+        Args:
+            params (array(float)): Value of each estimated parameter
+            run (int): Index of the run
+            dt (float): Time step
+
+        Returns:
+            tuple: Key
+        """
+        digits = self.significant_digits
+        return (tuple(float('{:.{}g}'.format(value, digits)) for value in params), run, dt)
+
+    def get(self, key):
+        """
+        Get an entry, marking it as most recently used
+
+        Args:
+            key (tuple): Key (see key)
+
+        Returns:
+            CacheEntry: Entry, or None if not in the cache
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, error, outputs = None):
+        """
+        Add an entry, removing the least recently used entries if over the memory budget
+
+        Args:
+            key (tuple): Key (see key)
+            error (float): Error for the run
+            outputs (np.ndarray, optional): (n_times x n_outputs) simulated outputs at each time of the run, in order of model.outputs. Ignored unless keep_outputs
+        """
+        if not self.keep_outputs:
+            outputs = None
+        size = sys.getsizeof(key) + sys.getsizeof(key[0]) + 32*(len(key[0]) + 1) + (0 if outputs is None else outputs.nbytes)
+        if key in self._entries:
+            self.bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (CacheEntry(error, outputs), size)
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            (_, (_, removed_size)) = self._entries.popitem(last = False)
+            self.bytes -= removed_size
+            self.evictions += 1
+
+    def outputs(self, params, run, dt):
+        """
+        Simulated outputs for a run, if cached (requires keep_outputs)
+
+        Args:
+            params (array(float)): Value of each estimated parameter
+            run (int): Index of the run
+            dt (float): Time step
+
+        Returns:
+            np.ndarray: (n_times x n_outputs) simulated outputs at each time of the run, in order of model.outputs, or None if not cached
+        """
+        entry = self._entries.get(self.key(params, run, dt))
+        return None if entry is None else entry[0].outputs
+
+    @property
+    def stats(self):
+        """
+        dict: Cache statistics: hits, misses, hit_rate, entries, bytes (approximate), and evictions
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits/lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'evictions': self.evictions
+        }
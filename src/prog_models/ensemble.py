@@ -0,0 +1,152 @@
+# Copyright © 2021 United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration.  All Rights Reserved.
+
+"""
+Helpers for running ensembles of simulations (samples of noise, or sets of parameters) across a pool of processes.
+
+See: PrognosticsModel.simulate_ensemble, PrognosticsModel.sweep
+"""
+
+from collections import deque
+from multiprocessing import Pool
+import numpy as np
+import pickle
+from .serialization import by_value
+
+# Simulation configuration for the current worker process, set by _init_worker
+_worker_config = None
+
+
+def _init_worker(config):
+    """Store the simulation configuration (pickled) in a worker process, so it is sent once per worker instead of once per task"""
+    global _worker_config
+    _worker_config = pickle.loads(config)
+
+
+def _run_samples(seeds):
+    """Task run in a worker process. Simulate one sample for each seed"""
+    return simulate_samples(_worker_config, seeds)
+
+
+def _run_sweep(task):
+    """Task run in a worker process. Simulate one sample for each set of parameters, task = (points, seeds)"""
+    return sweep_samples(_worker_config, *task)
+
+
+def simulate_samples(config, seeds):
+    """
+    Simulate one sample to threshold for each seed. The model's random number generator (used for noise) is replaced with one created from the seed for each sample, so the result of each sample depends only on its seed
+
+    Args:
+        config (tuple): (model, future_loading_eqn, first_output, threshold_keys, kwargs), see PrognosticsModel.simulate_to_threshold
+        seeds ([np.random.SeedSequence]): Seed for each sample (e.g., from model.spawn_seeds)
+
+    Returns:
+        tuple: (times, time_of_event, states) \n
+            times (np.ndarray): final time of each sample \n
+            time_of_event (np.ndarray): (n_samples x n_events) array of the time at which each event's threshold was first met (NaN if not met), in order of model.events \n
+            states (np.ndarray): (n_samples x n_states) array of the final state, in order of model.states
+    """
+    (model, future_loading_eqn, first_output, threshold_keys, kwargs) = config
+    n_samples = len(seeds)
+    times = np.empty(n_samples)
+    time_of_event = np.full((n_samples, len(model.events)), np.nan)
+    states = np.empty((n_samples, len(model.states)))
+    for (i, seed) in enumerate(seeds):
+        model.rng = np.random.default_rng(seed)
+        events_met = {}
+        sim = model.simulate_iter(future_loading_eqn, first_output, threshold_keys, **dict(kwargs, time_of_event = events_met))
+        (t, _, x) = deque(sim, maxlen = 1)[0]  # Only keep the final state
+        times[i] = t
+        states[i] = [x[key] for key in model.states]
+        time_of_event[i] = [events_met.get(key, np.nan) for key in model.events]
+    return (times, time_of_event, states)
+
+
+def run_ensemble(config, seeds, workers = 1):
+    """
+    Simulate one sample for each seed, divided between a pool of worker processes
+
+    Args:
+        config (tuple): (model, future_loading_eqn, first_output, threshold_keys, kwargs), see simulate_samples
+        seeds ([np.random.SeedSequence]): Seed for each sample (e.g., from model.spawn_seeds)
+        workers (int, optional): Number of worker processes. If 1, samples are simulated in this process
+
+    Returns:
+        tuple: (times, time_of_event, states), see simulate_samples
+    """
+    if workers == 1:
+        # Simulate in this process, then restore the model's generator
+        model = config[0]
+        rng = model.rng
+        try:
+            return simulate_samples(config, seeds)
+        finally:
+            model.rng = rng
+
+    # Several tasks per worker to balance load between workers
+    n_chunks = min(len(seeds), 4*workers)
+    chunks = [seeds[index[0]:index[-1] + 1] for index in np.array_split(np.arange(len(seeds)), n_chunks)]
+    # Note: Pickled here (instead of by the pool only for some start methods), by value so functions that cannot be imported by workers (e.g., a future loading lambda) can be sent
+    config = pickle.dumps(by_value(config))
+    # Note: multiprocessing.Pool, because ProcessPoolExecutor does not support initializer before Python 3.7
+    with Pool(workers, initializer = _init_worker, initargs = (config,)) as pool:
+        results = pool.map(_run_samples, chunks)
+    return tuple(np.concatenate(result) for result in zip(*results))
+
+
+def sweep_samples(config, points, seeds):
+    """
+    Simulate one sample to threshold for each set of parameters, each with a clone of the model (see PrognosticsModel.clone) with those parameters and a random number generator created from the seed
+
+    Args:
+        config (tuple): (model, future_loading_eqn, first_output, threshold_keys, metrics, kwargs), where metrics is a dict of functions (x) -> float of the final state, see PrognosticsModel.sweep
+        points ([dict]): Parameters for each sample
+        seeds ([np.random.SeedSequence]): Seed for each sample
+
+    Returns:
+        tuple: (times, time_of_event, metrics) \n
+            times (np.ndarray): final time of each sample \n
+            time_of_event (np.ndarray): (n_samples x n_events) array of the time at which each event's threshold was first met (NaN if not met), in order of model.events \n
+            metrics (np.ndarray): (n_samples x n_metrics) array of each metric of the final state, in order of metrics
+    """
+    (model, future_loading_eqn, first_output, threshold_keys, metrics, kwargs) = config
+    metrics = list(metrics.values())
+    n_samples = len(points)
+    times = np.empty(n_samples)
+    time_of_event = np.full((n_samples, len(model.events)), np.nan)
+    values = np.empty((n_samples, len(metrics)))
+    for (i, (params, seed)) in enumerate(zip(points, seeds)):
+        m = model.clone(rng = np.random.default_rng(seed), **params)
+        events_met = {}
+        sim = m.simulate_iter(future_loading_eqn, first_output, threshold_keys, **dict(kwargs, time_of_event = events_met))
+        (t, _, x) = deque(sim, maxlen = 1)[0]  # Only keep the final state
+        times[i] = t
+        time_of_event[i] = [events_met.get(key, np.nan) for key in m.events]
+        values[i] = [metric(x) for metric in metrics]
+    return (times, time_of_event, values)
+
+
+def run_sweep(config, points, seeds, workers = 1):
+    """
+    Simulate one sample for each set of parameters, divided between a pool of worker processes
+
+    Args:
+        config (tuple): (model, future_loading_eqn, first_output, threshold_keys, metrics, kwargs), see sweep_samples
+        points ([dict]): Parameters for each sample
+        seeds ([np.random.SeedSequence]): Seed for each sample
+        workers (int, optional): Number of worker processes. If 1, samples are simulated in this process
+
+    Returns:
+        tuple: (times, time_of_event, metrics), see sweep_samples
+    """
+    if workers == 1:
+        return sweep_samples(config, points, seeds)
+
+    # Several tasks per worker to balance load between workers
+    n_chunks = min(len(points), 4*workers)
+    tasks = [(points[index[0]:index[-1] + 1], seeds[index[0]:index[-1] + 1]) for index in np.array_split(np.arange(len(points)), n_chunks)]
+    config = pickle.dumps(by_value(config))
+    with Pool(workers, initializer = _init_worker, initargs = (config,)) as pool:
+        results = pool.map(_run_sweep, tasks)
+    return tuple(np.concatenate(result) for result in zip(*results))
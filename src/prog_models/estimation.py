@@ -0,0 +1,123 @@
+# Copyright © 2021 United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration.  All Rights Reserved.
+
+"""
+Helpers for evaluating the parameter estimation objective, serially or across a pool of processes.
+
+See: PrognosticsModel.estimate_params
+"""
+
+from multiprocessing import Pool
+import numpy as np
+import pickle
+from .prognostics_model import PrognosticsModel
+from .serialization import by_value
+
+# Objective configuration for the current worker process, set by _init_worker
+_worker_config = None
+
+
+def total_error(config, params, runs = None):
+    """
+    Set the estimated parameters, then calculate the total error over runs
+
+    Args:
+        config (tuple): (model, runs, keys, kwargs, cache), see PrognosticsModel.estimate_params. cache (ErrorCache) can be None
+        params (array(float)): Value of each estimated parameter, in order of keys
+        runs (list[int], optional): Indices of the runs to include. Default is all runs
+
+    Returns:
+        float: Total error (see PrognosticsModel.calc_error), or 1e99 if the error could not be calculated for a run (e.g., simulation failed)
+    """
+    (model, all_runs, keys, kwargs, cache) = config
+    dt = kwargs.get('dt', 1e99)
+    parameters_set = False
+    # Calculation of error overridden by the model (simulated outputs are not kept)
+    custom_error = None if type(model).calc_error is PrognosticsModel.calc_error else model.calc_error
+    err = 0
+    for i in (range(len(all_runs)) if runs is None else runs):
+        if cache is not None:
+            key = cache.key(params, i, dt)
+            entry = cache.get(key)
+            if entry is not None:
+                err += entry.error
+                continue
+        if not parameters_set:
+            # Only set (and update derived parameters) if a run is simulated
+            model.parameters.update(zip(keys, params))
+            parameters_set = True
+        (times, inputs, outputs) = all_runs[i][:3]
+        simulated = [] if cache is not None and cache.keep_outputs and custom_error is None else None
+        try:
+            if custom_error is None:
+                run_err = model._calc_error(times, inputs, outputs, dt, simulated)
+            else:
+                run_err = custom_error(times, inputs, outputs, **kwargs)
+        except Exception:
+            run_err = 1e99
+            # If it doesn't work (i.e., throws an error), dont use it
+        if cache is not None:
+            cache.put(key, run_err, None if simulated is None else np.array([[z[output] for output in model.outputs] for z in simulated], dtype=float))
+        if run_err >= 1e99:
+            return 1e99
+        err += run_err
+    return err
+
+
+def _init_worker(config):
+    """Store the objective configuration (pickled) in a worker process, so the model and runs are sent once per worker instead of once per evaluation"""
+    global _worker_config
+    _worker_config = pickle.loads(config)
+
+
+def _worker_error(params):
+    """Task run in a worker process. Total error over all runs"""
+    return total_error(_worker_config, params)
+
+
+def _worker_runs_error(task):
+    """Task run in a worker process. Total error over some runs, task = (params, runs)"""
+    return total_error(_worker_config, *task)
+
+
+class ParallelObjective():
+    """
+    Parameter estimation objective, evaluated across a pool of worker processes. Use as a context manager, to shut down the pool when done
+
+    Args:
+        config (tuple): (model, runs, keys, kwargs, cache), see total_error
+        workers (int): Number of worker processes
+    """
+    def __init__(self, config, workers):
+        n_runs = len(config[1])
+        self.workers = workers
+        # Note: Pickled here (instead of by the pool only for some start methods), by value so functions that cannot be imported by workers can be sent
+        # Note: multiprocessing.Pool, because ProcessPoolExecutor does not support initializer before Python 3.7
+        self.pool = Pool(workers, initializer = _init_worker, initargs = (pickle.dumps(by_value(config)),))
+        self.chunks = [chunk.tolist() for chunk in np.array_split(np.arange(n_runs), min(n_runs, workers)) if len(chunk) > 0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.pool.close()
+        self.pool.join()
+
+    def __call__(self, params):
+        """Total error for one set of parameters, with the runs divided between workers"""
+        errors = self.pool.map(_worker_runs_error, [(params, chunk) for chunk in self.chunks])
+        return 1e99 if max(errors) >= 1e99 else sum(errors)
+
+    def map(self, fcn, population):
+        """
+        Total error for each set of parameters in population, each evaluated by a worker (e.g., the candidates of a population-based optimizer)
+
+        Args:
+            fcn (callable): Objective. Ignored- the objective is evaluated in the workers (equivalent to calling this)
+            population (iterable): Sets of parameters
+
+        Returns:
+            list[float]: Total error for each set of parameters
+        """
+        population = list(population)
+        return self.pool.map(_worker_error, population, chunksize = max(1, len(population)//(4*self.workers)))
@@ -0,0 +1,159 @@
+# Copyright © 2021 United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration.  All Rights Reserved.
+
+"""
+Integration methods for models that define dx. Each advances the state by one simulation step (dt) with the input held constant over the step.
+
+See: PrognosticsModel.simulate_to_threshold (option 'integration_method')
+"""
+
+from abc import ABC, abstractmethod
+import numpy as np
+from .exceptions import ProgModelException
+from .state_container import StateContainer
+
+
+class Integrator(ABC):
+    """
+    Base integrator - advances the state of a model using its dx equation
+
+    Args:
+        model (PrognosticsModel): Model to integrate. Must define dx
+    """
+    def __init__(self, model, **kwargs):
+        self.model = model
+        self.n_evals = 0  # Number of calls to model.dx
+
+    def _f(self, y, u):
+        """Evaluate dx for state array y (in order of model.states), returning an array"""
+        self.n_evals += 1
+        states = self.model.states
+        dx = self.model.dx(StateContainer(states, y.tolist()), u)
+        return np.array([dx[key] for key in states], dtype=float)
+
+    def __call__(self, x, u, dt):
+        """Advance state x by dt
+
+        Args:
+            x (dict): state, with keys defined by model.states
+            u (dict): Inputs, with keys defined by model.inputs
+            dt (Number): Timestep size in seconds (≥ 0)
+
+        Returns:
+            StateContainer: next state
+        """
+        y = np.array([x[key] for key in self.model.states], dtype=float)
+        return StateContainer(self.model.states, self.step(y, u, dt).tolist())
+
+    @abstractmethod
+    def step(self, y, u, dt):
+        """Advance state array y (in order of model.states) by dt
+
+        Args:
+            y (np.ndarray): state
+            u (dict): Inputs, with keys defined by model.inputs
+            dt (Number): Timestep size in seconds (≥ 0)
+
+        Returns:
+            np.ndarray: next state
+        """
+
+
+class RK4(Integrator):
+    """
+    Classic 4th order Runge-Kutta method with a fixed step of dt
+    """
+    def step(self, y, u, dt):
+        f = self._f
+        k1 = f(y, u)
+        k2 = f(y + (dt/2)*k1, u)
+        k3 = f(y + (dt/2)*k2, u)
+        k4 = f(y + dt*k3, u)
+        return y + (dt/6)*(k1 + 2*k2 + 2*k3 + k4)
+
+
+# Dormand-Prince 5(4) coefficients
+_DP_A = (
+    (),
+    (1/5,),
+    (3/40, 9/40),
+    (44/45, -56/15, 32/9),
+    (19372/6561, -25360/2187, 64448/6561, -212/729),
+    (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+    (35/384, 0, 500/1113, 125/192, -2187/6784, 11/84)
+)
+_DP_B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0])
+_DP_E = _DP_B - np.array([5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40])
+
+
+class RK45(Integrator):
+    """
+    Adaptive embedded Runge-Kutta method (Dormand-Prince 5(4)). Each step of dt is divided into as many substeps as are needed to meet the error tolerances.
+    The substep size is carried between steps
+
+    Args:
+        model (PrognosticsModel): Model to integrate. Must define dx
+        rtol (float, optional): Relative error tolerance. Default 1e-6
+        atol (float, optional): Absolute error tolerance. Default 1e-9
+        max_substeps (int, optional): Maximum number of substeps (accepted or rejected) in one step of dt. Default 100000
+
+    Raises:
+        ProgModelException: (from step) If the tolerances cannot be met within a step of dt: the substep size falls below the resolution of dt (e.g., dx is NaN, or the tolerances are too strict), or max_substeps is exceeded
+    """
+    def __init__(self, model, rtol = 1e-6, atol = 1e-9, max_substeps = 100000, **kwargs):
+        super().__init__(model)
+        self.rtol = rtol
+        self.atol = atol
+        self.max_substeps = max_substeps
+        self.h = None  # Substep size
+
+    def step(self, y, u, dt):
+        f = self._f
+        t = 0
+        k = [f(y, u)] + [None]*6
+        h = self.h
+        if h is None:
+            # First step - estimate initial substep size from the scale of the state and its derivative (Hairer, Norsett, Wanner)
+            scale = self.atol + self.rtol*np.abs(y)
+            d0 = np.sqrt(np.mean((y/scale)**2))
+            d1 = np.sqrt(np.mean((k[0]/scale)**2))
+            h = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01*d0/d1
+        h_min = 16*np.finfo(float).eps*dt  # Smaller substeps cannot change t
+        n_substeps = 0
+        while t < dt:
+            n_substeps += 1
+            if n_substeps > self.max_substeps:
+                raise ProgModelException("Integration failed: error tolerances not met within {} substeps of a step of {} s (rk45). Try a larger rtol or atol, or a smaller dt".format(self.max_substeps, dt))
+            if not h >= h_min:
+                # Note: Also for NaN
+                raise ProgModelException("Integration failed: substep size fell below {} s (rk45). Check that dx is finite, or try a larger rtol or atol".format(h_min))
+            remaining = dt - t
+            h_step = min(h, remaining)
+            for i in range(1, 7):
+                k[i] = f(y + h_step*sum(a*k_j for (a, k_j) in zip(_DP_A[i], k) if a != 0), u)
+            y_new = y + h_step*np.dot(_DP_B, k)
+            err = h_step*np.dot(_DP_E, k)
+            scale = self.atol + self.rtol*np.maximum(np.abs(y), np.abs(y_new))
+            err_norm = np.sqrt(np.mean((err/scale)**2))
+            factor = 5 if err_norm == 0 else min(5, max(0.2, 0.9*err_norm**(-1/5)))
+            if np.isnan(factor):
+                factor = 0.2
+            if err_norm <= 1:  # Note: False for NaN, so the substep is rejected
+                # Accept substep
+                t = dt if h_step == remaining else t + h_step
+                y = y_new
+                k[0] = k[6]  # First same as last
+                if h_step == h or factor < 1:
+                    # Note: A substep shortened to end at dt does not grow the step size
+                    h = h_step*factor
+            else:
+                # Reject substep - retry with a smaller one
+                h = h_step*factor
+        self.h = h
+        return y
+
+
+integration_methods = {
+    'rk4': RK4,
+    'rk45': RK45
+}
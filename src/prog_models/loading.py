@@ -0,0 +1,212 @@
+# Copyright © 2021 United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration.  All Rights Reserved.
+
+"""
+Future loading profiles. Each is a callable f(t, x=None) -> u, so it can be used as the future_loading_eqn of a simulation (e.g., PrognosticsModel.simulate_to_threshold) in place of a function with an if/elif chain.
+Each also supports evaluating a whole vector of times at once (see `evaluate`).
+"""
+
+from bisect import bisect_right
+from math import inf
+import numpy as np
+from .exceptions import ProgModelInputException
+
+
+def _to_array(values):
+    """Convert values (list of dicts, or dict of key: sequence) to (keys, n x n_keys array)"""
+    if isinstance(values, dict):
+        keys = list(values.keys())
+        if not keys:
+            raise ProgModelInputException("values must include at least one input")
+        array = np.column_stack([np.asarray(values[key], dtype=float) for key in keys])
+    else:
+        if len(values) == 0:
+            raise ProgModelInputException("values must not be empty")
+        keys = list(values[0].keys())
+        if not keys:
+            raise ProgModelInputException("values must include at least one input")
+        array = np.array([[value[key] for key in keys] for value in values], dtype=float)
+    return (keys, array.reshape(-1, len(keys)))
+
+
+class PiecewiseConstantLoad():
+    """
+    Future loading that is constant between breakpoints (e.g., a series of load stages)
+
+    Args:
+        times ([float]): Increasing times (s) at which the load changes
+        values (list[dict] or dict): Load for each segment, with len(times) + 1 segments. Either a list of dicts (one per segment), or a dict with a sequence of values (one per segment) for each input. \n
+            values[0] applies for t < times[0], values[i] for times[i-1] <= t < times[i], and values[-1] for t >= times[-1]
+
+    Raises:
+        ProgModelInputException: If times are not increasing or there is not one value more than there are times
+
+    Example:
+        | # Equivalent to: 2 for t < 600, 1 for 600 <= t < 900, then 4
+        | future_loading = PiecewiseConstantLoad([600, 900], [{'i': 2}, {'i': 1}, {'i': 4}])
+        | future_loading = PiecewiseConstantLoad([600, 900], {'i': [2, 1, 4]})  # Same
+        | m.simulate_to_threshold(future_loading, first_output)
+
+    Note:
+        The same dict is returned for every time in a segment. It should not be modified
+    """
+    def __init__(self, times, values):
+        (self.keys, self.values) = _to_array(values)
+        self.times = np.asarray(times, dtype=float).reshape(-1)
+        if len(self.values) != len(self.times) + 1:
+            raise ProgModelInputException("values must have one more element than times ({}), had {}".format(len(self.times) + 1, len(self.values)))
+        if np.any(np.diff(self.times) <= 0):
+            raise ProgModelInputException("times must be increasing")
+
+        # Precomputed for each segment: (start, end, load)
+        self._breakpoints = self.times.tolist()
+        self._segments = list(zip(
+            [-inf] + self._breakpoints, 
+            self._breakpoints + [inf], 
+            [dict(zip(self.keys, row)) for row in self.values.tolist()]))
+        self._segment = self._segments[0]  # Segment of the last call
+
+    def __call__(self, t, x=None):
+        (start, end, load) = self._segment
+        if start <= t < end:
+            return load
+        # Left the segment of the last call
+        self._segment = self._segments[bisect_right(self._breakpoints, t)]
+        return self._segment[2]
+
+    def evaluate(self, times):
+        """Evaluate the load at every time in times at once
+
+        Args:
+            times (array(float)): Times (s)
+
+        Returns:
+            dict: Load at each time, with one array (the length of times) per input
+        """
+        index = np.searchsorted(self.times, np.asarray(times, dtype=float).reshape(-1), side='right')
+        values = self.values[index]
+        return {key: values[:, i] for (i, key) in enumerate(self.keys)}
+
+
+class PiecewiseLinearLoad():
+    """
+    Future loading that varies linearly between points (e.g., a ramp), and is constant before the first and after the last point
+
+    Args:
+        times ([float]): Increasing times (s) of each point
+        values (list[dict] or dict): Load at each time. Either a list of dicts (one per time), or a dict with a sequence of values (one per time) for each input
+
+    Raises:
+        ProgModelInputException: If times are not increasing or there is not one value per time
+
+    Example:
+        | # Ramp from 1 to 3 between t = 0 and t = 100, then 3
+        | future_loading = PiecewiseLinearLoad([0, 100], {'i': [1, 3]})
+    """
+    def __init__(self, times, values):
+        (self.keys, self.values) = _to_array(values)
+        self.times = np.asarray(times, dtype=float).reshape(-1)
+        if len(self.values) != len(self.times) or len(self.times) == 0:
+            raise ProgModelInputException("values must have one element per time ({}), had {}".format(len(self.times), len(self.values)))
+        if np.any(np.diff(self.times) <= 0):
+            raise ProgModelInputException("times must be increasing")
+
+        # Precomputed for each segment (between consecutive points, plus constant before the first and after the last)
+        slopes = np.diff(self.values, axis=0) / np.diff(self.times)[:, np.newaxis]
+        zeros = np.zeros((1, len(self.keys)))
+        self._slopes = np.vstack([zeros, slopes, zeros])
+        self._offsets = np.vstack([self.values[:1], self.values])
+        self._starts = np.concatenate([[self.times[0]], self.times])
+        self._segments = [
+            list(zip(self.keys, offset, slope)) for (offset, slope) in zip(self._offsets.tolist(), self._slopes.tolist())]
+        self._breakpoints = self.times.tolist()
+        self._lower = [-inf] + self._breakpoints
+        self._upper = self._breakpoints + [inf]
+        self._starts_list = self._starts.tolist()
+        self._index = 0  # Segment of the last call
+
+    def __call__(self, t, x=None):
+        i = self._index
+        if not (self._lower[i] <= t < self._upper[i]):
+            # Left the segment of the last call
+            i = self._index = bisect_right(self._breakpoints, t)
+        dt = t - self._starts_list[i]
+        return {key: offset + slope*dt for (key, offset, slope) in self._segments[i]}
+
+    def evaluate(self, times):
+        """Evaluate the load at every time in times at once
+
+        Args:
+            times (array(float)): Times (s)
+
+        Returns:
+            dict: Load at each time, with one array (the length of times) per input
+        """
+        times = np.asarray(times, dtype=float).reshape(-1)
+        index = np.searchsorted(self.times, times, side='right')
+        values = self._offsets[index] + self._slopes[index]*(times - self._starts[index])[:, np.newaxis]
+        return {key: values[:, i] for (i, key) in enumerate(self.keys)}
+
+
+class SampledLoad():
+    """
+    Future loading from a profile sampled at a fixed rate (e.g., a recorded load). The sample for a time is found by calculation instead of search
+
+    Args:
+        values (list[dict] or dict): Load at each sample. Either a list of dicts (one per sample), or a dict with a sequence of values (one per sample) for each input
+        dt (float): Time between samples (s)
+        t0 (float, optional): Time of the first sample (s). Default is 0
+        interpolation (str, optional): 'previous' (default, value of the last sample at or before t) or 'linear' (linear interpolation between samples). The first and last samples apply before and after the profile, respectively
+
+    Raises:
+        ProgModelInputException: If dt is not positive or interpolation is not supported
+
+    Example:
+        | # Current measured every 10 s
+        | future_loading = SampledLoad({'i': measured_current}, dt = 10)
+    """
+    def __init__(self, values, dt, t0 = 0, interpolation = 'previous'):
+        (self.keys, self.values) = _to_array(values)
+        if len(self.values) == 0:
+            raise ProgModelInputException("values must not be empty")
+        if dt <= 0:
+            raise ProgModelInputException("dt must be positive, was {}".format(dt))
+        if interpolation not in ('previous', 'linear'):
+            raise ProgModelInputException("interpolation must be 'previous' or 'linear', was {}".format(interpolation))
+        self.dt = dt
+        self.t0 = t0
+        self.interpolation = interpolation
+        self._last = len(self.values) - 1
+        self._rows = self.values.tolist()
+        self._points = [dict(zip(self.keys, row)) for row in self._rows]
+
+    def __call__(self, t, x=None):
+        position = (t - self.t0)/self.dt
+        if position <= 0:
+            return self._points[0]
+        i = int(position)
+        if i >= self._last:
+            return self._points[self._last]
+        if self.interpolation == 'previous':
+            return self._points[i]
+        fraction = position - i
+        return {key: a + fraction*(b - a) for (key, a, b) in zip(self.keys, self._rows[i], self._rows[i+1])}
+
+    def evaluate(self, times):
+        """Evaluate the load at every time in times at once
+
+        Args:
+            times (array(float)): Times (s)
+
+        Returns:
+            dict: Load at each time, with one array (the length of times) per input
+        """
+        position = np.clip((np.asarray(times, dtype=float).reshape(-1) - self.t0)/self.dt, 0, self._last)
+        index = np.floor(position).astype(int)
+        if self.interpolation == 'previous':
+            values = self.values[index]
+        else:
+            next_index = np.minimum(index + 1, self._last)
+            fraction = (position - index)[:, np.newaxis]
+            values = self.values[index] + fraction*(self.values[next_index] - self.values[index])
+        return {key: values[:, i] for (i, key) in enumerate(self.keys)}
@@ -4,6 +4,7 @@
 from .. import prognostics_model
 
 from math import exp, inf
+import numpy as np
 
 
 class BatteryCircuit(prognostics_model.PrognosticsModel):
@@ -67,6 +68,7 @@ class BatteryCircuit(prognostics_model.PrognosticsModel):
     inputs = ['i']
     states = ['tb', 'qb', 'qcp', 'qcs']
     outputs = ['t',  'v']
+    is_vectorized = True  # Equations accept arrays of samples (see PrognosticsModel.simulate_to_threshold_batch)
 
     default_parameters = {  # Set to defaults
         'V0': 4.183,
@@ -118,21 +120,20 @@ class BatteryCircuit(prognostics_model.PrognosticsModel):
 
     def dx(self, x, u):
         # Keep this here- accessing member can be expensive in python- this optimization reduces runtime by almost half!
-        parameters = self.parameters
-        Rs = parameters['Rs']
-        Vcs = x['qcs']/parameters['Cs']
-        Vcp = x['qcp']/parameters['Ccp']
-        SOC = (parameters['CMax'] - parameters['qMax'] +
-               x['qb'])/parameters['CMax']
-        Cb = parameters['Cbp0']*SOC**3 + parameters['Cbp1'] * \
-            SOC**2 + parameters['Cbp2']*SOC + parameters['Cbp3']
-        Rcp = parameters['Rcp0'] + parameters['Rcp1'] * \
-            exp(parameters['Rcp2']*(-SOC + 1))
+        # Note: The parameter snapshot (self.p) is also much faster to read than self.parameters
+        p = self.p
+        Rs = p.Rs
+        Vcs = x['qcs']/p.Cs
+        Vcp = x['qcp']/p.Ccp
+        SOC = (p.CMax - p.qMax + x['qb'])/p.CMax
+        Cb = p.Cbp0*SOC**3 + p.Cbp1*SOC**2 + p.Cbp2*SOC + p.Cbp3
+        # Note: math.exp is faster for a single sample
+        Rcp = p.Rcp0 + p.Rcp1*(np.exp if isinstance(SOC, np.ndarray) else exp)(p.Rcp2*(-SOC + 1))
         Vb = x['qb']/Cb
-        Tbdot = (Rcp*Rs*parameters['ha']*(parameters['Ta'] - x['tb']) + Rcp*Vcs**2*parameters['hcs'] + Rs*Vcp**2*parameters['hcp']) \
-            / (parameters['Jt']*Rcp*Rs)
+        Tbdot = (Rcp*Rs*p.ha*(p.Ta - x['tb']) + Rcp*Vcs**2*p.hcs + Rs*Vcp**2*p.hcp) \
+            / (p.Jt*Rcp*Rs)
         Vp = Vb - Vcp - Vcs
-        ip = Vp/parameters['Rp']
+        ip = Vp/p.Rp
         ib = u['i'] + ip
         icp = ib - Vcp/Rcp
         ics = ib - Vcs/Rs
@@ -145,22 +146,20 @@ class BatteryCircuit(prognostics_model.PrognosticsModel):
         }
     
     def event_state(self, x):
-        parameters = self.parameters
+        p = self.p
         z = self.output(x)
-        charge_EOD = (parameters['CMax'] -
-                      parameters['qMax'] + x['qb'])/parameters['CMax']
-        voltage_EOD = (z['v'] - self.parameters['VEOD']) / \
-            self.parameters['VDropoff']
+        charge_EOD = (p.CMax - p.qMax + x['qb'])/p.CMax
+        voltage_EOD = (z['v'] - p.VEOD)/p.VDropoff
         return {
-            'EOD': min(charge_EOD, voltage_EOD)
+            'EOD': np.minimum(charge_EOD, voltage_EOD) if isinstance(charge_EOD, np.ndarray) else min(charge_EOD, voltage_EOD)
         }
 
     def output(self, x):
-        parameters = self.parameters
-        Vcs = x['qcs']/parameters['Cs']
-        Vcp = x['qcp']/parameters['Ccp']
-        SOC = (parameters['CMax'] - parameters['qMax'] + x['qb'])/parameters['CMax']
-        Cb = parameters['Cbp0']*SOC**3 + parameters['Cbp1']*SOC**2 + parameters['Cbp2']*SOC + parameters['Cbp3']
+        p = self.p
+        Vcs = x['qcs']/p.Cs
+        Vcp = x['qcp']/p.Ccp
+        SOC = (p.CMax - p.qMax + x['qb'])/p.CMax
+        Cb = p.Cbp0*SOC**3 + p.Cbp1*SOC**2 + p.Cbp2*SOC + p.Cbp3
         Vb = x['qb']/Cb
 
         return {
@@ -169,15 +168,15 @@ class BatteryCircuit(prognostics_model.PrognosticsModel):
         }
 
     def threshold_met(self, x):
-        parameters = self.parameters
-        Vcs = x['qcs']/parameters['Cs']
-        Vcp = x['qcp']/parameters['Ccp']
-        SOC = (parameters['CMax'] - parameters['qMax'] + x['qb'])/parameters['CMax']
-        Cb = parameters['Cbp0']*SOC**3 + parameters['Cbp1']*SOC**2 + parameters['Cbp2']*SOC + parameters['Cbp3']
+        p = self.p
+        Vcs = x['qcs']/p.Cs
+        Vcp = x['qcp']/p.Ccp
+        SOC = (p.CMax - p.qMax + x['qb'])/p.CMax
+        Cb = p.Cbp0*SOC**3 + p.Cbp1*SOC**2 + p.Cbp2*SOC + p.Cbp3
         Vb = x['qb']/Cb
         V = Vb - Vcp - Vcs
 
         # Return true if voltage is less than the voltage threshold
         return {
-             'EOD': V < parameters['VEOD']
+             'EOD': V < p.VEOD
         }
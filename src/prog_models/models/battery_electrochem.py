@@ -1,10 +1,11 @@
 # Copyright © 2021 United States Government as represented by the Administrator of the
 # National Aeronautics and Space Administration.  All Rights Reserved.
 
-from .. import PrognosticsModel
+from .. import PrognosticsModel, ProgModelInputException
 
 from math import asinh, log, inf
 from copy import deepcopy
+import numpy as np
 
 # Constants of nature
 R = 8.3144621  # universal gas constant, J/K/mol
@@ -98,6 +99,76 @@ def update_qSBmax(params):
         'qBMax': params['qMax']*(1.0-params['VolSFraction']),
     }
 
+def redlich_kister_coefficients(A):
+    # Redlich-Kister expansion sum(A[k]*((2x-1)**(k+1) - 2k*x*(1-x)*(2x-1)**(k-1)))/F
+    # as a polynomial in y = 2x-1 (using x*(1-x) = (1-y**2)/4, term k is (1+k/2)*y**(k+1) - k/2*y**(k-1))
+    # Returns coefficients highest power first, for evaluation in Horner form (see redlich_kister)
+    coefficients = [0.0]*(len(A) + 1)  # coefficients[j] is for y**j
+    for (k, a) in enumerate(A):
+        coefficients[k+1] += a*(1 + k/2)/F
+        if k > 0:
+            coefficients[k-1] -= a*k/2/F
+    while len(coefficients) > 1 and coefficients[-1] == 0:
+        coefficients.pop()  # Unused higher powers (e.g., An)
+    return tuple(reversed(coefficients))
+
+def redlich_kister(coefficients, x):
+    # Evaluate Redlich-Kister expansion at mole fraction x (float or array), given coefficients from redlich_kister_coefficients
+    y = x + x - 1
+    v = 0.0
+    for c in coefficients:
+        v = v*y + c
+    return v
+
+def update_an_poly(params):
+    return {
+        'AnPoly': redlich_kister_coefficients(params['An'])
+    }
+
+def update_ap_poly(params):
+    return {
+        'ApPoly': redlich_kister_coefficients(params['Ap'])
+    }
+
+def redlich_kister_table(coefficients, n):
+    # Redlich-Kister expansion tabulated at n evenly spaced mole fractions from 0 to 1, as (scale, values, slopes) for linear interpolation (see interpolate_table)
+    values = redlich_kister(coefficients, np.linspace(0, 1, n))
+    slopes = np.diff(values)
+    return (n - 1, tuple(values.tolist()), tuple(slopes.tolist()))
+
+def interpolate_table(table, x):
+    # Evaluate tabulated expansion at mole fraction x (float), from table from redlich_kister_table. Extrapolated linearly from the first or last interval outside of 0 to 1
+    (scale, values, slopes) = table
+    position = x*scale
+    i = min(max(int(position), 0), scale - 1)
+    return values[i] + slopes[i]*(position - i)
+
+def interpolate_table_array(table, x):
+    # Evaluate tabulated expansion at mole fractions x (array), from table from redlich_kister_table. Extrapolated as in interpolate_table
+    (scale, values, slopes) = table
+    position = x*scale
+    i = np.clip(position.astype(int), 0, scale - 1)
+    return np.asarray(values)[i] + np.asarray(slopes)[i]*(position - i)
+
+def update_ocv_tables(params):
+    # Tabulated Redlich-Kister expansions (see ocv_grid), and the maximum error of interpolation in either electrode
+    n = params['ocv_grid']
+    if not n:
+        return {
+            'ocv_tables': None,
+            'ocv_max_error': 0.0
+        }
+    if not isinstance(n, int) or isinstance(n, bool) or n < 2:
+        raise ProgModelInputException("'ocv_grid' must be None, or an integer of at least 2, was {}".format(n))
+    tables = (redlich_kister_table(params['AnPoly'], n), redlich_kister_table(params['ApPoly'], n))
+    # Error is largest between grid points - check 10 points per interval
+    x = np.linspace(0, 1, 10*(n - 1) + 1)
+    error = max(np.abs(interpolate_table_array(table, x) - redlich_kister(coefficients, x)).max() for (table, coefficients) in zip(tables, (params['AnPoly'], params['ApPoly'])))
+    return {
+        'ocv_tables': tables,
+        'ocv_max_error': float(error)
+    }
+
 
 class BatteryElectroChemEOD(PrognosticsModel):
     """
@@ -159,12 +230,15 @@ class BatteryElectroChemEOD(PrognosticsModel):
         | U0n : Redlich-Kister parameter (- electrode)
         | An : Redlich-Kister parameters (- electrode)
         | VEOD : End of Discharge Voltage Threshold
+        | VDropoff : Voltage above EOD after which voltage will be considered in SOC calculation
+        | ocv_grid : Optional, number of mole fractions (from 0 to 1) at which the Redlich-Kister expansion of each electrode is tabulated, for a faster output equation by linear interpolation. None (default) for exact evaluation. The maximum error in either electrode potential (V) is reported as derived parameter ocv_max_error
         | x0 : Initial state
     """
     events = ['EOD']
     inputs = ['i']
     states = ['tb', 'Vo', 'Vsn', 'Vsp', 'qnB', 'qnS', 'qpB', 'qpS']
     outputs = ['t', 'v']
+    is_vectorized = True  # Equations accept arrays of samples (see PrognosticsModel.simulate_to_threshold_batch)
 
     default_parameters = {  # Set to defaults
         'qMobile': 7600,
@@ -208,7 +282,10 @@ class BatteryElectroChemEOD(PrognosticsModel):
 
         # End of discharge voltage threshold
         'VEOD': 3.0, 
-        'VDropoff': 0.1 # Voltage above EOD after which voltage will be considered in SOC calculation
+        'VDropoff': 0.1, # Voltage above EOD after which voltage will be considered in SOC calculation
+
+        # Number of points at which electrode potentials are tabulated (None for exact)
+        'ocv_grid': None
     }
 
     state_limits = {
@@ -227,52 +304,58 @@ class BatteryElectroChemEOD(PrognosticsModel):
         'xpMin': [update_qpmin, update_qpSBmin],
         'xpMax': [update_qpmax, update_qpSBmax],
         'xnMin': [update_qmax, update_qnmin, update_qnSBmin],
-        'xnMax': [update_qmax, update_qnmax, update_qnSBmax]
+        'xnMax': [update_qmax, update_qnmax, update_qnSBmax],
+        'An': [update_an_poly],
+        'Ap': [update_ap_poly],
+        'AnPoly': [update_ocv_tables],
+        'ApPoly': [update_ocv_tables],
+        'ocv_grid': [update_ocv_tables]
     }
 
     def initialize(self, u = {}, z = {}):
         return self.parameters['x0']
 
     def dx(self, x, u):
-        params = self.parameters
+        params = self.parameters_at(x)
         # Negative Surface
-        CnBulk = x['qnB']/params['VolB']
-        CnSurface = x['qnS']/params['VolS']
-        xnS = x['qnS']/params['qSMax']
+        CnBulk = x['qnB']/params.VolB
+        CnSurface = x['qnS']/params.VolS
+        xnS = x['qnS']/params.qSMax
 
-        qdotDiffusionBSn = (CnBulk-CnSurface)/params['tDiffusion']
+        qdotDiffusionBSn = (CnBulk-CnSurface)/params.tDiffusion
 
-        Jn = u['i']/params['Sn']
-        Jn0 = params['kn']*((1-xnS)*xnS)**params['alpha']
+        Jn = u['i']/params.Sn
+        Jn0 = params.kn*((1-xnS)*xnS)**params.alpha
 
-        v_part = R_F*x['tb']/params['alpha']
+        v_part = R_F*x['tb']/params.alpha
 
-        VsnNominal = v_part*asinh(Jn/(Jn0 + Jn0))
-        Vsndot = (VsnNominal-x['Vsn'])/params['tsn']
+        arcsinh = np.arcsinh if isinstance(Jn, np.ndarray) or isinstance(Jn0, np.ndarray) else asinh  # Note: math.asinh is faster for a single sample
+        VsnNominal = v_part*arcsinh(Jn/(Jn0 + Jn0))
+        Vsndot = (VsnNominal-x['Vsn'])/params.tsn
 
         # Positive Surface
-        CpBulk = x['qpB']/params['VolB']
-        CpSurface = x['qpS']/params['VolS']
-        xpS = x['qpS']/params['qSMax']
+        CpBulk = x['qpB']/params.VolB
+        CpSurface = x['qpS']/params.VolS
+        xpS = x['qpS']/params.qSMax
         
-        qdotDiffusionBSp = (CpBulk-CpSurface)/params['tDiffusion']
+        qdotDiffusionBSp = (CpBulk-CpSurface)/params.tDiffusion
         qpBdot = -qdotDiffusionBSp
         qpSdot = u['i'] + qdotDiffusionBSp
 
-        Jp = u['i']/params['Sp']
-        Jp0 = params['kp']*((1-xpS)*xpS)**params['alpha']
+        Jp = u['i']/params.Sp
+        Jp0 = params.kp*((1-xpS)*xpS)**params.alpha
 
-        VspNominal = v_part*asinh(Jp/(Jp0+Jp0))
-        Vspdot = (VspNominal-x['Vsp'])/params['tsp']
+        VspNominal = v_part*arcsinh(Jp/(Jp0+Jp0))
+        Vspdot = (VspNominal-x['Vsp'])/params.tsp
 
         # Combined
-        VoNominal = u['i']*params['Ro']
-        Vodot = (VoNominal-x['Vo'])/params['to']
+        VoNominal = u['i']*params.Ro
+        Vodot = (VoNominal-x['Vo'])/params.to
 
         # Thermal Effects
         voltage_eta = x['Vo'] + x['Vsn'] + x['Vsp'] # (Vep - Ven) - V;
 
-        Tbdot = voltage_eta*u['i']/mC + (params['x0']['tb'] - x['tb'])/tau # Newman
+        Tbdot = voltage_eta*u['i']/mC + (params.x0['tb'] - x['tb'])/tau # Newman
 
         return {
             'Vo': Vodot,
@@ -291,58 +374,52 @@ class BatteryElectroChemEOD(PrognosticsModel):
         # However, as voltage approaches VEOD, the charge-based approach no 
         # longer accurately captures this behavior, so voltage_EOD takes over as 
         # the driving factor. 
-        z = self.output(x)
-        charge_EOD = (x['qnS'] + x['qnB'])/self.parameters['qnMax']
-        voltage_EOD = (z['v'] - self.parameters['VEOD'])/self.parameters['VDropoff'] 
+        params = self.parameters_at(x)
+        z = self.memoized(x, 'output', self.output)  # Shared with threshold_met in simulation
+        charge_EOD = (x['qnS'] + x['qnB'])/params.qnMax
+        voltage_EOD = (z['v'] - params.VEOD)/params.VDropoff
         return {
-            'EOD': min(charge_EOD, voltage_EOD)
+            'EOD': np.minimum(charge_EOD, voltage_EOD) if isinstance(charge_EOD, np.ndarray) else min(charge_EOD, voltage_EOD)
         }
 
-    def output(self, x):
-        params = self.parameters
-        An = params['An']
-        # Negative Surface
-        xnS = x['qnS']/params['qSMax']
-        xnS2 = xnS+xnS  # Note: in python x+x is more efficient than 2*x
-        one_minus_xnS = 1 - xnS
-        xnS2_minus_1 = xnS2 - 1
-        VenParts = [
-            An[0] *xnS2_minus_1/F,  # Ven0
-            An[1] *(xnS2_minus_1**2  - (xnS2*one_minus_xnS))/F,  # Ven1
-            An[2] *(xnS2_minus_1**3  - (4 *xnS*one_minus_xnS)*xnS2_minus_1)/F,  #Ven2
-            An[3] *(xnS2_minus_1**4  - (6 *xnS*one_minus_xnS)*xnS2_minus_1**2) /F,  #Ven3
-            An[4] *(xnS2_minus_1**5  - (8 *xnS*one_minus_xnS)*xnS2_minus_1**3) /F,  #Ven4
-            An[5] *(xnS2_minus_1**6  - (10*xnS*one_minus_xnS)*xnS2_minus_1**4) /F,  #Ven5
-            An[6] *(xnS2_minus_1**7  - (12*xnS*one_minus_xnS)*xnS2_minus_1**5) /F,  #Ven6
-            An[7] *(xnS2_minus_1**8  - (14*xnS*one_minus_xnS)*xnS2_minus_1**6) /F,  #Ven7
-            An[8] *(xnS2_minus_1**9  - (16*xnS*one_minus_xnS)*xnS2_minus_1**7) /F,  #Ven8
-            An[9] *(xnS2_minus_1**10 - (18*xnS*one_minus_xnS)*xnS2_minus_1**8) /F,  #Ven9
-            An[10]*(xnS2_minus_1**11 - (20*xnS*one_minus_xnS)*xnS2_minus_1**9) /F,  #Ven10
-            An[11]*(xnS2_minus_1**12 - (22*xnS*one_minus_xnS)*xnS2_minus_1**10)/F,  #Ven11
-            An[12]*(xnS2_minus_1**13 - (24*xnS*one_minus_xnS)*xnS2_minus_1**11)/F   #Ven12
-        ]
-        Ven = params['U0n'] + R*x['tb']/F*log(one_minus_xnS/xnS) + sum(VenParts)
+    def electrode_potentials(self, xnS, xpS, tb, params = None):
+        """
+        Calculate the equilibrium potential of each electrode (Nernst equation with Redlich-Kister expansion). The expansion is interpolated from a table if parameter ocv_grid is set
+
+        Parameters
+        ----------
+        xnS, xpS : float or np.ndarray
+            Mole fraction at the surface of the negative and positive electrodes (qnS/qSMax, qpS/qSMax)
+        tb : float or np.ndarray
+            Battery temperature (K)
+        params : parameter snapshot, optional
+            Parameters (e.g., from parameters_at). Default is model.p
+
+        Returns
+        -------
+        potentials : tuple
+            (Ven, Vep), of the same shape as the mole fractions. For arrays (e.g., every state of a trajectory or batch), calculated with one vectorized call
+        """
+        if params is None:
+            params = self.p
+        vectorized = isinstance(xnS, np.ndarray) or isinstance(xpS, np.ndarray)
+        ln = np.log if vectorized else log
+        RT_F = R_F*tb
+        if params.ocv_tables is None:
+            Ven_RK = redlich_kister(params.AnPoly, xnS)
+            Vep_RK = redlich_kister(params.ApPoly, xpS)
+        else:
+            # Tabulated (see ocv_grid)
+            interpolate = interpolate_table_array if vectorized else interpolate_table
+            Ven_RK = interpolate(params.ocv_tables[0], xnS)
+            Vep_RK = interpolate(params.ocv_tables[1], xpS)
+        Ven = params.U0n + RT_F*ln((1 - xnS)/xnS) + Ven_RK
+        Vep = params.U0p + RT_F*ln((1 - xpS)/xpS) + Vep_RK
+        return (Ven, Vep)
 
-        # Positive Surface
-        Ap = params['Ap']
-        xpS = x['qpS']/params['qSMax']
-        xpS2 = xpS + xpS
-        VepParts = [
-            Ap[0] *(xpS2-1)/F,  #Vep0
-            Ap[1] *((xpS2-1)**2  - (xpS2*(1-xpS)))/F,  #Vep1 
-            Ap[2] *((xpS2-1)**3  - (4 *xpS*(1-xpS))/(xpS2-1)**(-1)) /F,  #Vep2
-            Ap[3] *((xpS2-1)**4  - (6 *xpS*(1-xpS))/(xpS2-1)**(-2)) /F,  #Vep3
-            Ap[4] *((xpS2-1)**5  - (8 *xpS*(1-xpS))/(xpS2-1)**(-3)) /F,  #Vep4
-            Ap[5] *((xpS2-1)**6  - (10*xpS*(1-xpS))/(xpS2-1)**(-4)) /F,  #Vep5
-            Ap[6] *((xpS2-1)**7  - (12*xpS*(1-xpS))/(xpS2-1)**(-5)) /F,  #Vep6
-            Ap[7] *((xpS2-1)**8  - (14*xpS*(1-xpS))/(xpS2-1)**(-6)) /F,  #Vep7
-            Ap[8] *((xpS2-1)**9  - (16*xpS*(1-xpS))/(xpS2-1)**(-7)) /F,  #Vep8
-            Ap[9] *((xpS2-1)**10 - (18*xpS*(1-xpS))/(xpS2-1)**(-8)) /F,  #Vep9
-            Ap[10]*((xpS2-1)**11 - (20*xpS*(1-xpS))/(xpS2-1)**(-9)) /F,  #Vep10
-            Ap[11]*((xpS2-1)**12 - (22*xpS*(1-xpS))/(xpS2-1)**(-10))/F,  #Vep11
-            Ap[12]*((xpS2-1)**13 - (24*xpS*(1-xpS))/(xpS2-1)**(-11))/F   #Vep12
-        ]
-        Vep = params['U0p'] + R*x['tb']/F*log((1-xpS)/xpS) + sum(VepParts)
+    def output(self, x):
+        params = self.parameters_at(x)
+        (Ven, Vep) = self.electrode_potentials(x['qnS']/params.qSMax, x['qpS']/params.qSMax, x['tb'], params)
 
         return {
             't': x['tb'] - 273.15,
@@ -350,11 +427,11 @@ class BatteryElectroChemEOD(PrognosticsModel):
         }
 
     def threshold_met(self, x):
-        z = self.output(x)
+        z = self.memoized(x, 'output', self.output)
 
         # Return true if voltage is less than the voltage threshold
         return {
-             'EOD': z['v'] < self.parameters['VEOD']
+             'EOD': z['v'] < self.p.VEOD
         }
 
 
@@ -397,6 +474,7 @@ class BatteryElectroChemEOL(PrognosticsModel):
     events = ['InsufficientCapacity']
     inputs = ['i']
     outputs = []
+    is_vectorized = True  # Equations accept arrays of samples (see PrognosticsModel.simulate_to_threshold_batch)
 
     default_parameters = {
         'x0': {
@@ -419,16 +497,18 @@ class BatteryElectroChemEOL(PrognosticsModel):
         return self.parameters['x0']
 
     def dx(self, x, u):
-        params = self.parameters
+        params = self.p
 
         return {
-            'qMax': params['wq'] * abs(u['i']),
-            'Ro': params['wr'] * abs(u['i']),
-            'D': params['wd'] * abs(u['i'])
+            'qMax': params.wq * abs(u['i']),
+            'Ro': params.wr * abs(u['i']),
+            'D': params.wd * abs(u['i'])
         }
 
     def event_state(self, x):
         e_state = (x['qMax']-self.parameters['qMaxThreshold'])/(self.parameters['x0']['qMax']-self.parameters['qMaxThreshold'])
+        if isinstance(e_state, np.ndarray):
+            return {'InsufficientCapacity': np.clip(e_state, 0.0, 1.0)}
         return {'InsufficientCapacity': max(min(e_state, 1.0), 0.0)}
 
     def threshold_met(self, x):
@@ -487,27 +567,22 @@ class BatteryElectroChemEODEOL(BatteryElectroChemEOL, BatteryElectroChemEOD):
     state_limits = deepcopy(BatteryElectroChemEOD.state_limits)
     state_limits.update(BatteryElectroChemEOL.state_limits)
 
+    is_vectorized = False  # Parameters at a state (see PrognosticsModel.parameters_at) are derived for one sample at a time
+    state_parameters = {  # EOD Parameters (corresponding to health), read by BatteryElectroChemEOD equations
+        'qMobile': 'qMax',
+        'Ro': 'Ro',
+        'tDiffusion': 'D'
+    }
+
     def initialize(self, u = {}, z = {}):
         return self.parameters['x0']
 
     def dx(self, x, u):
-        # Set EOD Parameters (corresponding to health)
-        self.parameters['qMobile'] = x['qMax']
-        self.parameters['Ro'] = x['Ro']
-        self.parameters['tDiffusion'] = x['D']
-        
-        # Calculate 
         x_dot = BatteryElectroChemEOD.dx(self, x, u)
         x_dot.update(BatteryElectroChemEOL.dx(self, x, u))
         return x_dot
 
     def output(self, x):
-        # Set EOD Parameters (corresponding to health)
-        self.parameters['qMobile'] = x['qMax']
-        self.parameters['Ro'] = x['Ro']
-        self.parameters['tDiffusion'] = x['D']
-        
-        # Calculate
         return BatteryElectroChemEOD.output(self, x)
 
     def event_state(self, x):
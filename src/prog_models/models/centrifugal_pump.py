@@ -170,29 +170,29 @@ class CentrifugalPumpBase(prognostics_model.PrognosticsModel):
         return x0
 
     def next_state(self, x, u, dt):
-        params = self.parameters
-        Todot = 1/params['mcOil'] * (params['HOil1']*(x['Tt']-x['To']) + params['HOil2']*(x['Tr']-x['To'])\
-            + params['HOil3']*(u['Tamb']-x['To']))
-        Ttdot = 1/params['mcThrust'] * (x['rThrust']*x['w']*x['w'] - params['HThrust1']*(x['Tt']-u['Tamb'])\
-            - params['HThrust2']*(x['Tt']-x['To']))
-        Adot = -params['wA']*x['Q']*x['Q']
-        rRadialdot = params['wRadial']*x['rRadial']*x['w']*x['w']
-        rThrustdot = params['wThrust']*x['rThrust']*x['w']*x['w']
-        friction = (params['r']+x['rThrust']+x['rRadial'])*x['w']
-        QLeak = math.copysign(params['cLeak']*params['ALeak']*math.sqrt(abs(u['psuc']-u['pdisch'])), \
+        params = self.parameters_at(x)
+        Todot = 1/params.mcOil * (params.HOil1*(x['Tt']-x['To']) + params.HOil2*(x['Tr']-x['To'])\
+            + params.HOil3*(u['Tamb']-x['To']))
+        Ttdot = 1/params.mcThrust * (x['rThrust']*x['w']*x['w'] - params.HThrust1*(x['Tt']-u['Tamb'])\
+            - params.HThrust2*(x['Tt']-x['To']))
+        Adot = -params.wA*x['Q']*x['Q']
+        rRadialdot = params.wRadial*x['rRadial']*x['w']*x['w']
+        rThrustdot = params.wThrust*x['rThrust']*x['w']*x['w']
+        friction = (params.r+x['rThrust']+x['rRadial'])*x['w']
+        QLeak = math.copysign(params.cLeak*params.ALeak*math.sqrt(abs(u['psuc']-u['pdisch'])), \
             u['psuc']-u['pdisch'])
-        Trdot = 1/params['mcRadial'] * (x['rRadial']*x['w']*x['w'] - params['HRadial1']*(x['Tr']-u['Tamb']) - params['HRadial2']*(x['Tr']-x['To']))
+        Trdot = 1/params.mcRadial * (x['rRadial']*x['w']*x['w'] - params.HRadial1*(x['Tr']-u['Tamb']) - params.HRadial2*(x['Tr']-x['To']))
         slipn = (u['wsync']-x['w'])/(u['wsync'])
-        ppump = x['A']*x['w']*x['w'] + params['b']*x['w']*x['Q']
+        ppump = x['A']*x['w']*x['w'] + params.b*x['w']*x['Q']
         Qout = max(0,x['Q']-QLeak)
         slip = max(-1,(min(1,slipn)))
         deltaP = ppump+u['psuc']-u['pdisch']
-        Te = params['n']*params['p']*params['R2']/(slip*(u['wsync']+0.00001)) * u['V']**2 \
-            /((params['R1']+params['R2']/slip)**2+(u['wsync']*params['L1'])**2)
-        backTorque = -params['a2']*Qout**2 + params['a1']*x['w']*Qout + params['a0']*x['w']**2
-        Qo = math.copysign(params['c']*math.sqrt(abs(deltaP)), deltaP)
-        wdot = (Te-friction-backTorque)/params['I']
-        Qdot = 1/params['FluidI']*(Qo-x['Q'])
+        Te = params.n*params.p*params.R2/(slip*(u['wsync']+0.00001)) * u['V']**2 \
+            /((params.R1+params.R2/slip)**2+(u['wsync']*params.L1)**2)
+        backTorque = -params.a2*Qout**2 + params.a1*x['w']*Qout + params.a0*x['w']**2
+        Qo = math.copysign(params.c*math.sqrt(abs(deltaP)), deltaP)
+        wdot = (Te-friction-backTorque)/params.I
+        Qdot = 1/params.FluidI*(Qo-x['Q'])
 
         return {
             'w': x['w'] + wdot * dt,
@@ -272,10 +272,13 @@ class CentrifugalPumpWithWear(CentrifugalPumpBase):
 
     state_limits = deepcopy(CentrifugalPumpBase.state_limits)
 
+    state_parameters = {  # Wear rates, read by CentrifugalPumpBase.next_state
+        'wA': 'wA',
+        'wRadial': 'wRadial',
+        'wThrust': 'wThrust'
+    }
+
     def next_state(self, x, u, dt):
-        self.parameters['wA'] = x['wA']
-        self.parameters['wRadial'] = x['wRadial']
-        self.parameters['wThrust'] = x['wThrust']
         next_x = CentrifugalPumpBase.next_state(self, x, u, dt)
         next_x.update({
             'wA': x['wA'],
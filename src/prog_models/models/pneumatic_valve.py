@@ -198,39 +198,39 @@ class PneumaticValveBase(prognostics_model.PrognosticsModel):
         return -C*A*pOut*sqrt(2/Z/R/T*k/(k-1)*abs((pIn/pOut)**(2/k)-(pIn/pOut)**((k+1)/k)))
     
     def next_state(self, x, u, dt):
-        params = self.parameters # optimization
-        pInTop = params['pSupply'] if u['uTop'] else params['pAtm'] 
-        springForce = x['k']*(params['offsetX']+x['x'])
+        params = self.parameters_at(x) # optimization
+        pInTop = params.pSupply if u['uTop'] else params.pAtm 
+        springForce = x['k']*(params.offsetX+x['x'])
         friction = x['v']*x['r']
-        fluidForce = (u['pL']-u['pR'])*params['Av']
-        pInBot = params['pSupply'] if u['uBot'] else params['pAtm'] 
-        volumeBot = params['Vbot0'] + params['Ap']*x['x']
-        volumeTop = params['Vtop0'] + params['Ap']*(params['Ls']-x['x'])
-        plugWeight = params['m']*params['g']
-        kdot = -params['wk']*abs(x['v']*springForce)
-        rdot = params['wr']*abs(x['v']*friction)
-        Aidot = params['wi']*abs(x['v']*friction)
-        pressureBot = x['mBot']*params['R']*params['gas_temp']/params['gas_mass']/volumeBot
-        mBotDotn = self.gas_flow(pInBot,pressureBot,params['Cb'],params['Ab'])
-        pressureTop = x['mTop']*params['R']*params['gas_temp']/params['gas_mass']/volumeTop
-        leakBotToAtm = self.gas_flow(pressureBot,params['pAtm'],1,x['Aeb'])
-        gasForceTop = pressureTop*params['Ap']
-        gasForceBot = pressureBot*params['Ap']
-        leakTopToAtm = self.gas_flow(pressureTop,params['pAtm'],1,x['Aet'])
+        fluidForce = (u['pL']-u['pR'])*params.Av
+        pInBot = params.pSupply if u['uBot'] else params.pAtm 
+        volumeBot = params.Vbot0 + params.Ap*x['x']
+        volumeTop = params.Vtop0 + params.Ap*(params.Ls-x['x'])
+        plugWeight = params.m*params.g
+        kdot = -params.wk*abs(x['v']*springForce)
+        rdot = params.wr*abs(x['v']*friction)
+        Aidot = params.wi*abs(x['v']*friction)
+        pressureBot = x['mBot']*params.R*params.gas_temp/params.gas_mass/volumeBot
+        mBotDotn = self.gas_flow(pInBot,pressureBot,params.Cb,params.Ab)
+        pressureTop = x['mTop']*params.R*params.gas_temp/params.gas_mass/volumeTop
+        leakBotToAtm = self.gas_flow(pressureBot,params.pAtm,1,x['Aeb'])
+        gasForceTop = pressureTop*params.Ap
+        gasForceBot = pressureBot*params.Ap
+        leakTopToAtm = self.gas_flow(pressureTop,params.pAtm,1,x['Aet'])
         leakTopToBot = self.gas_flow(pressureTop,pressureBot,1,x['Ai'])
         mBotdot = mBotDotn + leakTopToBot - leakBotToAtm
-        mTopDotn = self.gas_flow(pInTop,pressureTop,params['Ct'],params['At'])
+        mTopDotn = self.gas_flow(pInTop,pressureTop,params.Ct,params.At)
         pistonForces = -fluidForce - plugWeight - friction - springForce + gasForceBot - gasForceTop
         mTopdot = mTopDotn - leakTopToBot - leakTopToAtm
-        vdot = pistonForces/params['m']
+        vdot = pistonForces/params.m
 
         new_x = x['x']+x['v']*dt
         if (x['x']==0 and pistonForces<0) or (new_x<0):
             vel = 0
             pos = 0
-        elif (x['x']==params['Ls'] and pistonForces>0) or (new_x>params['Ls']):
+        elif (x['x']==params.Ls and pistonForces>0) or (new_x>params.Ls):
             vel = 0
-            pos = params['Ls']
+            pos = params.Ls
         else:
             # moving
             vel = x['v'] + vdot*dt
@@ -241,8 +241,8 @@ class PneumaticValveBase(prognostics_model.PrognosticsModel):
             'v': vel,
             'mTop': x['mTop'] + mTopdot * dt,
             'mBot': x['mBot'] + mBotdot * dt,
-            'Aeb': x['Aeb'] + params['wb'] * dt,
-            'Aet': x['Aet'] + params['wt'] * dt,
+            'Aeb': x['Aeb'] + params.wb * dt,
+            'Aet': x['Aet'] + params.wt * dt,
             'Ai': x['Ai'] + Aidot * dt,
             'k': x['k'] + kdot * dt,
             'r': x['r'] + rdot * dt,
@@ -327,12 +327,15 @@ class PneumaticValveWithWear(PneumaticValveBase):
 
     state_limits = deepcopy(PneumaticValveBase.state_limits)
 
+    state_parameters = {  # Wear parameters, read by PneumaticValveBase.next_state
+        'wb': 'wb',
+        'wi': 'wi',
+        'wk': 'wk',
+        'wr': 'wr',
+        'wt': 'wt'
+    }
+
     def next_state(self, x, u, dt):
-        self.parameters['wb'] = x['wb']
-        self.parameters['wi'] = x['wi']
-        self.parameters['wk'] = x['wk']
-        self.parameters['wr'] = x['wr']
-        self.parameters['wt'] = x['wt']
         next_x = PneumaticValveBase.next_state(self, x, u, dt)
         next_x.update({
             'wb': x['wb'],
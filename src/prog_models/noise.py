@@ -0,0 +1,171 @@
+# Copyright © 2021 United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration.  All Rights Reserved.
+
+"""
+Noise sampling for process and measurement noise. Noise is drawn in blocks (one array covering every key for many future steps) instead of once per key per step, which avoids the overhead of many small calls to numpy.
+
+Values are drawn from a random number generator (the model's, see PrognosticsModel.rng). Values drawn in advance are discarded when a simulation starts or the generator is replaced (see BlockNoise.reset), so results are reproducible given the state of the generator
+"""
+
+import numpy as np
+from .exceptions import ProgModelTypeError
+
+def _normal(rng, size):
+    return rng.standard_normal(size)
+
+def _uniform(rng, size):
+    return rng.uniform(-1, 1, size)
+
+def _triangular(rng, size):
+    return rng.triangular(-1, 0, 1, size)
+
+# Distributions supported by BlockNoise, each a function (rng, size) -> samples with a scale of 1
+# Note: module-level functions (not lambdas), so samplers can be pickled
+_distributions = {
+    'normal': _normal,
+    'gaussian': _normal,
+    'uniform': _uniform,
+    'triangular': _triangular
+}
+
+
+class BlockNoise():
+    """
+    Noise for a fixed set of keys (e.g., model.states), drawn in blocks covering many future steps
+
+    Args:
+        keys ([str]): Keys to which noise is applied, in order
+        scale (dict): Scale of noise for each key (standard deviation for normal, or half width for uniform and triangular)
+        dist (str, optional): Distribution: 'normal' (default, or 'gaussian'), 'uniform', or 'triangular'
+        rng (np.random.Generator, optional): Random number generator from which noise is drawn. Default is a new generator
+        max_block_size (int, optional): Maximum number of steps drawn at once. Blocks start small and double in size with each block drawn in a simulation, so short simulations do not draw many unused values
+
+    Raises:
+        ProgModelTypeError: If the distribution is not supported
+    """
+    MIN_BLOCK_SIZE = 16
+
+    def __init__(self, keys, scale, dist = 'normal', rng = None, max_block_size = 1024):
+        dist = dist.lower()
+        if dist not in _distributions:
+            raise ProgModelTypeError("Unsupported noise distribution {}".format(dist))
+        self.keys = list(keys)
+        self.dist = dist
+        self.max_block_size = max_block_size
+        self._draw = _distributions[dist]
+        self._scale_source = scale
+        self.simulations = 0  # Number of simulations in progress, during which the scale is only updated when each starts (see refresh)
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.reset()
+
+    def reset(self, rng = None):
+        """
+        Discard any noise drawn in advance, and update the scale from the scale dict (in case it was modified in place)
+
+        Args:
+            rng (np.random.Generator, optional): New random number generator from which noise is drawn. Default is to keep the current generator
+        """
+        if rng is not None:
+            self.rng = rng
+        self._update_scale()
+        self._block = []
+        self._index = 0
+        self._block_size = self.MIN_BLOCK_SIZE
+
+    def refresh(self):
+        """
+        Update the scale from the scale dict (in case it was modified in place), discarding any noise drawn in advance with the previous scale. Used when noise is applied outside of a simulation
+        """
+        if self._update_scale():
+            self._block = []
+            self._index = 0
+
+    def _update_scale(self):
+        """Update the scale from the scale dict. Returns True if the scale changed"""
+        scale = np.array([self._scale_source[key] for key in self.keys], dtype=float)
+        if getattr(self, 'scale', None) is not None and np.array_equal(scale, self.scale):
+            return False
+        self.scale = scale
+        self.is_zero = not scale.any()
+        return True
+
+    def _scaled(self, samples):
+        """Scale (n x n_keys) samples with a scale of 1"""
+        return samples*self.scale
+
+    def sample(self):
+        """Get noise for one step
+
+        Returns:
+            list[float]: Noise for each key, in order of keys
+        """
+        if self._index == len(self._block):
+            # Draw next block
+            self._block = self._scaled(self._draw(self.rng, (self._block_size, len(self.keys)))).tolist()
+            self._index = 0
+            self._block_size = min(2*self._block_size, self.max_block_size)
+        self._index += 1
+        return self._block[self._index - 1]
+
+    def sample_batch(self, n_samples):
+        """Get noise for one step of a batch of samples, drawn at once
+
+        Args:
+            n_samples (int): Number of samples
+
+        Returns:
+            np.ndarray: (n_keys x n_samples) array of noise, where row i corresponds to keys[i]
+        """
+        return self._scaled(self._draw(self.rng, (n_samples, len(self.keys)))).T
+
+
+def _factorize(covariance):
+    """Factor L of a symmetric positive semi-definite matrix, where covariance = L @ L.T"""
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        # Not positive definite (e.g., a key without noise) - factorize by eigendecomposition instead
+        (values, vectors) = np.linalg.eigh(covariance)
+        if values.min() < -1e-10*max(1, np.abs(values).max()):
+            raise ProgModelTypeError("Noise covariance must be positive semi-definite")
+        return vectors*np.sqrt(np.clip(values, 0, None))
+
+
+class CorrelatedBlockNoise(BlockNoise):
+    """
+    Correlated normal noise for a fixed set of keys (e.g., model.states), drawn in blocks covering many future steps.
+    The covariance matrix is factorized (Cholesky) once, and each block is sampled with a single matrix multiply
+
+    Args:
+        keys ([str]): Keys to which noise is applied, in order
+        covariance (array): (n_keys x n_keys) covariance matrix, where row and column i correspond to keys[i]
+        dist (str, optional): Distribution: must be 'normal' (default, or 'gaussian')
+        rng (np.random.Generator, optional): Random number generator from which noise is drawn. Default is a new generator
+        max_block_size (int, optional): Maximum number of steps drawn at once (see BlockNoise)
+
+    Raises:
+        ProgModelTypeError: If the distribution is not normal, or covariance is not a symmetric positive semi-definite matrix of the right shape
+    """
+    def __init__(self, keys, covariance, dist = 'normal', rng = None, max_block_size = 1024):
+        if dist.lower() not in ('normal', 'gaussian'):
+            raise ProgModelTypeError("Noise covariance is only supported for normal distribution, was {}".format(dist))
+        self.covariance = None
+        super().__init__(keys, covariance, dist, rng, max_block_size)
+
+    def _update_scale(self):
+        covariance = np.array(self._scale_source, dtype=float)
+        if self.covariance is not None and np.array_equal(covariance, self.covariance):
+            # Unchanged - use cached factor
+            return False
+        n = len(self.keys)
+        if covariance.shape != (n, n):
+            raise ProgModelTypeError("Noise covariance must be a ({0} x {0}) matrix, was {1}".format(n, covariance.shape))
+        if not np.allclose(covariance, covariance.T):
+            raise ProgModelTypeError("Noise covariance must be symmetric")
+        self.factor = _factorize(covariance)
+        self.covariance = covariance
+        self.is_zero = not self.factor.any()
+        return True
+
+    def _scaled(self, samples):
+        return samples @ self.factor.T
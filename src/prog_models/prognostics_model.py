@@ -6,10 +6,51 @@ from abc import abstractmethod, ABC
 from numbers import Number
 import numpy as np
 from copy import deepcopy
-from collections import UserDict
+from collections import UserDict, namedtuple
+from contextlib import contextmanager
+from itertools import product
+from operator import itemgetter
 import types
+import os
 from array import array
-from .sim_result import SimResult, LazySimResult
+from .sim_result import SimResult, LazySimResult, ColumnarSimResult
+from .state_container import StateContainer
+from .integrators import integration_methods
+from .ensemble import run_ensemble, run_sweep
+from .noise import BlockNoise, CorrelatedBlockNoise
+from .serialization import by_value
+
+# Parameter snapshot types, by parameter keys (see PrognosticsModelParameters.snapshot)
+_snapshot_types = {}
+
+# Types of parameter values that can be shared between models without copying (see PrognosticsModel.clone)
+# Note: a set of exact types, which is much faster to check than isinstance with Number
+_immutable_types = {int, float, complex, bool, str, bytes, tuple, frozenset, type(None), types.FunctionType, types.BuiltinFunctionType, np.float64, np.int64, np.bool_}
+
+
+class _cached_property():
+    """
+    Property whose value is calculated when first read, then stored in the instance's __dict__ (which takes precedence over this descriptor) until removed from it (e.g., model.__dict__.pop('p', None)). Equivalent to functools.cached_property, which requires Python 3.8
+    """
+    def __init__(self, fcn):
+        self.fcn = fcn
+        self.name = fcn.__name__
+        self.__doc__ = fcn.__doc__
+
+    def __get__(self, instance, owner = None):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.name] = self.fcn(instance)
+        return value
+
+
+def _copy_value(value):
+    """Copy a parameter value. Faster than deepcopy for common values (e.g., x0: dict of numbers)"""
+    if type(value) in (dict, list) and all(type(item) in _immutable_types for item in (value.values() if type(value) is dict else value)):
+        return value.copy()
+    if type(value) is np.ndarray and value.dtype != object:
+        return value.copy()
+    return deepcopy(value)
 
 
 class PrognosticsModelParameters(UserDict):
@@ -17,6 +58,9 @@ class PrognosticsModelParameters(UserDict):
     Prognostics Model Parameters - this class replaces a standard dictionary.
     It includes the extra logic to process the different supported manners of defining noise.
 
+    Derived parameters are resolved through a dependency graph: when a parameter is set, every callback that depends on it (directly, or through the parameters derived by another callback) is run once, in dependency order.
+    The parameters derived by each callback are learned when it is run
+
     Args:
         model: PrognosticsModel for which the params correspond
         dict_in: Initial parameters
@@ -25,20 +69,45 @@ class PrognosticsModelParameters(UserDict):
     def __init__(self, model, dict_in = {}, callbacks = {}):
         super().__init__()
         self.__m = model
+        self.__outputs = {}  # Parameters derived by each callback
+        self.__plans = {}  # Cached callbacks to run (in order) when a set of parameters changes
+        self.__pending = None  # Parameters changed in a batch, or None if not in a batch
+        self.__shared = set()  # Keys of mutable values shared with a clone, copied when first read (see PrognosticsModel.clone)
         self.callbacks = {}
-        # Note: Callbacks are set to empty to prevent calling callbacks with a partial or empty dict on line 32. 
+        # Note: Callbacks are set to empty to prevent calling callbacks with a partial or empty dict below
         for (key, value) in dict_in.items():
             # Deepcopy is needed here to force copying when value is an object (e.g., dict)
             self[key] = deepcopy(value)
 
         # Add and run callbacks
         # Has to be done here so the base parameters are all set 
-        self.callbacks = callbacks
-        for key in callbacks:
-            if key in self:
-                for callback in callbacks[key]:
-                    changes = callback(self)
-                    self.update(changes)
+        self.callbacks = {key: list(key_callbacks) for (key, key_callbacks) in callbacks.items()}
+        self.__plans = {}
+        keys = [key for key in self.callbacks if key in self]
+        # Run each callback once to learn what it derives, then again in dependency order
+        # Note: Callbacks using a parameter derived by a callback that has not run yet are retried after the others
+        learned = set()
+        pending = self.__dependents(keys)
+        while pending:
+            for callback in pending:
+                try:
+                    self.__run(callback)
+                    learned.add(callback)
+                except KeyError:
+                    pass
+            if not learned.intersection(pending):
+                self.__run(pending[0])  # Raises
+            # Include callbacks depending on newly learned parameters
+            pending = [callback for callback in self.__dependents(keys) if callback not in learned]
+        self.__resolve(keys)
+
+    def __getitem__(self, key):
+        if key in self.__shared:
+            # Copy on first read, so changes to the value (e.g., x0) are not shared with clones
+            self.__shared.discard(key)
+            self.data[key] = _copy_value(self.data[key])
+            self.__m.__dict__.pop('p', None)  # Snapshot out of date (see PrognosticsModel.p)
+        return self.data[key]
 
     def __setitem__(self, key, value):
         """Set model configuration, overrides dict.__setitem__()
@@ -50,13 +119,125 @@ class PrognosticsModelParameters(UserDict):
         Raises:
             ProgModelTypeError: Improper configuration for a model
         """
-        super().__setitem__(key, value)
+        self.__set(key, value)
+        if self.__pending is not None:
+            self.__pending.add(key)
+        elif key in self.callbacks:
+            self.__resolve((key,))
+
+    def update(self, *args, **kwargs):
+        """Set several parameters, resolving derived parameters once (see batch)"""
+        with self.batch():
+            super().update(*args, **kwargs)
+
+    @contextmanager
+    def batch(self):
+        """
+        Defer updating derived parameters until the end of the block, so each is updated at most once however many parameters are set
+
+        Example:
+            | with m.parameters.batch():
+            |     m.parameters['qMobile'] = 7600
+            |     m.parameters['xnMax'] = 0.6
+        """
+        if self.__pending is not None:
+            # Nested - resolved at the end of the outermost batch
+            yield self
+            return
+        self.__pending = set()
+        try:
+            yield self
+        finally:
+            (keys, self.__pending) = (self.__pending, None)
+            self.__resolve(keys)
+
+    def __run(self, callback):
+        """Run a derived parameter callback, setting the parameters it derives"""
+        changes = callback(self)
+        outputs = self.__outputs.get(callback)
+        if outputs is None or not outputs.issuperset(changes):
+            # Derives new parameters - dependency graph changed
+            # Note: Replaced instead of modified, because they are shared with clones
+            self.__outputs = {**self.__outputs, callback: (outputs or set()).union(changes)}
+            self.__plans = {}
+        for (key, value) in changes.items():
+            self.__set(key, value)
+
+    def __plan(self, keys):
+        """Callbacks to run (in order) when keys change. Cached"""
+        keys = frozenset(keys)
+        plan = self.__plans.get(keys)
+        if plan is None:
+            plan = self.__plans[keys] = self.__dependents(keys)
+        return plan
+
+    def __resolve(self, keys):
+        """Run every callback that depends on keys, each once, in dependency order"""
+        for callback in self.__plan(keys):
+            self.__run(callback)
+
+    def derive(self, changes):
+        """
+        Calculate the parameters with changes applied and the parameters derived from them updated, without modifying these parameters
+
+        Args:
+            changes (dict): New values of parameters
+
+        Returns:
+            dict: All parameters, with changes and derived parameters. Keys are in the same order as these parameters
+        """
+        values = self.data.copy()
+        values.update(changes)
+        for callback in self.__plan(changes.keys()):
+            values.update(callback(values))
+        return values
+
+    def __dependents(self, keys):
+        """Find every callback that depends on keys, directly or through derived parameters, sorted so each runs after the callbacks it depends on
+
+        Raises:
+            ProgModelException: If derived parameters have a circular dependency
+        """
+        # Parameters that trigger each callback
+        triggers = {}
+        for (key, key_callbacks) in self.callbacks.items():
+            for callback in key_callbacks:
+                triggers.setdefault(callback, set()).add(key)
+
+        # Affected callbacks
+        affected = []
+        visited = set()
+        pending = list(keys)
+        while pending:
+            key = pending.pop(0)
+            if key in visited:
+                continue
+            visited.add(key)
+            for callback in self.callbacks.get(key, []):
+                if callback not in affected:
+                    affected.append(callback)
+                    pending.extend(self.__outputs.get(callback, ()))
+
+        # Topological sort, otherwise in order found
+        depends = {
+            callback: [other for other in affected if other is not callback and not self.__outputs.get(other, set()).isdisjoint(triggers[callback])]
+            for callback in affected}
+        order = []
+        while len(order) < len(affected):
+            for callback in affected:
+                if callback not in order and all(other in order for other in depends[callback]):
+                    order.append(callback)
+                    break
+            else:
+                raise ProgModelException("Derived parameters have a circular dependency")
+        return order
+
+    def __set(self, key, value):
+        """Set a parameter without updating derived parameters, configuring noise"""
+        self.data[key] = value
+        self.__shared.discard(key)
+        self.__m.__dict__.pop('p', None)  # Snapshot out of date (see PrognosticsModel.p)
 
-        if key in self.callbacks:
-            for callback in self.callbacks[key]:
-                changes = callback(self)
-                self.update(changes) # Merge in changes
-        
         if key == 'process_noise':
             if callable(self['process_noise']):  # Provided a function
                 self.__m.apply_process_noise = types.MethodType(self['process_noise'], self.__m)
@@ -64,28 +245,18 @@ class PrognosticsModelParameters(UserDict):
                 # Process noise is single number - convert to dict
                 if isinstance(self['process_noise'], Number):
                     self['process_noise'] = {key: self['process_noise'] for key in self.__m.states}
-                
-                # Process distribution type
-                if 'process_noise_dist' in self and self['process_noise_dist'].lower() not in ["gaussian", "normal"]:
-                    # Update process noise distribution to custom
-                    if self['process_noise_dist'].lower() == "uniform":
-                        def uniform_process_noise(self, x, dt=1):
-                            return {key: x[key] + \
-                                dt*np.random.uniform(-self.parameters['process_noise'][key], self.parameters['process_noise'][key]) \
-                                    for key in self.states}
-                        self.__m.apply_process_noise = types.MethodType(uniform_process_noise, self.__m)
-                    elif self['process_noise_dist'].lower() == "triangular":
-                        def triangular_process_noise(self, x, dt=1):
-                            return {key: x[key] + \
-                                dt*np.random.triangular(-self.parameters['process_noise'][key], 0, self.parameters['process_noise'][key]) \
-                                    for key in self.states}
-                        self.__m.apply_process_noise = types.MethodType(triangular_process_noise, self.__m)
-                    else:
-                        raise ProgModelTypeError("Unsupported process noise distribution")
-                
-                # Make sure every key is present (single value already handled above)
-                if not all([key in self['process_noise'] for key in self.__m.states]):
-                    raise ProgModelTypeError("Process noise must have ever key in model.states")
+
+                # Noise is drawn by the default apply_process_noise, using a sampler for the configured distribution
+                if np.ndim(self['process_noise']) == 2:
+                    # Covariance matrix - factorized once here
+                    sampler = CorrelatedBlockNoise(self.__m.states, self['process_noise'], self.get('process_noise_dist', 'normal'), rng = self.__m.rng)
+                else:
+                    # Make sure every key is present (single value already handled above)
+                    if not all([key in self['process_noise'] for key in self.__m.states]):
+                        raise ProgModelTypeError("Process noise must have ever key in model.states")
+                    sampler = BlockNoise(self.__m.states, self['process_noise'], self.get('process_noise_dist', 'normal'), rng = self.__m.rng)
+                self.__m.__dict__.pop('apply_process_noise', None)  # Remove any previously configured noise function
+                self.__m._process_noise_sampler = sampler
         elif key == 'measurement_noise':
             if callable(self['measurement_noise']):
                 self.__m.apply_measurement_noise = types.MethodType(self['measurement_noise'], self.__m)
@@ -93,28 +264,110 @@ class PrognosticsModelParameters(UserDict):
                 # Process noise is single number - convert to dict
                 if isinstance(self['measurement_noise'], Number):
                     self['measurement_noise'] = {key: self['measurement_noise'] for key in self.__m.outputs}
-                
-                # Process distribution type
-                if 'measurement_noise_dist' in self and self['measurement_noise_dist'].lower() not in ["gaussian", "normal"]:
-                    # Update measurement noise distribution to custom
-                    if self['measurement_noise_dist'].lower() == "uniform":
-                        def uniform_noise(self, x):
-                            return {key: x[key] + \
-                                np.random.uniform(-self.parameters['measurement_noise'][key], self.parameters['measurement_noise'][key]) \
-                                    for key in self.outputs}
-                        self.__m.apply_measurement_noise = types.MethodType(uniform_noise, self.__m)
-                    elif self['measurement_noise_dist'].lower() == "triangular":
-                        def triangular_noise(self, x):
-                            return {key: x[key] + \
-                                np.random.triangular(-self.parameters['measurement_noise'][key], 0, self.parameters['measurement_noise'][key]) \
-                                    for key in self.outputs}
-                        self.__m.apply_measurement_noise = types.MethodType(triangular_noise, self.__m)
-                    else:
-                        raise ProgModelTypeError("Unsupported measurement noise distribution")
-                
-                # Make sure every key is present (single value already handled above)
-                if not all([key in self['measurement_noise'] for key in self.__m.outputs]):
-                    raise ProgModelTypeError("Measurement noise must have ever key in model.states")
+
+                # Noise is drawn by the default apply_measurement_noise, using a sampler for the configured distribution
+                if np.ndim(self['measurement_noise']) == 2:
+                    # Covariance matrix - factorized once here
+                    sampler = CorrelatedBlockNoise(self.__m.outputs, self['measurement_noise'], self.get('measurement_noise_dist', 'normal'), rng = self.__m.rng)
+                else:
+                    # Make sure every key is present (single value already handled above)
+                    if not all([key in self['measurement_noise'] for key in self.__m.outputs]):
+                        raise ProgModelTypeError("Measurement noise must have ever key in model.states")
+                    sampler = BlockNoise(self.__m.outputs, self['measurement_noise'], self.get('measurement_noise_dist', 'normal'), rng = self.__m.rng)
+                self.__m.__dict__.pop('apply_measurement_noise', None)  # Remove any previously configured noise function
+                self.__m._measurement_noise_sampler = sampler
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.__shared.discard(key)
+        self.__m.__dict__.pop('p', None)  # Snapshot out of date (see PrognosticsModel.p)
+
+    def _clone(self, model):
+        """
+        Create parameters for model (a clone of this parameters' model), sharing values with these parameters. Mutable values (e.g., x0) are copied when first read by either (copy-on-write)
+
+        Args:
+            model (PrognosticsModel): Clone of this parameters' model
+        
+        Returns:
+            PrognosticsModelParameters: Parameters for model
+        """
+        params = self.__class__.__new__(self.__class__)
+        params.data = self.data.copy()
+        params.__m = model
+        params.callbacks = {key: list(key_callbacks) for (key, key_callbacks) in self.callbacks.items()}
+        params.__outputs = self.__outputs  # Shared until the dependency graph changes
+        params.__plans = self.__plans
+        params.__pending = None
+        shared = {key for (key, value) in self.data.items() if type(value) not in _immutable_types}
+        self.__shared.update(shared)
+        self.__m.__dict__.pop('p', None)  # Snapshot includes shared values (see snapshot)
+        params.__shared = shared
+
+        # Noise samplers and functions for model
+        for key in ('process_noise', 'measurement_noise'):
+            if key in params.data:
+                params.__set(key, params[key])  # Note: Copies mutable value (e.g., dict), which the sampler reads
+                self.__shared.discard(key)  # Not shared, so the value read by this model's sampler is never replaced by a copy
+        return params
+
+    def _state(self):
+        """
+        State from which the parameters can be restored exactly (see _restored), e.g., to pickle a model
+
+        Returns:
+            tuple: (parameters, callbacks, parameters derived by each callback)
+        """
+        # Note: Outputs as pairs, because by_value only prepares the values of a dict (callbacks can be lambdas)
+        return (dict(self.data), self.callbacks, list(self.__outputs.items()))
+
+    @classmethod
+    def _restored(cls, model, data, callbacks, outputs):
+        """
+        Restore parameters for model from their state (see _state), setting each exactly, without running derived parameter callbacks (e.g., when unpickling a model)
+
+        Args:
+            model (PrognosticsModel): Model for which the params correspond
+            data (dict): Parameters
+            callbacks (dict): Callbacks for derived parameters
+            outputs (list): Parameters derived by each callback, as (callback, parameters) pairs
+
+        Returns:
+            PrognosticsModelParameters: Parameters for model
+        """
+        params = cls.__new__(cls)
+        params.data = {}
+        params.__m = model
+        params.callbacks = callbacks
+        params.__outputs = dict(outputs)
+        params.__plans = {}
+        params.__pending = None
+        params.__shared = set()
+        for (key, value) in data.items():
+            params.__set(key, value)
+        # Noise, configured with the restored distribution
+        for key in ('process_noise', 'measurement_noise'):
+            if key in params.data:
+                params.__set(key, params.data[key])
+        return params
+
+    def snapshot(self):
+        """
+        Create an immutable copy of the parameters with attribute access (e.g., snapshot.Rs), which is much faster to read than this dictionary (see PrognosticsModel.p)
+
+        Returns:
+            namedtuple: Parameters, one field per key. Keys that are not valid field names are renamed by position (e.g., _3)
+
+        Note:
+            Values are not copied- objects (e.g., x0) are shared with the parameters. Values shared with a clone are copied first (see _clone), so they are never shared with the clone's parameters
+        """
+        for key in list(self.__shared):
+            self[key]  # Copy on read
+        keys = tuple(self.data.keys())
+        snapshot_type = _snapshot_types.get(keys)
+        if snapshot_type is None:
+            snapshot_type = _snapshot_types[keys] = namedtuple('ParameterSnapshot', [str(key) for key in keys], rename = True)
+        return snapshot_type._make(self.data.values())
 
     def register_derived_callback(self, key, callback):
         """Register a new callback for derived parameters
@@ -127,11 +380,24 @@ class PrognosticsModelParameters(UserDict):
             self.callbacks[key].append(callback)
         else:
             self.callbacks[key] = [callback]
+        self.__plans = {}  # Note: Replaced instead of cleared, because it is shared with clones
 
-        # Run new callback
+        # Run new callback, then anything depending on what it derives
         if key in self:
-            updates = callback(self[key])
-            self.update(updates)
+            self.__run(callback)
+            self.__resolve(self.__outputs[callback])
+
+
+# Model attributes not pickled as is: recreated from parameters or the generator, or caches (see PrognosticsModel.__reduce__)
+_unpickled_attributes = {
+    'parameters', 'p', '_process_noise_sampler', '_measurement_noise_sampler', 'apply_process_noise', 'apply_measurement_noise',
+    '_PrognosticsModel__rng', '_PrognosticsModel__seed_sequence', '_PrognosticsModel__parameters_at',
+    '_PrognosticsModel__evaluations'}
+
+
+def _restore_model(cls):
+    """Unpickle a model (see PrognosticsModel.__reduce__), without calling __init__. Parameters and attributes are restored after, as the state of the model (see PrognosticsModel.__setstate__)"""
+    return cls.__new__(cls)
 
 
 class PrognosticsModel(ABC):
@@ -150,14 +416,16 @@ class PrognosticsModel(ABC):
         Configuration parameters for model. Parameters supported by every model include:\n
             * process_noise : Process noise (applied at dx/next_state).
                 Can be scalar (e.g., .2) characteric of the process noise distribution to be applied to every state, a dictionary of values for each
-                state (e.g., {'x1': 0.2, 'x2': 0.3}), or a function (x) -> x\n
+                state (e.g., {'x1': 0.2, 'x2': 0.3}), a covariance matrix for correlated normal noise (n_states x n_states, in order of model.states, e.g., [[0.04, 0.01], [0.01, 0.09]]), or a function (x) -> x\n
                 See: examples.noise for more details\n
             * process_noise_dist : Optional, distribution for process noise (e.g., normal, uniform, triangular)\n
             * measurement_noise : Measurement noise (applied in output eqn)
                 Can be number (e.g., .2) characteric of the process noise distribution applied to every output, a dictionary of values for each
-                output (e.g., {'z1': 0.2, 'z2': 0.3}), or a function (z) -> z\n
+                output (e.g., {'z1': 0.2, 'z2': 0.3}), a covariance matrix for correlated normal noise (n_outputs x n_outputs, in order of model.outputs), or a function (z) -> z\n
                 See: examples.noise for more details\n
             * measurement_noise_dist : Optional, distribution for measurement noise (e.g., normal, uniform, triangular)\n
+            * seed : Optional, seed for the model's random number generator (used for noise), for reproducible results (e.g., 42). See: model.rng\n
+            * rng : Optional, random number generator (np.random.Generator) used for noise, instead of a generator created from seed\n
         E.g., PrognosticsModel(process_noise= 0.3, measurement_noise= {'z1': 0.1, 'z2': 0.3})
     
     Raises
@@ -186,6 +454,8 @@ class PrognosticsModel(ABC):
     observables_keys = []  # Identifies for each observable
     events = []       # Identifiers for each event
     param_callbacks = {}  # Callbacks for derived parameters
+    state_parameters = {}  # Parameters backed by states, parameter: state (e.g., health parameters that are also states). See parameters_at
+    is_vectorized = False  # If model equations accept states and inputs whose values are arrays of samples (see simulate_to_threshold_batch and LazySimResult)
 
     def __init__(self, **kwargs):
         if not hasattr(self, 'inputs'):
@@ -207,6 +477,17 @@ class PrognosticsModel(ABC):
         except TypeError:
             raise ProgModelTypeError('model.outputs must be iterable')
 
+        # Random number generator - set before parameters, because noise samplers use it
+        rng = kwargs.pop('rng', None)
+        seed = kwargs.pop('seed', None)
+        if rng is None:
+            self.__seed_sequence = np.random.SeedSequence(seed)
+            self.__rng = np.random.default_rng(self.__seed_sequence)
+        else:
+            self.rng = rng
+
+        self.__parameters_at = (None, None, None)  # Last result of parameters_at: (snapshot, state values, result)
+        self.__evaluations = (None, None, None)  # Values memoized for the current state of a simulation: (state, snapshot, values). See memoized
         self.parameters = PrognosticsModelParameters(self, self.__class__.default_parameters, self.param_callbacks)
         try:
             self.parameters.update(kwargs)
@@ -228,6 +509,211 @@ class PrognosticsModel(ABC):
 
     def __str__(self):
         return "{} Prognostics Model (Events: {})".format(type(self).__name__, self.events)
+
+    def __reduce__(self):
+        """
+        Pickle the model by value (see serialization), so models can be sent to other processes or machines (e.g., with a ProcessPoolExecutor), including generated models (see generate_model) and models with custom noise functions.
+        The model is restored without calling __init__ (so models whose __init__ has required arguments or expensive setup are supported), with parameters (including derived parameters) restored exactly
+        """
+        attributes = {key: value for (key, value) in self.__dict__.items() if key not in _unpickled_attributes}
+        # Note: Parameters and attributes are pickled as state (after the model), so they can refer to the model (e.g., equations of a generated model that use its parameters)
+        memo = {}  # Functions used by both the class and its parameters or attributes are restored as one (see by_value)
+        return (_restore_model, (by_value(type(self), memo),), by_value((self.rng, self.parameters._state(), attributes), memo))
+
+    def __setstate__(self, state):
+        """Restore a pickled model (see __reduce__)"""
+        (rng, parameters, attributes) = state
+        self.__dict__.update(attributes)
+        self.rng = rng
+        self.__parameters_at = (None, None, None)
+        self.__evaluations = (None, None, None)
+        self.parameters = PrognosticsModelParameters._restored(self, *parameters)
+
+    def clone(self, **overrides):
+        """
+        Create a copy of this model, with parameters overridden. Much faster than creating a new model or deepcopy: parameters (including derived parameters) are shared with this model, and mutable values (e.g., x0) are only copied when first read (copy-on-write). 
+        The clone has its own random number generator (see spawn), so clones can be used in parallel (e.g., one per thread or asset)
+
+        Parameters
+        ----------
+        overrides : keyword arguments, optional
+            Parameters to change in the clone (derived parameters are updated), and optionally rng or seed for its random number generator
+
+        Returns
+        -------
+        model : PrognosticsModel
+            Clone of this model
+
+        Example
+        -------
+        | m = PrognosticsModel() # Replace with specific model
+        | models = [m.clone(qMobile = q) for q in np.linspace(7000, 8000, 1000)]
+        """
+        rng = overrides.pop('rng', None)
+        seed = overrides.pop('seed', None)
+        if rng is None:
+            rng = self.spawn(1)[0] if seed is None else np.random.default_rng(seed)
+
+        model = self.__class__.__new__(self.__class__)
+        model.__dict__.update(self.__dict__)
+        for key in ('p', 'apply_process_noise', 'apply_measurement_noise', '_process_noise_sampler', '_measurement_noise_sampler'):
+            model.__dict__.pop(key, None)
+        model.rng = rng
+        model.__parameters_at = (None, None, None)
+        model.__evaluations = (None, None, None)
+        model.parameters = self.parameters._clone(model)
+        if overrides:
+            model.parameters.update(overrides)
+        return model
+
+    @_cached_property
+    def p(self):
+        """
+        Immutable snapshot of the parameters with attribute access (e.g., self.p.Rs). Reading a parameter from the snapshot avoids the overhead of self.parameters (a Python-level dictionary wrapper), so use it in equations called every step (e.g., dx, output, event_state).
+        The snapshot is rebuilt the first time it is read after parameters change
+
+        Example
+        -------
+        | def dx(self, x, u):
+        |     p = self.p
+        |     return {'v': -p.g, ...}
+
+        See Also
+        --------
+        PrognosticsModelParameters.snapshot
+        """
+        return self.parameters.snapshot()
+
+    def parameters_at(self, x):
+        """
+        Get the parameters at state x: the parameter snapshot (see p), with each state-backed parameter (see state_parameters) set from x and the parameters derived from them updated.
+        Use this instead of self.parameters in equations that read state-backed parameters. Parameters are not modified, so there are no side effects and the model can be used in several simulations at once
+
+        Parameters
+        ----------
+        x : dict
+            state, with keys defined by model.states
+
+        Returns
+        -------
+        p : ParameterSnapshot
+            Parameters at state x (see PrognosticsModelParameters.snapshot)
+
+        Example
+        -------
+        | state_parameters = {'qMobile': 'qMax'}  # Parameter qMobile is state qMax
+        | def dx(self, x, u):
+        |     p = self.parameters_at(x)
+        |     ...
+        """
+        p = self.p
+        if not self.state_parameters:
+            return p
+        values = tuple(x[state] for state in self.state_parameters.values())
+        (cached_p, cached_values, cached) = self.__parameters_at
+        if cached_p is p and cached_values == values:
+            # Same as last call (e.g., output and event_state at the same state)
+            return cached
+        changes = dict(zip(self.state_parameters.keys(), values))
+        result = p._make(self.parameters.derive(changes).values())
+        self.__parameters_at = (p, values, result)
+        return result
+
+    def memoized(self, x, key, fcn):
+        """
+        Calculate fcn(x) at most once for the current state of a simulation. The simulation engine marks each new state it steps to (the state object itself, by identity), so model equations called with that state (e.g., threshold_met every step, and event_state from a loading function) can share outputs or intermediates instead of each recalculating them.
+        For any other state (e.g., outside of a simulation, or a copy), or if parameters have changed, fcn(x) is calculated as normal. Models opt in by calling this in their equations
+
+        Parameters
+        ----------
+        x : dict
+            state, with keys defined by model.states
+        key : str
+            Name of the memoized value (e.g., 'output'). Each key must always correspond to the same function
+        fcn : callable
+            Function of state f(x) -> value (e.g., self.output)
+
+        Returns
+        -------
+        value
+            fcn(x)
+
+        Example
+        -------
+        | def threshold_met(self, x):
+        |     z = self.memoized(x, 'output', self.output)  # Shared with event_state
+        |     return {'EOD': z['v'] < self.p.VEOD}
+        """
+        (state, p, values) = self.__evaluations
+        if x is not state or p is not self.p:
+            return fcn(x)
+        if key not in values:
+            values[key] = fcn(x)
+        return values[key]
+
+    @property
+    def rng(self):
+        """
+        Random number generator (np.random.Generator) from which noise is drawn. Each model has its own generator, set using parameter seed or rng when the model is created, or by setting this property
+
+        Example
+        -------
+        | m = PrognosticsModel(seed = 42) # Replace with specific model
+        | m.rng = np.random.default_rng(43)
+        """
+        return self.__rng
+
+    @rng.setter
+    def rng(self, rng):
+        if not isinstance(rng, np.random.Generator):
+            raise ProgModelTypeError("rng must be a np.random.Generator, was {}".format(type(rng)))
+        self.__rng = rng
+        # Seed sequence of the generator, for spawn. Note: named _seed_seq before numpy 1.25
+        bit_generator = rng.bit_generator
+        self.__seed_sequence = getattr(bit_generator, 'seed_seq', None) or bit_generator._seed_seq
+        for sampler in (getattr(self, '_process_noise_sampler', None), getattr(self, '_measurement_noise_sampler', None)):
+            if sampler is not None:
+                sampler.reset(rng)
+
+    def spawn(self, n) -> list:
+        """
+        Create independent random number generators, derived from the seed of this model's generator (see rng). 
+        Use these to give each member of an ensemble, or each thread, its own stream, so concurrent simulations do not share generator state
+
+        Parameters
+        ----------
+        n : int
+            Number of generators
+
+        Returns
+        -------
+        rngs : [np.random.Generator]
+            Independent generators. Each call returns new generators, and the sequence of calls is reproducible for a model created with a seed
+
+        Example
+        -------
+        | m = PrognosticsModel(seed = 42) # Replace with specific model
+        | for rng in m.spawn(10):
+        |     m.rng = rng
+        |     m.simulate_to(100, future_load_eqn, first_output)
+        """
+        return [np.random.default_rng(seed) for seed in self.spawn_seeds(n)]
+
+    def spawn_seeds(self, n) -> list:
+        """
+        Create seeds for independent random number generators (see spawn). Seeds are smaller than generators, for sending to other processes
+
+        Parameters
+        ----------
+        n : int
+            Number of seeds
+
+        Returns
+        -------
+        seeds : [np.random.SeedSequence]
+            Independent seeds, each can be used to create a generator using np.random.default_rng(seed)
+        """
+        return self.__seed_sequence.spawn(n)
     
     @abstractmethod
     def initialize(self, u, z) -> dict:
@@ -284,9 +770,14 @@ class PrognosticsModel(ABC):
         ----
         Configured using parameters `measurement_noise` and `measurement_noise_dist`
         """
-        return {key: z[key] \
-            + np.random.normal(0, self.parameters['measurement_noise'][key]) \
-                for key in z.keys()}
+        sampler = self._measurement_noise_sampler
+        if not sampler.simulations:
+            # Called directly (e.g., by a state estimator) - parameters may have been modified in place since the last call
+            sampler.refresh()
+        if sampler.is_zero:
+            # Optimization - no noise
+            return dict(z)
+        return {key: z[key] + n for (key, n) in zip(sampler.keys, sampler.sample())}
         
     def apply_process_noise(self, x, dt=1) -> dict:
         """
@@ -318,9 +809,20 @@ class PrognosticsModel(ABC):
         ----
         Configured using parameters `process_noise` and `process_noise_dist`
         """
-        return {key: x[key] + \
-            dt*np.random.normal(0, self.parameters['process_noise'][key]) \
-                for key in x.keys()}
+        sampler = self._process_noise_sampler
+        if not sampler.simulations:
+            # Called directly (e.g., by a state estimator) - parameters may have been modified in place since the last call
+            sampler.refresh()
+        if isinstance(x, StateContainer):
+            # Optimization - state is owned by the simulation, so noise is applied in place
+            if not sampler.is_zero:
+                for (key, n) in zip(sampler.keys, sampler.sample()):
+                    x[key] += dt*n
+            return x
+        if sampler.is_zero:
+            # Optimization - no noise
+            return dict(x)
+        return {key: x[key] + dt*n for (key, n) in zip(sampler.keys, sampler.sample())}
 
     def dx(self, x, u):
         """
@@ -404,6 +906,15 @@ class PrognosticsModel(ABC):
         dx = self.dx(x, u)
         return {key: x[key] + dx[key]*dt for key in dx.keys()}
 
+    def is_continuous(self) -> bool:
+        """
+        Returns
+        -------
+        is_continuous : bool
+            If the model defines dx (i.e., is a continuous model). Continuous models support the integration methods of simulate_to_threshold
+        """
+        return type(self).dx is not PrognosticsModel.dx or 'dx' in self.__dict__
+
     def __next_state(self, x, u, dt) -> dict:
         """
         State transition equation: Calls next_state(), calculating the next state, and then adds noise
@@ -445,16 +956,53 @@ class PrognosticsModel(ABC):
         """
         
         # Calculate next state and add process noise
-        next_state = self.apply_process_noise(self.next_state(x, u, dt))
+        return self.__apply_noise_and_limits(self.next_state(x, u, dt))
 
-        # Check if state is within bounds
+    def __apply_noise_and_limits(self, next_state) -> dict:
+        """
+        Adds process noise to a next state calculated without noise (e.g., by next_state()), and then applies state limits
+
+        Parameters
+        ----------
+        next_state : dict
+            state, with keys defined by model.states \n
+            e.g., x = {'abc': 332.1, 'def': 221.003} given states = ['abc', 'def']
+
+        Returns
+        -------
+        x : StateContainer
+            Next state, with noise and state limits applied
+        """
+        if not isinstance(next_state, StateContainer):
+            next_state = StateContainer(self.states, next_state)
+        next_state = self.apply_process_noise(next_state)
+        if not isinstance(next_state, StateContainer):
+            # Custom noise function returned a dict
+            next_state = StateContainer(self.states, next_state)
+
+        return self.__apply_limits(next_state)
+
+    def __apply_limits(self, x) -> dict:
+        """
+        Apply state limits (model.state_limits) to a state, in place
+
+        Parameters
+        ----------
+        x : StateContainer
+            state, with keys defined by model.states
+
+        Returns
+        -------
+        x : StateContainer
+            State, with state limits applied
+        """
         for (key, limit) in self.state_limits.items():
-            if next_state[key] < limit[0]:
-                next_state[key] = limit[0]
-            elif next_state[key] > limit[1]:
-                next_state[key] = limit[1]
+            if x[key] < limit[0]:
+                x[key] = limit[0]
+            elif x[key] > limit[1]:
+                x[key] = limit[1]
 
-        return next_state
+        return x
 
     def observables(self, x) -> dict:
         """
@@ -695,6 +1243,13 @@ class PrognosticsModel(ABC):
              * x (dict): optional, initial state dict, e.g., x= {'x1': 10, 'x2': -5.3}\n
              * thresholds_met_eqn (function/lambda): optional, custom equation to indicate logic for when to stop sim f(thresholds_met) -> bool\n
              * print_inter (bool): optional, toggle intermediate printing, e.g., print_inter = True\n
+             * integration_method (str): optional, method used to integrate dx over each step: 'euler' (default, uses next_state), 'rk4', or 'rk45' (adaptive). Methods other than 'euler' require that the model defines dx, e.g., integration_method = 'rk4'\n
+             * rtol, atol (Number): optional, relative and absolute error tolerances for integration_method 'rk45', e.g., rtol = 1e-6, atol = 1e-9\n
+             * max_substeps (int): optional, maximum number of substeps in each step for integration_method 'rk45', before failing with ProgModelException, e.g., max_substeps = 1000\n
+             * event_localization (str): optional, method used to locate when within the last step the threshold was met, so the time of event is not limited to the resolution of dt: None (default, time at end of step), 'bisect' (re-simulates the step with shorter steps, without process noise), or 'interpolate' (linear interpolation of event_state and state within the step), e.g., event_localization = 'bisect'\n
+             * event_tol (Number): optional, time tolerance (s) for event_localization 'bisect', e.g., event_tol = 1e-6\n
+             * columnar (bool): optional, return inputs and states as ColumnarSimResult (a 2-D array with one column per key) instead of a list of dicts, e.g., columnar = True\n
+             * time_of_event (dict): optional, filled with the time at which each event's threshold was first met (events not met are not included), including events that do not stop the simulation, e.g., time_of_event = {}\n
             e.g., m.simulate_to_threshold(eqn, z, dt=0.1, save_pts=[1, 2])
         
         Returns
@@ -729,6 +1284,109 @@ class PrognosticsModel(ABC):
         | m = PrognosticsModel() # Replace with specific model being simulated
         | (times, inputs, states, outputs, event_states) = m.simulate_to_threshold(future_load_eqn, first_output)
         """
+        # Simulate
+        sim = self.simulate_iter(future_loading_eqn, first_output, threshold_keys, **kwargs)
+        if not isinstance(kwargs.get('print', False), bool):
+            raise ProgModelInputException("'print' must be a bool, was a {}".format(type(kwargs['print'])))
+
+        print_inter = kwargs.get('print', False)
+        columnar = kwargs.get('columnar', False)
+        if not isinstance(columnar, bool):
+            raise ProgModelInputException("'columnar' must be a bool, was a {}".format(type(columnar)))
+
+        # Initialization of save arrays
+        times = array('d')
+        saved_outputs = []
+        saved_event_states = []
+        if columnar:
+            # Fill results directly, without keeping a dict for each point
+            inputs = ColumnarSimResult()
+            states = ColumnarSimResult(keys = self.states)
+            def save(t, u, x):
+                times.append(t)
+                inputs.add_point(t, u)
+                states.add_point(t, x)
+        else:
+            inputs = []
+            states = []  
+            def save(t, u, x):
+                times.append(t)
+                inputs.append(u)
+                states.append(x)
+
+        if print_inter:
+            # Intermediate printing
+            output = self.__output
+            event_state = self.event_state
+            for (t, u, x) in sim:
+                save(t, u, x)
+                saved_outputs.append(output(x))
+                saved_event_states.append(event_state(x))
+                print("Time: {}\n\tInput: {}\n\tState: {}\n\tOutput: {}\n\tEvent State: {}\n"\
+                    .format(t, u, x, saved_outputs[-1], saved_event_states[-1]))
+        else:
+            for (t, u, x) in sim:
+                save(t, u, x)
+        
+        if not saved_outputs:
+            # saved_outputs is empty, so it wasn't calculated in simulation - used cached result
+            saved_outputs = LazySimResult(self.output, times, states, vectorized = self.is_vectorized) 
+            saved_event_states = LazySimResult(self.event_state, times, states, vectorized = self.is_vectorized)
+        else:
+            saved_outputs = SimResult(times, saved_outputs)
+            saved_event_states = SimResult(times, saved_event_states)
+        
+        if not columnar:
+            inputs = SimResult(times, inputs)
+            states = SimResult(times, states)
+
+        return (
+            times, 
+            inputs, 
+            states, 
+            saved_outputs, 
+            saved_event_states
+        )
+
+    def simulate_iter(self, future_loading_eqn, first_output, threshold_keys = None, **kwargs):
+        """
+        Simulate prognostics model until any or specified threshold(s) have been met, yielding the time, input, and state at each save point as the simulation runs.
+        Unlike simulate_to_threshold, results are not accumulated, so memory use does not grow with the horizon. Results can be streamed (e.g., to disk) or aggregated online, and the simulation can be stopped early by breaking out of the loop
+
+        Parameters
+        ----------
+        future_loading_eqn : callable
+            Function of (t) -> z used to predict future loading (output) at a given time (t)
+        first_output : dict
+            First measured output, needed to initialize state
+        threshold_keys: [str], optional
+            Keys for events that will trigger the end of simulation.
+            If blank, simulation will occur if any event will be met ()
+        options: keyword arguments, optional
+            Configuration options for the simulation \n
+            Note: configuration of the model is set through model.parameters \n
+            Supported parameters: see `simulate_to_threshold`. Use option horizon with thresholds_met_eqn = lambda thresholds: False to simulate to a specific time
+
+        Returns
+        -------
+        sim : generator
+            Generator yielding (t, u, x) at each save point, including the initial and final state. Where t is the time (s), u the input (from future_loading_eqn), and x the state at that time
+        
+        Raises
+        ------
+        ProgModelInputException
+
+        See Also
+        --------
+        simulate_to_threshold
+
+        Example
+        -------
+        | first_output = {'o1': 3.2, 'o2': 1.2}
+        | m = PrognosticsModel() # Replace with specific model being simulated
+        | for (t, u, x) in m.simulate_iter(future_load_eqn, first_output, save_freq = 100):
+        |     print(t, m.output(x))
+        """
         # Input Validation
         if not all(key in first_output for key in self.outputs):
             raise ProgModelInputException("Missing key in 'first_output', must have every key in model.outputs")
@@ -745,7 +1403,9 @@ class PrognosticsModel(ABC):
             'save_pts': [],
             'save_freq': 10.0,
             'horizon': 1e100, # Default horizon (in s), essentially inf
-            'print': False
+            'integration_method': 'euler',
+            'event_localization': None,
+            'event_tol': 1e-6
         }
         config.update(kwargs)
         
@@ -768,22 +1428,58 @@ class PrognosticsModel(ABC):
             raise ProgModelInputException("'thresholds_met_eqn' must be callable (e.g., function or lambda)")
         if 'thresholds_met_eqn' in config and config['thresholds_met_eqn'].__code__.co_argcount != 1:
             raise ProgModelInputException("'thresholds_met_eqn' must accept one argument (thresholds)-> bool")
-        if not isinstance(config['print'], bool):
-            raise ProgModelInputException("'print' must be a bool, was a {}".format(type(config['print'])))
+        if not isinstance(config['integration_method'], str):
+            raise ProgModelInputException("'integration_method' must be a string, was a {}".format(type(config['integration_method'])))
+        integration_method = config['integration_method'].lower()
+        if integration_method != 'euler':
+            if integration_method not in integration_methods:
+                raise ProgModelInputException("Unsupported integration_method '{}'. Must be one of: euler, {}".format(config['integration_method'], ', '.join(integration_methods.keys())))
+            if not self.is_continuous():
+                raise ProgModelInputException("integration_method '{}' requires a model that defines dx".format(config['integration_method']))
+        if config['event_localization'] not in (None, 'bisect', 'interpolate'):
+            raise ProgModelInputException("'event_localization' must be None, 'bisect', or 'interpolate', was {}".format(config['event_localization']))
+        if not isinstance(config['event_tol'], Number):
+            raise ProgModelInputException("'event_tol' must be a number, was a {}".format(type(config['event_tol'])))
+        if config['event_tol'] <= 0:
+            raise ProgModelInputException("'event_tol' must be positive, was {}".format(config['event_tol']))
+        if 'time_of_event' in config and not isinstance(config['time_of_event'], dict):
+            raise ProgModelInputException("'time_of_event' must be a dict, was a {}".format(type(config['time_of_event'])))
+
+        return self.__simulate_iter(future_loading_eqn, first_output, threshold_keys, config)
+
+    def __simulate_iter(self, future_loading_eqn, first_output, threshold_keys, config):
+        """
+        Generator for simulate_iter. Config is validated by simulate_iter
+        """
+        integration_method = config['integration_method'].lower()
 
         # Setup
+        if isinstance(getattr(future_loading_eqn, '__call__', None), types.MethodType):
+            # Callable object (e.g., prog_models.loading.PiecewiseConstantLoad) - calling the bound method directly is faster
+            future_loading_eqn = future_loading_eqn.__call__
+        for sampler in (getattr(self, '_process_noise_sampler', None), getattr(self, '_measurement_noise_sampler', None)):
+            if sampler is not None:
+                # Discard noise drawn before the simulation, so results are reproducible given the state of the model's generator
+                sampler.reset()
         t = 0
         u = future_loading_eqn(t)
         if 'x' in config:
             x = config['x']
         else:
             x = self.initialize(u, first_output)
+        x = StateContainer(self.states, x)  # Copy, so the initial state is not modified in place
         
         # Optimization
-        next_state = self.__next_state
-        output = self.__output
+        if integration_method == 'euler':
+            next_state = self.__next_state
+            step = self.next_state  # Without noise, for event localization
+        else:
+            integrator = integration_methods[integration_method](self, **config)
+            apply_noise_and_limits = self.__apply_noise_and_limits
+            def next_state(x, u, dt):
+                return apply_noise_and_limits(integrator(x, u, dt))
+            step = integrator
         thresthold_met_eqn = self.threshold_met
-        event_state = self.event_state
         if 'thresholds_met_eqn' in config:
             check_thresholds = config['thresholds_met_eqn']
         elif threshold_keys is None: 
@@ -794,77 +1490,578 @@ class PrognosticsModel(ABC):
             def check_thresholds(thresholds_met):
                 return any([thresholds_met[key] for key in threshold_keys])
 
-        # Initialization of save arrays
-        times = array('d')
-        inputs = []
-        states = []  
-        saved_outputs = []
-        saved_event_states = []
+        # Configure save points
         dt = config['dt']  # saving to optimize access in while loop
         save_freq = config['save_freq']
         horizon = config['horizon']
         next_save = save_freq
         save_pt_index = 0
-        save_pts = config['save_pts']
-        save_pts.append(1e99)  # Add last endpoint
+        save_pts = list(config['save_pts']) + [1e99]  # Add last endpoint
+        event_localization = config['event_localization']
+        if event_localization:
+            localize_event = self.__localize_event
+            event_tol = config['event_tol']
+        time_of_event = config.get('time_of_event')
+
+        # Noise is applied by the simulation, so its scale (updated above) is not checked each step (see BlockNoise.simulations)
+        samplers = [sampler for sampler in (getattr(self, '_process_noise_sampler', None), getattr(self, '_measurement_noise_sampler', None)) if sampler is not None]
+        for sampler in samplers:
+            sampler.simulations += 1
+        try:
+            # Simulate
+            # Note: Each new state is marked as current (see memoized), discarding values memoized for the last state. Including if the state was updated in place
+            self.__evaluations = (x, self.p, {})
+            yield (t, u, x.copy())  # Copied, because x may be updated in place
+            t_saved = t
+            while t < horizon:
+                t += dt
+                u = future_loading_eqn(t, x)
+                if event_localization:
+                    x_prev = x.copy()
+                x = next_state(x, u, dt)
+                self.__evaluations = (x, self.p, {})
+                thresholds = thresthold_met_eqn(x)
+                thresholds_met = check_thresholds(thresholds)
+                if time_of_event is not None:
+                    for (key, met) in thresholds.items():
+                        if met and key not in time_of_event:
+                            time_of_event[key] = t
+                if thresholds_met and event_localization:
+                    # Refine time of event to within the last step
+                    t_end = t
+                    (dt_event, x) = localize_event(event_localization, x_prev, x, u, dt, step, check_thresholds, event_tol)
+                    self.__evaluations = (x, self.p, {})
+                    t += dt_event - dt
+                    if time_of_event is not None:
+                        # Events newly met in the step, and already met by the refined time
+                        for (key, met) in thresthold_met_eqn(x).items():
+                            if met and time_of_event.get(key) == t_end:
+                                time_of_event[key] = t
+                if (t >= next_save):
+                    next_save += save_freq
+                    yield (t, u, x.copy())
+                    t_saved = t
+                if (t >= save_pts[save_pt_index]):
+                    save_pt_index += 1
+                    yield (t, u, x.copy())
+                    t_saved = t
+                if thresholds_met:
+                    break
+
+            # Save final state
+            if t_saved != t:
+                # This check prevents double recording when the last state was a savepoint
+                yield (t, u, x.copy())
+        finally:
+            for sampler in samplers:
+                sampler.simulations -= 1
+
+    def __localize_event(self, method, x_prev, x, u, dt, step, check_thresholds, tol = 1e-6) -> tuple:
+        """
+        Find when within the last step the thresholds were first met
 
-        # confgure optional intermediate printing
-        if config['print']:
-            def update_all():
-                times.append(t)
-                inputs.append(u)
-                states.append(deepcopy(x))  # Avoid optimization where x is not copied
-                saved_outputs.append(output(x))
-                saved_event_states.append(event_state(x))
-                print("Time: {}\n\tInput: {}\n\tState: {}\n\tOutput: {}\n\tEvent State: {}\n"\
-                    .format(
-                        times[len(times) - 1],
-                        inputs[len(inputs) - 1],
-                        states[len(states) - 1],
-                        saved_outputs[len(saved_outputs) - 1],
-                        saved_event_states[len(saved_event_states) - 1]))  
+        Parameters
+        ----------
+        method : str
+            'bisect' or 'interpolate' (see simulate_to_threshold, option event_localization)
+        x_prev : StateContainer
+            State at the start of the step, where thresholds were not met
+        x : StateContainer
+            State at the end of the step, where thresholds were met
+        u : dict
+            Input over the step
+        dt : number
+            Step size in seconds
+        step : callable
+            Function to advance the state without process noise f(x, u, dt) -> x (e.g., next_state)
+        check_thresholds : callable
+            Function indicating if the simulation should stop f(thresholds_met) -> bool
+        tol : number, optional
+            Time tolerance in seconds (method 'bisect' only)
+
+        Returns
+        -------
+        dt_event : number
+            Time from the start of the step when the thresholds were met (0 < dt_event <= dt)
+        x_event : StateContainer
+            State at dt_event
+        """
+        threshold_met = self.threshold_met
+        if method == 'bisect':
+            apply_limits = self.__apply_limits
+            (lo, hi) = (0, dt)
+            while hi - lo > tol:
+                mid = (lo + hi)/2
+                # Note: copied because some models update the state in place
+                x_mid = step(x_prev.copy(), u, mid)
+                if not isinstance(x_mid, StateContainer):
+                    x_mid = StateContainer(self.states, x_mid)
+                x_mid = apply_limits(x_mid)
+                if check_thresholds(threshold_met(x_mid)):
+                    (hi, x) = (mid, x_mid)
+                else:
+                    lo = mid
+            return (hi, x)
+
+        # Interpolate - Find where each event_state newly met in the step crossed 0
+        es_prev = self.event_state(x_prev)
+        es = self.event_state(x)
+        thresholds = threshold_met(x_prev)
+        met = threshold_met(x)
+        crossings = sorted(
+            (es_prev[key]/(es_prev[key] - es[key]), key) for key in met 
+            if met[key] and not thresholds[key] and key in es and es_prev[key] > es[key])
+
+        # Use the first crossing at which the simulation would have stopped
+        for (fraction, key) in crossings:
+            thresholds[key] = True
+            if check_thresholds(thresholds):
+                break
         else:
-            def update_all():
-                times.append(t)
-                inputs.append(u)
-                states.append(deepcopy(x))  # Avoid optimization where x is not copied
-        
+            # Crossing not found (e.g., threshold does not correspond to event_state reaching 0) - use end of step
+            fraction = 1
+        fraction = min(max(fraction, 0), 1)
+        x_event = StateContainer(self.states, [x_prev[key] + fraction*(x[key] - x_prev[key]) for key in self.states])
+        return (fraction*dt, x_event)
+
+    def __batch_process_noise(self, x, dt, n_samples) -> dict:
+        """
+        Apply process noise to a batch of states, drawing an independent sample for each member of the batch
+
+        Parameters
+        ----------
+        x : dict
+            Batch of states, with keys defined by model.states. Each value is an array with one element per sample
+        dt : number
+            Timestep size in seconds (≥ 0)
+        n_samples : int
+            Number of samples in batch
+
+        Returns
+        -------
+        x : dict
+            Batch of states with applied noise
+        """
+        noise = self.parameters['process_noise']
+        if callable(noise):
+            # Custom noise function - must support arrays
+            return self.apply_process_noise(x, dt)
+        sampler = self._process_noise_sampler
+        if sampler.is_zero:
+            return x
+        noise = sampler.sample_batch(n_samples)
+        return {key: x[key] + dt*noise[i] for (i, key) in enumerate(sampler.keys)}
+
+    def __batch_next_state(self, x, u, dt, active) -> dict:
+        """
+        State transition equation for a batch of states: Calls next_state(), calculating the next state for every active sample, and then adds noise and applies state limits
+
+        Parameters
+        ----------
+        x : dict
+            Batch of states, with keys defined by model.states. Each value is an array with one element per sample
+        u : dict
+            Inputs, with keys defined by model.inputs. Values are either a number (applied to every sample) or an array with one element per sample
+        dt : number
+            Timestep size in seconds (≥ 0)
+        active : np.ndarray
+            Boolean array, True for samples that are still being simulated
+
+        Returns
+        -------
+        x : dict
+            Batch of next states. Samples that are not active are unchanged
+        """
+        n_samples = len(active)
+        if self.is_vectorized:
+            next_x = self.next_state(x, u, dt)
+        else:
+            # Fall back to evaluating each sample individually
+            next_x = {key: x[key].copy() for key in self.states}
+            for i in np.flatnonzero(active):
+                x_i = self.next_state(
+                    {key: x[key][i] for key in self.states},
+                    {key: (value[i] if isinstance(value, np.ndarray) else value) for (key, value) in u.items()},
+                    dt)
+                for key in self.states:
+                    next_x[key][i] = x_i[key]
+        next_x = self.__batch_process_noise(next_x, dt, n_samples)
+
+        # Check if state is within bounds, then freeze samples that have finished
+        for key in self.states:
+            value = next_x[key]
+            if key in self.state_limits:
+                limit = self.state_limits[key]
+                value = np.clip(value, limit[0], limit[1])
+            next_x[key] = np.where(active, value, x[key])
+        return next_x
+
+    def __batch_threshold_met(self, x, active) -> dict:
+        """
+        For each event threshold, calculate if it has been met for each sample in a batch
+
+        Parameters
+        ----------
+        x : dict
+            Batch of states, with keys defined by model.states. Each value is an array with one element per sample
+        active : np.ndarray
+            Boolean array, True for samples that are still being simulated
+
+        Returns
+        -------
+        thresholds_met : dict
+            Boolean array for each event, with keys defined by model.events. Only valid for active samples
+        """
+        if self.is_vectorized:
+            return {key: np.broadcast_to(met, active.shape) for (key, met) in self.threshold_met(x).items()}
+
+        # Fall back to evaluating each sample individually
+        t_met = {key: np.zeros(active.shape, dtype=bool) for key in self.events}
+        for i in np.flatnonzero(active):
+            for (key, met) in self.threshold_met({key: x[key][i] for key in self.states}).items():
+                t_met[key][i] = met
+        return t_met
+
+    def simulate_to_threshold_batch(self, future_loading_eqn, x0, threshold_keys = None, **kwargs) -> tuple:
+        """
+        Simulate a batch of samples of the prognostics model until any or specified threshold(s) have been met for every sample
+
+        Each step advances every sample at once. Samples for which the threshold has been met are frozen at their final state while the remaining samples continue.
+
+        Parameters
+        ----------
+        future_loading_eqn : callable
+            Function of (t, x) -> u used to predict future loading (input) at a given time (t). x is the batch of states, a dict with one array of samples per state.
+            Input values can be a number (applied to every sample) or an array with one element per sample.
+            If future_loading_eqn has a method evaluate(times) -> u (e.g., prog_models.loading.PiecewiseConstantLoad), the load is instead evaluated for many steps at once (it must then not depend on x)
+        x0 : np.ndarray
+            Initial state of every sample (N x n_states), where column i corresponds to model.states[i]
+        threshold_keys: [str], optional
+            Keys for events that will trigger the end of simulation of a sample.
+            If blank, simulation of a sample will end when any event is met
+        options: keyword arguments, optional
+            Configuration options for the simulation \n
+            Note: configuration of the model is set through model.parameters.\n
+            Supported parameters:\n
+             * dt (Number): time step (s), e.g. {'dt': 0.1} \n
+             * save_freq (Number): Frequency at which states are saved (s), e.g., save_freq = 10 \n
+             * horizon (Number): maximum time that the model will be simulated forward (s), e.g., horizon = 1000 \n
+             * save_trajectories (bool): optional, save the states of every sample at each save point, e.g., save_trajectories = True\n
+            e.g., m.simulate_to_threshold_batch(eqn, x0, dt=0.1, horizon=1000)
+
+        Returns
+        -------
+        time_of_event : dict
+            Time at which each event threshold was first met for each sample (array of N values, NaN where not met), with keys defined by model.events
+        states : np.ndarray
+            Final state of each sample (N x n_states), where column i corresponds to model.states[i]
+        saved_states : SimResult or None
+            If save_trajectories, the states (N x n_states) at each saved time. Otherwise None
+
+        Raises
+        ------
+        ProgModelInputException
+
+        See Also
+        --------
+        simulate_to_threshold
+
+        Note
+        ----
+        Models with is_vectorized = True advance every sample with a single call to next_state and threshold_met, so the cost per sample is that of the array operations.
+        Other models are evaluated sample by sample.
+
+        Example
+        -------
+        | m = PrognosticsModel() # Replace with specific model being simulated
+        | x0 = np.array([[m.parameters['x0'][key] for key in m.states]]*1000)
+        | (time_of_event, states, _) = m.simulate_to_threshold_batch(future_load_eqn, x0)
+        """
+        # Input Validation
+        if not (callable(future_loading_eqn)):
+            raise ProgModelInputException("'future_loading_eqn' must be callable f(t, x)")
+
+        x0 = np.array(x0, dtype=float, ndmin=2)
+        if x0.ndim != 2 or x0.shape[1] != len(self.states):
+            raise ProgModelInputException("'x0' must be an array of shape (n_samples, {}), was {}".format(len(self.states), x0.shape))
+
+        if threshold_keys is None:
+            threshold_keys = self.events
+        elif not all([key in self.events for key in threshold_keys]):
+            raise ProgModelInputException("threshold_keys must be event names")
+
+        # Configure
+        config = { # Defaults
+            'dt': 1.0,
+            'save_freq': 10.0,
+            'horizon': 1e100, # Default horizon (in s), essentially inf
+            'save_trajectories': False
+        }
+        config.update(kwargs)
+
+        # Configuration validation
+        if not isinstance(config['dt'], Number):
+            raise ProgModelInputException("'dt' must be a number, was a {}".format(type(config['dt'])))
+        if config['dt'] <= 0:
+            raise ProgModelInputException("'dt' must be positive, was {}".format(config['dt']))
+        if not isinstance(config['save_freq'], Number):
+            raise ProgModelInputException("'save_freq' must be a number, was a {}".format(type(config['save_freq'])))
+        if config['save_freq'] <= 0:
+            raise ProgModelInputException("'save_freq' must be positive, was {}".format(config['save_freq']))
+        if not isinstance(config['horizon'], Number):
+            raise ProgModelInputException("'horizon' must be a number, was a {}".format(type(config['horizon'])))
+        if config['horizon'] < 0:
+            raise ProgModelInputException("'horizon' must be positive, was {}".format(config['horizon']))
+
+        # Setup
+        n_samples = x0.shape[0]
+        x = {key: x0[:, i].copy() for (i, key) in enumerate(self.states)}
+        active = np.ones(n_samples, dtype=bool)
+        time_of_event = {key: np.full(n_samples, np.nan) for key in self.events}
+        t = 0
+        sampler = getattr(self, '_process_noise_sampler', None)
+        if sampler is not None:
+            sampler.refresh()  # Parameters may have been modified in place
+
+        # Initialization of save arrays
+        save = config['save_trajectories']
+        times = array('d')
+        saved_states = []
+        dt = config['dt']  # saving to optimize access in while loop
+        save_freq = config['save_freq']
+        horizon = config['horizon']
+        next_save = save_freq
+
+        def update_all():
+            times.append(t)
+            saved_states.append(np.column_stack([x[key] for key in self.states]))
+
+        # Loads that support evaluating many times at once (e.g., prog_models.loading.PiecewiseConstantLoad) are calculated for a block of steps at a time
+        precompute_load = hasattr(future_loading_eqn, 'evaluate')
+        load_block_size = 256  # Steps
+        load_block = []
+        block_index = 0
+
         # Simulate
-        update_all()
-        while t < horizon:
-            t += dt
-            u = future_loading_eqn(t, x)
-            x = next_state(x, u, dt)
-            if (t >= next_save):
+        if save:
+            update_all()
+        while t < horizon and active.any():
+            if precompute_load:
+                if block_index == len(load_block):
+                    # Note: cumsum adds dt in the same order as the loop, so times match exactly
+                    block_times = np.cumsum([t] + [dt]*load_block_size)[1:]
+                    loads = future_loading_eqn.evaluate(block_times)
+                    load_block = [dict(zip(loads.keys(), values)) for values in zip(*loads.values())]
+                    block_index = 0
+                u = load_block[block_index]
+                block_index += 1
+                t += dt
+            else:
+                t += dt
+                u = future_loading_eqn(t, x)
+            x = self.__batch_next_state(x, u, dt, active)
+            thresholds_met = self.__batch_threshold_met(x, active)
+            finished = np.zeros(n_samples, dtype=bool)
+            for (key, met) in thresholds_met.items():
+                newly_met = active & met & np.isnan(time_of_event[key])
+                time_of_event[key][newly_met] = t
+                if key in threshold_keys:
+                    finished |= met
+            if save and (t >= next_save):
                 next_save += save_freq
                 update_all()
-            if (t >= save_pts[save_pt_index]):
-                save_pt_index += 1
-                update_all()
-            if check_thresholds(thresthold_met_eqn(x)):
-                break
+            active &= ~finished
 
         # Save final state
-        if times[-1] != t:
-            # This check prevents double recording when the last state was a savepoint
+        if save and times[-1] != t:
             update_all()
-        
-        if not saved_outputs:
-            # saved_outputs is empty, so it wasn't calculated in simulation - used cached result
-            saved_outputs = LazySimResult(self.output, times, states) 
-            saved_event_states = LazySimResult(self.event_state, times, states)
-        else:
-            saved_outputs = SimResult(times, saved_outputs)
-            saved_event_states = SimResult(times, saved_event_states)
-        
+
         return (
-            times, 
-            SimResult(times, inputs), 
-            SimResult(times, states), 
-            saved_outputs, 
-            saved_event_states
+            time_of_event,
+            np.column_stack([x[key] for key in self.states]),
+            SimResult(times, saved_states) if save else None
         )
-    
+
+    def simulate_ensemble(self, n_samples, future_loading_eqn, first_output, threshold_keys = None, workers = None, seed = None, **kwargs) -> tuple:
+        """
+        Simulate an ensemble of samples of the prognostics model until any or specified threshold(s) have been met, dividing the samples between a pool of worker processes
+
+        Each sample is simulated as in simulate_to_threshold, with an independent random number generator for noise (apply_process_noise, apply_measurement_noise). The generator for each sample is derived from seed (or from the model's generator, see spawn), so results are reproducible and do not depend on the number of workers.
+
+        Parameters
+        ----------
+        n_samples : int
+            Number of samples to simulate
+        future_loading_eqn : callable
+            Function of (t) -> z used to predict future loading (output) at a given time (t)
+        first_output : dict
+            First measured output, needed to initialize state
+        threshold_keys: [str], optional
+            Keys for events that will trigger the end of simulation.
+            If blank, simulation will occur if any event will be met ()
+        workers : int, optional
+            Number of worker processes. Default is the number of CPUs. If 1, samples are simulated in this process
+        seed : int, optional
+            Seed from which the random number generator of each sample is derived. If None, generators are spawned from the model's generator (see spawn), which is reproducible if the model was created with a seed
+        options: keyword arguments, optional
+            Configuration options for the simulation \n
+            Note: configuration of the model is set through model.parameters \n
+            Supported parameters: see `simulate_to_threshold`
+
+        Returns
+        -------
+        time_of_event : dict
+            Time at which each event threshold was first met for each sample (array of n_samples values, NaN where not met by the end of simulation), with keys defined by model.events
+        states : np.ndarray
+            Final state of each sample (n_samples x n_states), where column i corresponds to model.states[i]
+
+        Raises
+        ------
+        ProgModelInputException
+
+        See Also
+        --------
+        simulate_to_threshold, simulate_to_threshold_batch
+
+        Note
+        ----
+        The model, future_loading_eqn, and configuration are sent to each worker once. On platforms where worker processes are not forked (e.g., Windows, macOS), they must be picklable (e.g., future_loading_eqn defined at module level, not a lambda)
+
+        Example
+        -------
+        | m = PrognosticsModel() # Replace with specific model being simulated
+        | (time_of_event, states) = m.simulate_ensemble(1000, future_load_eqn, first_output, seed = 42)
+        """
+        # Input Validation
+        if not isinstance(n_samples, int) or isinstance(n_samples, bool) or n_samples < 1:
+            raise ProgModelInputException("'n_samples' must be a positive integer, was {}".format(n_samples))
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if not isinstance(workers, int) or isinstance(workers, bool) or workers < 1:
+            raise ProgModelInputException("'workers' must be a positive integer, was {}".format(workers))
+        self.simulate_iter(future_loading_eqn, first_output, threshold_keys, **kwargs)  # Validates configuration
+
+        # Independent seed for each sample
+        if seed is None:
+            seeds = self.spawn_seeds(n_samples)
+        else:
+            seeds = np.random.SeedSequence(seed).spawn(n_samples)
+
+        config = (self, future_loading_eqn, first_output, threshold_keys, kwargs)
+        (_, time_of_event, states) = run_ensemble(config, seeds, min(workers, n_samples))
+
+        time_of_event = {key: time_of_event[:, i] for (i, key) in enumerate(self.events)}
+        return (time_of_event, states)
+
+    def sweep(self, param_grid, future_loading_eqn, first_output, metrics = None, threshold_keys = None, workers = None, seed = None, **kwargs) -> np.ndarray:
+        """
+        Simulate the model until any or specified threshold(s) have been met for each of a set of parameters (e.g., for a design study or sensitivity analysis), dividing the sets between a pool of worker processes
+
+        Each set of parameters is simulated as in simulate_to_threshold, with a clone of the model (see clone) with those parameters and an independent random number generator for noise. The generator for each set is derived from seed (or from the model's generator, see spawn), so results are reproducible and do not depend on the number of workers. This model is not changed.
+
+        Parameters
+        ----------
+        param_grid : dict or [dict]
+            Sets of parameters to simulate. Either a dict of values for each parameter (e.g., {'p1': [1, 2], 'p2': [3, 4, 5]}), for every combination of values (Cartesian product), or a list of sets of parameters (e.g., [{'p1': 1, 'p2': 3}, {'p1': 2, 'p2': 5}]), each with the same keys
+        future_loading_eqn : callable
+            Function of (t) -> z used to predict future loading (output) at a given time (t)
+        first_output : dict
+            First measured output, needed to initialize state
+        metrics : [str] or dict, optional
+            Metrics of the final state to include in the result. Either a list of state keys, or a dict of functions (x) -> float of the final state, by name. Default is every state
+        threshold_keys: [str], optional
+            Keys for events that will trigger the end of simulation.
+            If blank, simulation will occur if any event will be met ()
+        workers : int, optional
+            Number of worker processes. Default is the number of CPUs. If 1, sets of parameters are simulated in this process
+        seed : int, optional
+            Seed from which the random number generator for each set of parameters is derived. If None, generators are spawned from the model's generator (see spawn)
+        options: keyword arguments, optional
+            Configuration options for the simulation \n
+            Supported parameters: see `simulate_to_threshold`
+
+        Returns
+        -------
+        results : np.ndarray
+            Structured array with one element for each set of parameters (in order of param_grid, for a dict the last parameter varying fastest), with fields: \n
+            * parameters : Value of each parameter swept, by key \n
+            * time_of_event : Time at which each event threshold was first met (NaN where not met by the end of simulation), by key in model.events \n
+            * metrics : Value of each metric of the final state, by name
+
+        Raises
+        ------
+        ProgModelInputException
+
+        See Also
+        --------
+        simulate_ensemble, clone
+
+        Note
+        ----
+        The model, future_loading_eqn, metrics, and configuration are sent to each worker once. On platforms where worker processes are not forked (e.g., Windows, macOS), they must be picklable (e.g., future_loading_eqn defined at module level, not a lambda)
+
+        Example
+        -------
+        | m = PrognosticsModel() # Replace with specific model being simulated
+        | results = m.sweep({'p1': np.linspace(0, 1, 100), 'p2': [1, 2, 3]}, future_load_eqn, first_output)
+        | results['time_of_event']['e1'] # Time of event e1 for each set of parameters
+        | results[results['parameters']['p2'] == 1] # Results where p2 is 1
+        """
+        # Input Validation
+        if isinstance(param_grid, dict):
+            keys = list(param_grid.keys())
+            values = [np.atleast_1d(value).tolist() if isinstance(value, np.ndarray) or np.isscalar(value) else list(value) for value in param_grid.values()]
+            points = [dict(zip(keys, combination)) for combination in product(*values)]
+        else:
+            points = [dict(point) for point in param_grid]
+            keys = list(points[0].keys()) if points else []
+            if any(point.keys() != points[0].keys() for point in points):
+                raise ProgModelInputException("Each set of parameters in 'param_grid' must have the same keys")
+        if not points:
+            raise ProgModelInputException("'param_grid' must include at least one set of parameters")
+        for key in keys:
+            if key not in self.parameters:
+                raise ProgModelInputException("'{}' is not a parameter of the model".format(key))
+        if metrics is None:
+            metrics = self.states
+        if not isinstance(metrics, dict):
+            for key in metrics:
+                if key not in self.states:
+                    raise ProgModelInputException("Metric '{}' must be a state, or metrics must be a dict of functions".format(key))
+            metrics = {key: itemgetter(key) for key in metrics}
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if not isinstance(workers, int) or isinstance(workers, bool) or workers < 1:
+            raise ProgModelInputException("'workers' must be a positive integer, was {}".format(workers))
+        self.simulate_iter(future_loading_eqn, first_output, threshold_keys, **kwargs)  # Validates configuration
+
+        # Independent seed for each set of parameters
+        if seed is None:
+            seeds = self.spawn_seeds(len(points))
+        else:
+            seeds = np.random.SeedSequence(seed).spawn(len(points))
+
+        config = (self, future_loading_eqn, first_output, threshold_keys, metrics, kwargs)
+        (_, time_of_event, values) = run_sweep(config, points, seeds, min(workers, len(points)))
+
+        # Structured results
+        def field_type(values):
+            return float if all(isinstance(value, Number) and not isinstance(value, complex) for value in values) else object
+        dtype = [
+            ('parameters', [(key, field_type([point[key] for point in points])) for key in keys]),
+            ('time_of_event', [(key, float) for key in self.events]),
+            ('metrics', [(name, float) for name in metrics])]
+        results = np.empty(len(points), dtype = dtype)
+        for key in keys:
+            field = results['parameters'][key]
+            for (i, point) in enumerate(points):
+                field[i] = point[key]
+        for (i, key) in enumerate(self.events):
+            results['time_of_event'][key] = time_of_event[:, i]
+        for (i, name) in enumerate(metrics):
+            results['metrics'][name] = values[:, i]
+        return results
+
     @staticmethod
     def generate_model(keys, initialize_eqn, output_eqn, next_state_eqn = None, dx_eqn = None, event_state_eqn = None, threshold_eqn = None, config = {'process_noise': 0.1}):
         """
@@ -991,16 +2188,22 @@ class PrognosticsModel(ABC):
             'dt': 1e99
         }
         params.update(kwargs)
+        return self._calc_error(times, inputs, outputs, params['dt'])
+
+    def _calc_error(self, times, inputs, outputs, dt, simulated = None):
+        """Calculate error between simulated and observed (see calc_error). If simulated (list) is provided, the simulated output at each time is appended to it"""
         x = self.initialize(inputs[0], outputs[0])
         t_last = times[0]
         err_total = 0
 
         for t, u, z in zip(times, inputs, outputs):
             while t_last < t:
-                t_new = min(t_last + params['dt'], t)
+                t_new = min(t_last + dt, t)
                 x = self.next_state(x, u, t_new-t_last)
                 t_last = t_new
             z_obs = self.output(x)
+            if simulated is not None:
+                simulated.append(z_obs)
             err_total += sum([(z[key] - z_obs[key])**2 for key in z.keys()])
 
         return err_total
@@ -1012,41 +2215,82 @@ class PrognosticsModel(ABC):
             runs (array[tuple]): data from all runs, where runs[0] is the data from run 0. Each run consists of a tuple of arrays of times, input dicts, and output dicts
             keys ([string]): Parameter keys to optimize
             kwargs: Configuration parameters. Supported parameters include: \n
-             | method: Optimization method- see scikit.optimize.minimize 
+             | method: Optimization method- see scikit.optimize.minimize, or 'differential_evolution' (see scipy.optimize.differential_evolution)
              | options: Options passed to optimizer
+             | bounds: Bounds for each parameter, either a list of (lower, upper) tuples in order of keys, or a dict mapping each key to (lower, upper). Required for 'differential_evolution'
+             | workers: Number of worker processes in which the error is calculated (default: 1, calculated in this process). For 'differential_evolution', the candidates of each generation are divided between workers. For other methods, the runs are divided between workers. Model and runs must be picklable
+             | cache: Memoize the error of each run, so parameters evaluated again (within rounding, see ErrorCache) are not simulated again. False (default) for none, True for a new cache, or an ErrorCache (e.g., to get statistics or simulated outputs, or to set the memory budget). Entries are keyed by the estimated parameters only, so an ErrorCache must only be reused with the same model, runs, keys, and other parameters. With workers, each worker uses its own copy of the cache
+             | Other parameters are passed to calc_error (e.g., dt)
+
+        Raises:
+            ProgModelInputException: If workers is not a positive integer, bounds are missing for 'differential_evolution', bounds do not match keys, or cache is invalid
 
         See: examples.param_est
         """
-        from scipy.optimize import minimize
+        from scipy.optimize import minimize, differential_evolution
+        from .estimation import total_error, ParallelObjective
+        from .cache import ErrorCache
 
         config = {
             'method': 'nelder-mead',  # Optimization method
-            'options': {'xatol': 1e-8}  # Options passed to optimizer
+            'options': None,  # Options passed to optimizer
+            'bounds': None,
+            'workers': 1,
+            'cache': False
         }
-        config.update(kwargs)
+        # Configuration for the optimizer is not passed to calc_error
+        for key in config:
+            if key in kwargs:
+                config[key] = kwargs.pop(key)
+        method = config['method']
+        population_based = method.lower() == 'differential_evolution'
+        options = config['options']
+        if options is None:
+            options = {} if population_based else {'xatol': 1e-8}
+
+        workers = config['workers']
+        if not isinstance(workers, int) or isinstance(workers, bool) or workers < 1:
+            raise ProgModelInputException("'workers' must be a positive integer, was {}".format(workers))
+        bounds = config['bounds']
+        if isinstance(bounds, dict):
+            bounds = [bounds[key] for key in keys]
+        if bounds is not None and len(bounds) != len(keys):
+            raise ProgModelInputException("'bounds' must have one (lower, upper) tuple for each key, was {}".format(bounds))
+        if population_based and bounds is None:
+            raise ProgModelInputException("'bounds' are required for method 'differential_evolution'")
+
+        cache = config['cache']
+        if cache is True:
+            cache = ErrorCache()
+        elif cache is False:
+            cache = None
+        elif not isinstance(cache, ErrorCache):
+            raise ProgModelInputException("'cache' must be a bool or ErrorCache, was {}".format(cache))
 
         # Set noise to 0
         m_noise, self.parameters['measurement_noise'] = self.parameters['measurement_noise'], 0
         p_noise, self.parameters['process_noise'] = self.parameters['process_noise'], 0
 
-        def optimization_fcn(params):
-            for key, param in zip(keys, params):
-                self.parameters[key] = param
-            err = 0
-            for run in runs:
-                try:
-                    err += self.calc_error(run[0], run[1], run[2], **kwargs)
-                except Exception:
-                    return 1e99 
-                    # If it doesn't work (i.e., throws an error), dont use it
-            return err
-        
+        objective_config = (self, runs, keys, kwargs, cache)
         params = np.array([self.parameters[key] for key in keys])
 
-        res = minimize(optimization_fcn, params, method=config['method'], options=config['options'])
-        for x, key in zip(res.x, keys):
-            self.parameters[key] = x
-
-        # Reset noise
-        self.parameters['measurement_noise'] = m_noise
-        self.parameters['process_noise'] = p_noise                
+        try:
+            if workers == 1:
+                def optimization_fcn(params):
+                    return total_error(objective_config, params)
+                if population_based:
+                    res = differential_evolution(optimization_fcn, bounds, **options)
+                else:
+                    res = minimize(optimization_fcn, params, method=method, bounds=bounds, options=options)
+            else:
+                with ParallelObjective(objective_config, workers) as optimization_fcn:
+                    if population_based:
+                        # Candidates evaluated together in each generation, so they can be divided between workers
+                        res = differential_evolution(optimization_fcn, bounds, workers=optimization_fcn.map, updating='deferred', **options)
+                    else:
+                        res = minimize(optimization_fcn, params, method=method, bounds=bounds, options=options)
+            self.parameters.update(zip(keys, res.x))
+        finally:
+            # Reset noise
+            self.parameters['measurement_noise'] = m_noise
+            self.parameters['process_noise'] = p_noise
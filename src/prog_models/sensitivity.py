@@ -0,0 +1,308 @@
+# Copyright © 2021 United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration.  All Rights Reserved.
+
+"""
+Global sensitivity analysis of the time of each event with respect to model parameters.
+
+Sample designs are evaluated with PrognosticsModel.sweep, so the simulations are divided between a pool of worker processes, each with a clone of the model.
+
+* SobolAnalysis / sobol_indices: Variance-based first-order and total indices, estimated from a Saltelli design (quasi-random, from a scrambled Halton sequence). Estimates are updated with each batch of samples, so analysis can stop once they converge
+* morris: Elementary effects (mu, mu_star, sigma) from a Morris design. Far fewer simulations than Sobol indices, for screening out parameters with little effect
+"""
+
+import numpy as np
+from .exceptions import ProgModelInputException
+
+
+def _check_bounds(model, bounds):
+    """Validate bounds, a dict of (lower, upper) for each parameter. Returns (keys, lower, upper)"""
+    if not isinstance(bounds, dict) or not bounds:
+        raise ProgModelInputException("'bounds' must be a dict of (lower, upper) for each parameter, was {}".format(bounds))
+    for (key, bound) in bounds.items():
+        if key not in model.parameters:
+            raise ProgModelInputException("'{}' is not a parameter of the model".format(key))
+        if len(bound) != 2 or not bound[0] < bound[1]:
+            raise ProgModelInputException("Bounds for '{}' must be (lower, upper), with lower < upper, was {}".format(key, bound))
+    keys = list(bounds.keys())
+    (lower, upper) = np.array([bounds[key] for key in keys], dtype=float).T
+    return (keys, lower, upper)
+
+
+def _primes(n):
+    """First n prime numbers"""
+    primes = []
+    candidate = 2
+    while len(primes) < n:
+        if all(candidate % prime for prime in primes if prime*prime <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+class _Halton():
+    """
+    Scrambled Halton sequence in the unit hypercube. Each dimension is the radical inverse of the index in a prime base, with the nonzero digits randomly permuted (one permutation per dimension), which breaks the correlation between dimensions with large bases.
+    Note: scipy.stats.qmc requires scipy 1.7 (and Python 3.7)
+
+    Args:
+        d (int): Number of dimensions
+        rng (np.random.Generator): Generator for the permutations
+    """
+    def __init__(self, d, rng):
+        self.bases = _primes(d)
+        self.permutations = [np.concatenate([[0], 1 + rng.permutation(base - 1)]) for base in self.bases]
+        self.index = 1  # Note: Index 0 is the origin (on the boundary) for every permutation
+
+    def random(self, n):
+        """Draw the next n points, as an (n x d) array"""
+        indices = np.arange(self.index, self.index + n)
+        self.index += n
+        samples = np.zeros((n, len(self.bases)))
+        for (j, (base, permutation)) in enumerate(zip(self.bases, self.permutations)):
+            remaining = indices.copy()
+            scale = 1.0
+            while remaining.any():
+                scale /= base
+                samples[:, j] += permutation[remaining % base]*scale
+                remaining //= base
+        return samples
+
+
+def _seed(seed_sequence):
+    """Integer seed for a sweep, derived from a seed sequence (or None, for seeds spawned from the model)"""
+    return None if seed_sequence is None else int(seed_sequence.spawn(1)[0].generate_state(1)[0])
+
+
+class SobolAnalysis():
+    """
+    Variance-based (Sobol) sensitivity analysis of the time of each event, estimated from a Saltelli design and updated incrementally with each batch of samples (see run)
+
+    Each sample of the design is a pair of points (A, B), drawn from a quasi-random sequence over the bounds of the parameters, and is simulated for A, B, and A with each parameter taken from B (n_params + 2 simulations per sample). Indices are estimated with the Saltelli (first-order) and Jansen (total) estimators. Samples where an event is not met are excluded from the indices for that event
+
+    Args:
+        model (PrognosticsModel): Model to analyze. Not changed
+        bounds (dict): (lower, upper) bounds for each parameter analyzed, by key. Parameters are sampled uniformly within bounds
+        future_loading_eqn (callable): Function of (t) -> z used to predict future loading (output) at a given time (t)
+        first_output (dict): First measured output, needed to initialize state
+        threshold_keys ([str], optional): Keys for events that will trigger the end of simulation. If blank, simulation will occur if any event will be met
+        workers (int, optional): Number of worker processes (see PrognosticsModel.sweep). Default is the number of CPUs
+        seed (int, optional): Seed for the design and the noise of each simulation. If None, the design is random and generators are spawned from the model's generator
+        kwargs: Configuration options for the simulation, see PrognosticsModel.simulate_to_threshold
+
+    Raises:
+        ProgModelInputException: If bounds are invalid
+
+    Example:
+        | analysis = SobolAnalysis(m, {'p1': (0, 1), 'p2': (5, 10)}, future_load_eqn, first_output)
+        | while analysis.n_samples < 4096:
+        |     change = analysis.run(256)
+        |     if change < 0.01:
+        |         break
+        | analysis.first_order['e1']['p1'] # First-order index of parameter p1 for the time of event e1
+    """
+    def __init__(self, model, bounds, future_loading_eqn, first_output, threshold_keys = None, workers = None, seed = None, **kwargs):
+        (self.keys, self._lower, self._upper) = _check_bounds(model, bounds)
+        self.model = model
+        self.events = list(model.events if threshold_keys is None else threshold_keys)
+        self._sweep_config = (future_loading_eqn, first_output, threshold_keys, workers, kwargs)
+        self._seed_sequence = None if seed is None else np.random.SeedSequence(seed)
+        self._engine = _Halton(2*len(self.keys), np.random.default_rng(None if self._seed_sequence is None else self._seed_sequence.spawn(1)[0]))
+        n_keys = len(self.keys)
+        # Running sums for each event (row) for the estimators
+        shape = (len(self.events), n_keys)
+        self._shift = np.full(len(self.events), np.nan)
+        self._count = np.zeros(len(self.events))
+        self._sum = np.zeros(len(self.events))
+        self._sum_sq = np.zeros(len(self.events))
+        self._sum_first = np.zeros(shape)
+        self._sum_total = np.zeros(shape)
+        self.n_samples = 0
+
+    def _design(self, n):
+        """Draw the next n samples (A, B) of the quasi-random sequence, scaled to bounds"""
+        samples = self._engine.random(n)
+        n_keys = len(self.keys)
+        scale = self._upper - self._lower
+        return (self._lower + samples[:, :n_keys]*scale, self._lower + samples[:, n_keys:]*scale)
+
+    def run(self, n):
+        """
+        Simulate n more samples of the design (n*(n_params + 2) simulations) and update the indices
+
+        Args:
+            n (int): Number of samples
+
+        Returns:
+            float: Largest absolute change in any index (first-order or total, any event) from this batch. inf for the first batch
+        """
+        if not isinstance(n, int) or isinstance(n, bool) or n < 1:
+            raise ProgModelInputException("'n' must be a positive integer, was {}".format(n))
+        before = (self.first_order_array, self.total_array) if self.n_samples else None
+        (a, b) = self._design(n)
+        n_keys = len(self.keys)
+
+        # Points: A, B, then A with column i from B (AB_i) for each parameter i
+        ab = np.repeat(a[np.newaxis], n_keys, axis = 0)
+        for i in range(n_keys):
+            ab[i, :, i] = b[:, i]
+        points = np.concatenate([a, b, ab.reshape(-1, n_keys)])
+        (future_loading_eqn, first_output, threshold_keys, workers, kwargs) = self._sweep_config
+        results = self.model.sweep(
+            [dict(zip(self.keys, point)) for point in points.tolist()],
+            future_loading_eqn, first_output, metrics = {}, threshold_keys = threshold_keys,
+            workers = workers, seed = _seed(self._seed_sequence), **kwargs)
+
+        for (j, event) in enumerate(self.events):
+            toe = results['time_of_event'][event].reshape(n_keys + 2, n)
+            # Only samples where the event was met in every simulation
+            toe = toe[:, np.isfinite(toe).all(axis = 0)]
+            if np.isnan(self._shift[j]) and toe.size:
+                # Sums are of times shifted by the mean of the first samples, to avoid loss of precision in the variance
+                self._shift[j] = toe[:2].mean()
+            (f_a, f_b, f_ab) = (toe[0] - self._shift[j], toe[1] - self._shift[j], toe[2:] - self._shift[j])
+            self._count[j] += f_a.size
+            self._sum[j] += f_a.sum() + f_b.sum()
+            self._sum_sq[j] += (f_a**2).sum() + (f_b**2).sum()
+            self._sum_first[j] += (f_b*(f_ab - f_a)).sum(axis = 1)
+            self._sum_total[j] += ((f_a - f_ab)**2).sum(axis = 1)
+        self.n_samples += n
+
+        if before is None:
+            return np.inf
+        changes = np.abs(np.concatenate([self.first_order_array - before[0], self.total_array - before[1]]))
+        return float(np.nanmax(changes)) if np.isfinite(changes).any() else np.inf
+
+    @property
+    def variance(self):
+        """np.ndarray: Variance of the time of each event, in order of events"""
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            mean = self._sum/(2*self._count)
+            return self._sum_sq/(2*self._count) - mean**2
+
+    @property
+    def first_order_array(self):
+        """np.ndarray: (n_events x n_params) first-order indices, in order of events and keys. NaN for an event without samples or variance"""
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            return self._sum_first/self._count[:, np.newaxis]/self.variance[:, np.newaxis]
+
+    @property
+    def total_array(self):
+        """np.ndarray: (n_events x n_params) total indices, in order of events and keys. NaN for an event without samples or variance"""
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            return self._sum_total/(2*self._count[:, np.newaxis])/self.variance[:, np.newaxis]
+
+    @property
+    def first_order(self):
+        """dict: First-order index of each parameter (fraction of the variance of the time of event due to the parameter alone), by event then parameter key"""
+        return {event: dict(zip(self.keys, row.tolist())) for (event, row) in zip(self.events, self.first_order_array)}
+
+    @property
+    def total(self):
+        """dict: Total index of each parameter (fraction of the variance of the time of event due to the parameter, including interactions with other parameters), by event then parameter key"""
+        return {event: dict(zip(self.keys, row.tolist())) for (event, row) in zip(self.events, self.total_array)}
+
+
+def sobol_indices(model, bounds, future_loading_eqn, first_output, batch_size = 256, max_samples = 8192, tol = 0.01, **kwargs):
+    """
+    Estimate first-order and total Sobol indices of the time of each event, adding batches of samples until indices converge (see SobolAnalysis)
+
+    Args:
+        model (PrognosticsModel): Model to analyze. Not changed
+        bounds (dict): (lower, upper) bounds for each parameter analyzed, by key
+        future_loading_eqn (callable): Function of (t) -> z used to predict future loading (output) at a given time (t)
+        first_output (dict): First measured output, needed to initialize state
+        batch_size (int, optional): Number of samples per batch (each batch_size*(n_params + 2) simulations). Default is 256
+        max_samples (int, optional): Maximum number of samples. Default is 8192
+        tol (float, optional): Converged when no index changes by more than tol with a batch. Default is 0.01
+        kwargs: Configuration for SobolAnalysis (threshold_keys, workers, seed) and the simulation (see PrognosticsModel.simulate_to_threshold)
+
+    Returns:
+        dict: Results \\n
+            first_order (dict): First-order index of each parameter, by event then parameter key \\n
+            total (dict): Total index of each parameter, by event then parameter key \\n
+            n_samples (int): Number of samples \\n
+            converged (bool): If indices converged (within tol) before max_samples
+
+    Example:
+        | results = sobol_indices(m, {'p1': (0, 1), 'p2': (5, 10)}, future_load_eqn, first_output, seed = 42)
+        | results['total']['e1']['p2'] # Total index of parameter p2 for the time of event e1
+    """
+    analysis = SobolAnalysis(model, bounds, future_loading_eqn, first_output, **kwargs)
+    converged = False
+    while not converged and analysis.n_samples < max_samples:
+        converged = analysis.run(min(batch_size, max_samples - analysis.n_samples)) <= tol
+    return {
+        'first_order': analysis.first_order,
+        'total': analysis.total,
+        'n_samples': analysis.n_samples,
+        'converged': converged
+    }
+
+
+def morris(model, bounds, future_loading_eqn, first_output, n_trajectories = 20, levels = 4, threshold_keys = None, workers = None, seed = None, **kwargs):
+    """
+    Screen parameters by their elementary effects on the time of each event, from a Morris design of trajectories (n_trajectories*(n_params + 1) simulations)
+
+    Each trajectory starts at a random point of a grid of levels over the bounds of the parameters, and changes one parameter at a time (in random order) by a step of levels/(2*(levels - 1)) of its range. Effects are per unit of the (scaled) range of the parameter, so they can be compared between parameters. Trajectories where an event is not met are excluded from the effects for that event
+
+    Args:
+        model (PrognosticsModel): Model to analyze. Not changed
+        bounds (dict): (lower, upper) bounds for each parameter analyzed, by key
+        future_loading_eqn (callable): Function of (t) -> z used to predict future loading (output) at a given time (t)
+        first_output (dict): First measured output, needed to initialize state
+        n_trajectories (int, optional): Number of trajectories. Default is 20
+        levels (int, optional): Number of levels of the grid (even). Default is 4
+        threshold_keys ([str], optional): Keys for events that will trigger the end of simulation. If blank, simulation will occur if any event will be met
+        workers (int, optional): Number of worker processes (see PrognosticsModel.sweep). Default is the number of CPUs
+        seed (int, optional): Seed for the design and the noise of each simulation
+        kwargs: Configuration options for the simulation, see PrognosticsModel.simulate_to_threshold
+
+    Returns:
+        dict: Results, each by event then parameter key \\n
+            mu (dict): Mean elementary effect \\n
+            mu_star (dict): Mean absolute elementary effect (overall influence of the parameter) \\n
+            sigma (dict): Standard deviation of the elementary effects (nonlinearity, or interaction with other parameters)
+
+    Raises:
+        ProgModelInputException: If bounds, n_trajectories, or levels are invalid
+    """
+    (keys, lower, upper) = _check_bounds(model, bounds)
+    if not isinstance(n_trajectories, int) or isinstance(n_trajectories, bool) or n_trajectories < 2:
+        raise ProgModelInputException("'n_trajectories' must be an integer of at least 2, was {}".format(n_trajectories))
+    if not isinstance(levels, int) or isinstance(levels, bool) or levels < 2 or levels % 2:
+        raise ProgModelInputException("'levels' must be an even integer of at least 2, was {}".format(levels))
+    seed_sequence = None if seed is None else np.random.SeedSequence(seed)
+    rng = np.random.default_rng(None if seed_sequence is None else seed_sequence.spawn(1)[0])
+    n_keys = len(keys)
+    delta = levels/(2*(levels - 1))
+
+    # Trajectories in the unit hypercube: start on the grid (where a step up stays within bounds), then step each parameter in random order and direction
+    starts = rng.integers(0, levels//2, (n_trajectories, n_keys))/(levels - 1)
+    directions = rng.choice([-1, 1], (n_trajectories, n_keys))
+    starts = np.where(directions < 0, starts + delta, starts)
+    orders = np.argsort(rng.random((n_trajectories, n_keys)), axis = 1)
+    trajectories = np.repeat(starts[:, np.newaxis], n_keys + 1, axis = 1)
+    for (trajectory, order, direction) in zip(trajectories, orders, directions):
+        for (step, key) in enumerate(order):
+            trajectory[step + 1:, key] += direction[key]*delta
+
+    points = lower + trajectories.reshape(-1, n_keys)*(upper - lower)
+    results = model.sweep(
+        [dict(zip(keys, point)) for point in points.tolist()],
+        future_loading_eqn, first_output, metrics = {}, threshold_keys = threshold_keys,
+        workers = workers, seed = _seed(seed_sequence), **kwargs)
+
+    events = list(model.events if threshold_keys is None else threshold_keys)
+    summary = {'mu': {}, 'mu_star': {}, 'sigma': {}}
+    for event in events:
+        toe = results['time_of_event'][event].reshape(n_trajectories, n_keys + 1)
+        effects = np.empty((n_trajectories, n_keys))
+        for step in range(n_keys):
+            changed = orders[:, step]
+            effects[np.arange(n_trajectories), changed] = (toe[:, step + 1] - toe[:, step])/(directions[np.arange(n_trajectories), changed]*delta)
+        effects = effects[np.isfinite(effects).all(axis = 1)]
+        with np.errstate(invalid = 'ignore'):
+            summary['mu'][event] = dict(zip(keys, np.mean(effects, axis = 0).tolist() if len(effects) else [np.nan]*n_keys))
+            summary['mu_star'][event] = dict(zip(keys, np.mean(np.abs(effects), axis = 0).tolist() if len(effects) else [np.nan]*n_keys))
+            summary['sigma'][event] = dict(zip(keys, np.std(effects, axis = 0, ddof = 1).tolist() if len(effects) > 1 else [np.nan]*n_keys))
+    return summary
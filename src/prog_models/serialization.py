@@ -0,0 +1,238 @@
+# Copyright © 2021 United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration.  All Rights Reserved.
+
+"""
+Pickling by value, so models (including models from PrognosticsModel.generate_model and models with custom noise functions) can be sent to other processes (e.g., a ProcessPoolExecutor) or machines.
+
+Functions and classes that cannot be imported by name where they are unpickled (e.g., lambdas, local functions, anything defined in __main__, or the class of a generated model) are pickled by value. Their code is serialized with marshal, so they must be unpickled by the same version of Python.
+
+See: PrognosticsModel.__reduce__
+"""
+
+import builtins
+import importlib
+import marshal
+import sys
+import types
+import uuid
+import weakref
+
+# Token of each function and class pickled by value, identifying it where it is unpickled (see _Reference)
+_tokens = weakref.WeakKeyDictionary()
+
+# Classes pickled by value, by token, so each is only created once per process
+_classes = {}
+
+# Functions to call with each function or class pickled by value once it is created, by token (see _Reference)
+_pending = {}
+
+# Class attributes recreated when a class is created, not pickled (see ClassValue). Note: Before Python 3.7, abc stored its caches as WeakSets in the class (_abc_registry, etc.)
+_class_internals = {
+    '__dict__', '__weakref__', '_abc_impl', '__abstractmethods__',
+    '_abc_registry', '_abc_cache', '_abc_negative_cache', '_abc_negative_cache_version'}
+
+
+def _importable(obj):
+    """Check if a function or class can be pickled by reference (i.e., imported by name)"""
+    module = getattr(obj, '__module__', None)
+    if module is None or module == '__main__' or module not in sys.modules:
+        return False
+    target = sys.modules[module]
+    for name in obj.__qualname__.split('.'):
+        target = getattr(target, name, None)
+    return target is obj
+
+
+def by_value(obj, memo = None):
+    """
+    Prepare an object for pickling, replacing functions and classes that cannot be imported by name (including those inside dicts, lists and tuples, and static methods, class methods and properties) with objects that pickle them by value
+
+    Args:
+        obj: Object to pickle
+        memo (dict, optional): Objects already prepared, by id. Used so each function or class is replaced by one object, and so unpickled as one object (e.g., a callback referenced in several places). Pass the same memo when preparing several objects pickled together
+
+    Returns:
+        Object to pickle in place of obj. Unpickles as an equivalent of obj
+    """
+    if memo is None:
+        memo = {}
+    if isinstance(obj, (types.FunctionType, type)):
+        if _importable(obj):
+            return obj
+        if id(obj) not in memo:
+            # References to obj while it is prepared (e.g., recursion, or methods using their class) are replaced by a placeholder
+            memo[id(obj)] = _Reference(_token(obj))
+            memo[id(obj)] = (FunctionValue if isinstance(obj, types.FunctionType) else ClassValue)(obj, memo)
+        return memo[id(obj)]
+    if type(obj) in (staticmethod, classmethod):
+        return _Reduced(type(obj), (by_value(obj.__func__, memo),))
+    if type(obj) is property:
+        return _Reduced(property, (by_value(obj.fget, memo), by_value(obj.fset, memo), by_value(obj.fdel, memo), obj.__doc__))
+    if isinstance(obj, types.ModuleType):
+        return ModuleValue(obj.__name__)
+    if type(obj) is dict:
+        return {key: by_value(value, memo) for (key, value) in obj.items()}
+    if type(obj) in (list, tuple):
+        return type(obj)(by_value(value, memo) for value in obj)
+    return obj
+
+
+def _global_names(code):
+    """Names of globals (and attributes) used by code, including nested code (e.g., comprehensions and inner functions)"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
+
+
+def _token(obj):
+    """Token identifying a function or class pickled by value. Note: Kept here, so obj is not modified"""
+    if obj not in _tokens:
+        _tokens[obj] = uuid.uuid4().hex
+    return _tokens[obj]
+
+
+class _Reference():
+    """
+    Placeholder for a reference to a function or class that is pickled by value and created after the reference (e.g., recursion, mutual recursion, or a method using its class with super() or a class attribute)
+
+    Args:
+        token (str): Token of the function or class (see _token)
+    """
+    def __init__(self, token):
+        self.token = token
+
+
+class _Reduced():
+    """
+    Object pickled as a call, e.g., a static method (which cannot be pickled) as staticmethod(function)
+
+    Args:
+        fcn (callable): Function creating the object
+        args (tuple): Arguments of fcn
+    """
+    def __init__(self, fcn, args):
+        self.fcn = fcn
+        self.args = args
+
+    def __reduce__(self):
+        return (self.fcn, self.args)
+
+
+class FunctionValue():
+    """
+    Function, pickled by value: its code, the globals and closure variables it uses, and its defaults
+
+    Args:
+        function (function): Function to pickle
+        memo (dict): Objects already prepared (see by_value)
+    """
+    def __init__(self, function, memo):
+        f = self.function = function
+        self.token = _token(f)
+        self.globals = {name: by_value(f.__globals__[name], memo) for name in _global_names(f.__code__) if name in f.__globals__}
+        self.closure = None if f.__closure__ is None else tuple(by_value(cell.cell_contents, memo) for cell in f.__closure__)
+        self.defaults = by_value(f.__defaults__, memo)
+        self.kwdefaults = by_value(f.__kwdefaults__, memo)
+
+    def __reduce__(self):
+        f = self.function
+        return (_make_function, (self.token, marshal.dumps(f.__code__), self.globals, f.__name__, f.__qualname__, f.__module__, self.defaults, self.kwdefaults, self.closure))
+
+
+def _cell(value):
+    """Create a closure cell containing value. Note: types.CellType requires Python 3.8"""
+    return (lambda: value).__closure__[0]
+
+
+def _empty_cell():
+    """Create a closure cell to be filled later, and a function to set its contents. Note: setting cell_contents directly requires Python 3.7"""
+    value = None
+    def set_value(obj):
+        nonlocal value
+        value = obj
+    return (set_value.__closure__[0], set_value)
+
+
+def _when_created(token, set_value):
+    """Call set_value with the function or class pickled by value with token once it is created (see _Reference). Note: References are only made while the function or class is prepared (see by_value), so they are always unpickled before it is created"""
+    _pending.setdefault(token, []).append(set_value)
+
+
+def _created(token, obj):
+    """Resolve references to the function or class pickled by value with token, now created"""
+    for set_value in _pending.pop(token, ()):
+        set_value(obj)
+
+
+def _make_function(token, code, f_globals, name, qualname, module, defaults, kwdefaults, closure):
+    """Create a function pickled by FunctionValue"""
+    f_globals = dict(f_globals, __builtins__ = builtins)
+    for (key, value) in f_globals.items():
+        if isinstance(value, _Reference):
+            _when_created(value.token, lambda obj, key = key: f_globals.__setitem__(key, obj))
+    cells = None
+    if closure is not None:
+        cells = []
+        for value in closure:
+            if isinstance(value, _Reference):
+                (cell, set_value) = _empty_cell()
+                _when_created(value.token, set_value)
+            else:
+                cell = _cell(value)
+            cells.append(cell)
+        cells = tuple(cells)
+    f = types.FunctionType(marshal.loads(code), f_globals, name, defaults, cells)
+    f.__qualname__ = qualname
+    f.__module__ = module
+    f.__kwdefaults__ = kwdefaults
+    _created(token, f)
+    return f
+
+
+class ClassValue():
+    """
+    Class, pickled by value: its name, bases, and attributes (e.g., a class defined in a function)
+
+    Args:
+        cls (type): Class to pickle
+        memo (dict): Objects already prepared (see by_value)
+    """
+    def __init__(self, cls, memo):
+        self.cls = cls
+        self.token = _token(cls)
+        self.bases = by_value(cls.__bases__, memo)
+        self.attributes = {
+            key: by_value(value, memo) for (key, value) in cls.__dict__.items()
+            if key not in _class_internals}
+
+    def __reduce__(self):
+        return (_make_class, (self.token, self.cls.__name__, self.bases, self.attributes))
+
+
+def _make_class(token, name, bases, attributes):
+    """Create (or get the already created) class pickled by ClassValue"""
+    cls = _classes.get(token)
+    if cls is None:
+        references = {key: value for (key, value) in attributes.items() if isinstance(value, _Reference)}
+        cls = _classes[token] = type(bases[0])(name, bases, {key: value for (key, value) in attributes.items() if key not in references})
+        for (key, value) in references.items():
+            # e.g., a class attribute that is the class itself
+            _when_created(value.token, lambda obj, key = key: setattr(cls, key, obj))
+    _created(token, cls)
+    return cls
+
+
+class ModuleValue():
+    """
+    Module, pickled by name
+
+    Args:
+        name (str): Module name
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __reduce__(self):
+        return (importlib.import_module, (self.name,))
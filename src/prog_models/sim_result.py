@@ -1,4 +1,7 @@
 from collections import UserList
+import json
+import numpy as np
+import os
 from .visualize import plot_timeseries
 
 
@@ -41,30 +44,79 @@ class SimResult(UserList):
 
     def plot(self, **kwargs):
         plot_timeseries(self.times, self.data, options=kwargs)  
+
+    def save(self, path):
+        """Save the result in a binary columnar format, which can be loaded with SimResult.load
+
+        The result is saved to directory `path` (created if needed) as: times.npy (time of each point), data.npy (array with one row per key, so the values of each key are contiguous), and keys.json (key for each row of data.npy).
+        Every data point must have the same keys, with numeric values
+
+        Args:
+            path (str): Directory in which to save the result
+        """
+        if hasattr(self, 'to_numpy'):
+            # Columnar data (e.g., ColumnarSimResult)
+            keys = list(self.keys)
+            values = self.to_numpy().T
+        else:
+            keys = list(self.data[0].keys()) if self.data else []
+            values = [[point[key] for point in self.data] for key in keys]
+        values = np.asarray(values, dtype=float).reshape(len(keys), len(self.times))
+
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'times.npy'), np.asarray(self.times, dtype=float))
+        np.save(os.path.join(path, 'data.npy'), np.ascontiguousarray(values))
+        with open(os.path.join(path, 'keys.json'), 'w') as f:
+            json.dump(keys, f)
+
+    @staticmethod
+    def load(path, mmap = True):
+        """Load a result saved with SimResult.save
+
+        Args:
+            path (str): Directory in which the result was saved
+            mmap (bool, optional): If the data should be memory-mapped instead of read into memory. When memory-mapped, loading is immediate regardless of size, and only the parts of the data that are accessed are read from disk (e.g., columns). Default is True
+
+        Returns:
+            ColumnarSimResult: Loaded result
+        """
+        mmap_mode = 'r' if mmap else None
+        with open(os.path.join(path, 'keys.json')) as f:
+            keys = json.load(f)
+        times = np.load(os.path.join(path, 'times.npy'), mmap_mode = mmap_mode)
+        values = np.load(os.path.join(path, 'data.npy'), mmap_mode = mmap_mode)
+        return ColumnarSimResult(times, values.T, keys = keys)
     # lgtm [py/missing-equals]
 
 class LazySimResult(SimResult):  # lgtm [py/missing-equals]
     """
     Used to store the result of a simulation, which is only calculated on first request
     """
-    def __init__(self, fcn, times, states):
+    def __init__(self, fcn, times, states, vectorized = False):
         """
         Args:
             fcn (callable): function (x) -> z where x is the state and z is the data
             times (array(float)): Times for each data point where times[n] corresponds to data[n]
             data (array(dict)): Data points where data[n] corresponds to times[n]
+            vectorized (bool, optional): If fcn accepts a state whose values are arrays (one element per state in states), returning data whose values are arrays (e.g., model.output for a model with is_vectorized). If so, fcn is called once for all states instead of once per state
         """
         self.fcn = fcn
         self.times = times
         self.states = states
+        self.vectorized = vectorized
         self.__data = None
+        self.__columns = None
 
     def is_cached(self):
         """
         Returns:
             bool: If the value has been calculated
         """
-        return self.__data is not None
+        return self.__data is not None or self.__columns is not None
+
+    def __reduce__(self):
+        # Pickled as the calculated result (a SimResult), so fcn (e.g., a model's output equation) is not needed where it is unpickled
+        return (SimResult, (self.times, self.data))
 
     @property
     def data(self):
@@ -75,6 +127,224 @@ class LazySimResult(SimResult):  # lgtm [py/missing-equals]
             array(dict): data
         """
         if self.__data is None:
-            self.__data = [self.fcn(x) for x in self.states]
+            if self.vectorized:
+                # Build rows from the columns
+                columns = self.__calculate_columns()
+                keys = list(columns.keys())
+                rows = zip(*[column.tolist() for column in columns.values()])
+                self.__data = [dict(zip(keys, row)) for row in rows] if keys else [{} for _ in self.states]
+            else:
+                self.__data = [self.fcn(x) for x in self.states]
         return self.__data
-    
\ No newline at end of file
+
+    def __calculate_columns(self):
+        if self.__columns is None:
+            n = len(self.states)
+            if self.vectorized:
+                # Calculate every point with one call to fcn
+                if hasattr(self.states, 'column'):
+                    # Columnar states (e.g., ColumnarSimResult) - use the columns directly
+                    x = {key: self.states.column(key) for key in self.states.keys}
+                elif n == 0:
+                    return {}
+                else:
+                    x = {key: np.array([x_i[key] for x_i in self.states]) for key in self.states[0]}
+                data = self.fcn(x)
+                # Note: broadcast in case any value does not depend on the state (e.g., a constant)
+                self.__columns = {key: np.broadcast_to(value, (n,)) for (key, value) in data.items()}
+            else:
+                data = self.data
+                self.__columns = {key: np.array([z[key] for z in data]) for key in (data[0] if data else {})}
+        return self.__columns
+
+    def column(self, key):
+        """Get the values of one key for every data point, without building the data for each point if vectorized
+
+        Args:
+            key (str): Key
+
+        Returns:
+            np.ndarray: Value of key at each time
+        """
+        return self.__calculate_columns()[key]
+
+    def to_numpy(self, keys = None):
+        """Get the data as a 2-D array
+
+        Args:
+            keys ([str], optional): Keys (columns) to include, in order. Default is all keys
+
+        Returns:
+            np.ndarray: (n_points x n_keys) array, where column i corresponds to keys[i]
+        """
+        columns = self.__calculate_columns()
+        if keys is None:
+            keys = list(columns.keys())
+        if not keys:
+            return np.empty((len(self.states), 0))
+        return np.column_stack([columns[key] for key in keys])
+
+    @property
+    def keys(self):
+        """
+        Returns:
+            [str]: Keys of the data
+        """
+        return list(self.__calculate_columns().keys())
+
+
+class ColumnarSimResult(SimResult):  # lgtm [py/missing-equals]
+    """
+    Used to store the result of a simulation, with time, as a 2-D array (one row per data point, one column per key) instead of a list of dicts.
+    This uses much less memory per point, and columns can be accessed without copying (see `column` and `to_numpy`).
+
+    Supports the same access as SimResult (e.g., result[n] is a dict for data point n), so it can be used wherever a SimResult is expected
+
+    Args:
+        times (array(float), optional): Times for each data point where times[n] corresponds to data[n]
+        data (array(dict) or np.ndarray, optional): Data points where data[n] corresponds to times[n]. Either a list of dicts or a (n_points x n_keys) array, where column i corresponds to keys[i]
+        keys ([str], optional): Key for each column. Required if data is an array. Otherwise, default is the keys of the first data point (or first point added)
+    """
+    __slots__ = ['_keys', '_index', '_times', '_array', '_n', '_cache']
+
+    def __init__(self, times = (), data = (), keys = None):
+        self._keys = None if keys is None else list(keys)
+        self._times = np.empty(16)
+        self._array = None
+        self._n = 0
+        self._cache = None
+        if isinstance(data, np.ndarray):
+            if keys is None:
+                raise ValueError("keys are required when data is an array")
+            data = np.asarray(data, dtype=float)  # Note: not copied (e.g., to keep a memory-mapped array mapped)
+            if data.shape != (len(times), len(self._keys)):
+                raise ValueError("data must be an array of shape ({}, {}), was {}".format(len(times), len(self._keys), data.shape))
+            self._set_keys(self._keys)
+            self._times = np.asarray(times, dtype=float)
+            self._array = data
+            self._n = len(times)
+        else:
+            if len(times) != len(data):
+                raise ValueError("times and data must be the same length ({} != {})".format(len(times), len(data)))
+            if self._keys is not None:
+                self._set_keys(self._keys)
+            for (t, point) in zip(times, data):
+                self.add_point(t, point)
+
+    def _set_keys(self, keys):
+        self._keys = list(keys)
+        self._index = {key: i for (i, key) in enumerate(self._keys)}
+        self._array = np.empty((len(self._times), len(self._keys)))
+
+    @property
+    def keys(self):
+        """
+        Returns:
+            [str]: Key for each column
+        """
+        return self._keys
+
+    @property
+    def times(self):
+        """
+        Returns:
+            np.ndarray: Time for each data point (view, not a copy)
+        """
+        return self._times[:self._n]
+
+    @property
+    def data(self):
+        """
+        Data as a list of dicts, for compatibility with SimResult. Calculated on first request
+
+        Returns:
+            array(dict): data
+        """
+        if self._cache is None:
+            if self._n == 0:
+                self._cache = []
+            else:
+                keys = self._keys
+                self._cache = [dict(zip(keys, row)) for row in self._array[:self._n].tolist()]
+        return self._cache
+
+    def add_point(self, time, point):
+        """Add a data point to the end of the result
+
+        Args:
+            time (float): Time for the data point
+            point (dict or array(float)): Data point. Either a dict with (at least) every key, or an array where point[i] corresponds to keys[i]
+        """
+        if self._keys is None:
+            self._set_keys(point.keys())
+        n = self._n
+        if n == len(self._times):
+            # Full - Double capacity
+            capacity = max(2*n, 16)
+            self._times = np.resize(self._times, capacity)
+            self._array = np.resize(self._array, (capacity, len(self._keys)))
+        self._times[n] = time
+        if isinstance(point, dict):
+            self._array[n] = [point[key] for key in self._keys]
+        else:
+            self._array[n] = point
+        self._n = n + 1
+        self._cache = None
+
+    def column(self, key):
+        """Get the values of one key for every data point
+
+        Args:
+            key (str): Key
+
+        Returns:
+            np.ndarray: Value of key at each time (view, not a copy)
+        """
+        return self._array[:self._n, self._index[key]]
+
+    def to_numpy(self, keys = None):
+        """Get the data as a 2-D array
+
+        Args:
+            keys ([str], optional): Keys (columns) to include, in order. Default is all keys
+
+        Returns:
+            np.ndarray: (n_points x n_keys) array, where column i corresponds to keys[i]. A view when keys is not specified, otherwise a copy
+        """
+        if keys is None:
+            return self._array[:self._n]
+        return self._array[:self._n, [self._index[key] for key in keys]]
+
+    def __len__(self):
+        return self._n
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("ColumnarSimResult is read-only, except for add_point")
+
+    # Note: Inherited from UserList, these would modify the data list (see data) instead of the array
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = insert = extend = pop = remove = clear = reverse = sort = _read_only
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.data[index]
+        if index < -self._n or index >= self._n:
+            raise IndexError("index out of range")
+        return dict(zip(self._keys, self._array[index % self._n].tolist()))
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __eq__(self, other):
+        """Compare 2 SimResults
+
+        Args:
+            other (SimResult)
+
+        Returns:
+            bool: If the two SimResults are equal
+        """
+        return list(self.times) == list(other.times) and self.data == list(other.data)
+
+    def plot(self, **kwargs):
+        plot_timeseries(self.times, self, options=kwargs)
@@ -0,0 +1,65 @@
+# Copyright © 2021 United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration.  All Rights Reserved.
+
+from collections.abc import Mapping
+import numpy as np
+
+
+class StateContainer(dict):
+    """
+    Container for a model state - this class replaces a standard dictionary in simulation.
+    Keys are fixed to those provided (e.g., model.states), in that order. The state is owned by the simulation, so it can be updated in place (e.g., when applying process noise or state limits) and saved with a single shallow copy.
+
+    Supports dictionary-style access (e.g., x['qb']) at the speed of a dict, so models can treat it as a dict
+
+    Args:
+        keys ([str]): State keys (e.g., model.states)
+        values (dict or array): Value for each key. Either a dict with (at least) every key, or an array where values[i] corresponds to keys[i]
+
+    Raises:
+        KeyError: If values is a dict and is missing a key
+    """
+    __slots__ = []  # Optimization
+
+    def __init__(self, keys, values):
+        if isinstance(values, Mapping):
+            super().__init__({key: values[key] for key in keys})
+        else:
+            if len(values) != len(keys):
+                raise ValueError("values must have one element per key ({}), had {}".format(len(keys), len(values)))
+            super().__init__(zip(keys, values))
+
+    @classmethod
+    def from_array(cls, keys, data):
+        """Create a state from an array of values
+
+        Args:
+            keys ([str]): State keys (e.g., model.states)
+            data (np.ndarray): Values, where data[i] corresponds to keys[i]
+
+        Returns:
+            StateContainer: state
+        """
+        return cls(keys, np.asarray(data, dtype=float).tolist())
+
+    def to_array(self):
+        """
+        Returns:
+            np.ndarray: Value for each key as a float array, in key order
+        """
+        return np.fromiter(self.values(), dtype=float, count=len(self))
+
+    def copy(self):
+        """
+        Returns:
+            StateContainer: Copy of the state
+        """
+        x = StateContainer.__new__(StateContainer)
+        dict.update(x, self)
+        return x
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        # Values are numbers, so a shallow copy is sufficient
+        return self.copy()
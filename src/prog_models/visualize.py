@@ -531,7 +531,13 @@ def plot_timeseries(t, s, legend=None, options=None):
     -------
     See new model example
     """
-    series_names = list(s[0].keys())
+    if hasattr(s, 'to_numpy'):
+        # Columnar data (e.g., ColumnarSimResult) - use columns directly instead of extracting them from each dict
+        series_names = list(s.keys)
+        data = s.to_numpy()
+    else:
+        series_names = list(s[0].keys())
+        data = None
     m = len(series_names)
     n = len(s)
     
@@ -551,7 +557,7 @@ def plot_timeseries(t, s, legend=None, options=None):
         # Add plot
         # --------
         ax = fig.add_subplot()
-        ax.plot(t, [list(s_i.values()) for s_i in s])
+        ax.plot(t, data if data is not None else [list(s_i.values()) for s_i in s])
 
         # Add options: plot options, title, labels, and legend
         # ------------------------------------------------------
@@ -576,7 +582,10 @@ def plot_timeseries(t, s, legend=None, options=None):
         # Iterate over all subplots to plot the time series
         for item in range(m):
             ax = fig.add_subplot(nrows, ncols, item+1)                  # add subplot
-            series_ = [s[ii][series_names[item]] for ii in range(n)]    # extract time series data from array of dictionaries
+            if data is not None:
+                series_ = data[:, item]
+            else:
+                series_ = [s[ii][series_names[item]] for ii in range(n)]    # extract time series data from array of dictionaries
             ax.plot(t, series_)                                         # add time series to subplot
             
             # Add options: display labels, title, legend
@@ -2,6 +2,10 @@
 
 from .test_base_models import main as base_models_main
 from .test_sim_result import main as sim_result_main
+from .test_state_container import main as state_container_main
+from .test_loading import main as loading_main
+from .test_noise import main as noise_main
+from .test_sensitivity import main as sensitivity_main
 from .test_examples import main as examples_main
 from .test_centrifugal_pump import main as centrifugal_pump_main
 from .test_pneumatic_valve import main as pneumatic_valve_main
@@ -41,6 +45,26 @@ if __name__ == '__main__':
     except Exception:
         was_successful = False
 
+    try:
+        state_container_main()
+    except Exception:
+        was_successful = False
+
+    try:
+        loading_main()
+    except Exception:
+        was_successful = False
+
+    try:
+        noise_main()
+    except Exception:
+        was_successful = False
+
+    try:
+        sensitivity_main()
+    except Exception:
+        was_successful = False
+
     try:
         examples_main()
     except Exception:
@@ -3,7 +3,10 @@
 import unittest
 from prog_models import *
 from prog_models.models import *
+from prog_models.sim_result import ColumnarSimResult
+from prog_models.serialization import by_value
 from copy import deepcopy
+import numpy as np
 
 
 class MockModel():
@@ -41,6 +44,14 @@ class MockProgModel(MockModel, prognostics_model.PrognosticsModel):
     def threshold_met(self, x):
         return {key : value < 1e-6 for (key, value) in self.event_state(x).items()}
 
+def mock_load(t, x=None):
+    # Module level, so it can be sent to worker processes
+    return {'i1': 1, 'i2': 2.1}
+
+def call_model(m, method, *args):
+    # Module level, so it can be sent to worker processes
+    return getattr(m, method)(*args)
+
 def derived_callback(config):
     return {
         'p2': config['p1']  # New config
@@ -88,6 +99,144 @@ class TestModels(unittest.TestCase):
         self.assertAlmostEqual(m.parameters['p3'], 5, 5)
         self.assertAlmostEqual(m.parameters['p4'], -10, 5)
 
+    def test_parameter_snapshot(self):
+        m = MockModelWithDerived()
+        p = m.p
+        self.assertIs(m.p, p)  # Cached
+        self.assertAlmostEqual(p.p1, 1.2, 5)
+        self.assertAlmostEqual(p.p4, -2.4, 5)
+        self.assertIs(p.x0, m.parameters['x0'])
+        try:
+            p.p1 = 2
+            self.fail("Should have failed- snapshot is immutable")
+        except AttributeError:
+            pass
+
+        # Rebuilt after change, including derived parameters
+        m.parameters['p1'] = 2
+        self.assertIsNot(m.p, p)
+        self.assertAlmostEqual(m.p.p1, 2, 5)
+        self.assertAlmostEqual(m.p.p4, -4, 5)
+        self.assertAlmostEqual(p.p1, 1.2, 5)  # Old snapshot unchanged
+
+        # New and invalid keys
+        m.parameters['new param'] = 3
+        self.assertEqual(m.p[list(m.parameters.keys()).index('new param')], 3)
+        del m.parameters['new param']
+        self.assertEqual(len(m.p), len(m.parameters))
+
+    def test_clone(self):
+        m = MockModelWithDerived(process_noise = {'a': 0.1, 'b': 0, 'c': 0, 't': 0}, seed = 3)
+        m2 = m.clone(p1 = 2)
+        self.assertIsInstance(m2, MockModelWithDerived)
+        self.assertIsNot(m2.parameters, m.parameters)
+        self.assertAlmostEqual(m2.parameters['p4'], -4, 5)  # Derived parameters updated
+        self.assertAlmostEqual(m.parameters['p4'], -2.4, 5)
+        self.assertAlmostEqual(m2.p.p3, 2, 5)
+        self.assertAlmostEqual(m.p.p3, 1.2, 5)
+
+        # Copy-on-write
+        m2.parameters['x0']['a'] = 10
+        self.assertEqual(m.parameters['x0']['a'], 1)
+        m.parameters['x0']['b'] = 20
+        self.assertEqual(m2.parameters['x0']['b'], 5)
+        self.assertEqual(m.p.x0['b'], 20)
+        m2.parameters['process_noise']['a'] = 5
+        self.assertEqual(m.parameters['process_noise']['a'], 0.1)
+        m3 = m.clone()
+        m.p.x0['c'] = 30  # Through the snapshot
+        self.assertEqual(m3.p.x0['c'], -3.2)
+        self.assertEqual(m3.parameters['x0']['c'], -3.2)
+        m3.p.x0['t'] = 40
+        self.assertEqual(m.parameters['x0']['t'], 0)
+        m3.parameters['p1'] = 3
+        self.assertAlmostEqual(m.parameters['p4'], -2.4, 5)
+
+        # Independent generators, reproducible given a seed
+        x = m.initialize()
+        self.assertNotEqual(m.clone().apply_process_noise(dict(x)), m.clone().apply_process_noise(dict(x)))
+        self.assertEqual(m.clone(seed = 4).apply_process_noise(dict(x)), m.clone(seed = 4).apply_process_noise(dict(x)))
+        self.assertEqual(m.clone(rng = np.random.default_rng(4)).apply_process_noise(dict(x)), m.clone(seed = 4).apply_process_noise(dict(x)))
+
+        # Noise functions are bound to the clone
+        m.parameters['process_noise'] = lambda self, x, dt = 1: {key: x[key] + self.parameters['p1'] for key in x}
+        m4 = m.clone(p1 = 5)
+        self.assertAlmostEqual(m4.apply_process_noise(x)['a'], 6, 5)
+        self.assertAlmostEqual(m.apply_process_noise(x)['a'], 2.2, 5)
+
+        # New callback does not affect original
+        m4.parameters.register_derived_callback('p4', lambda config: {'p5': config['p4']})
+        self.assertIn('p5', m4.parameters)
+        m.parameters['p1'] = 1
+        self.assertNotIn('p5', m.parameters)
+
+    def test_derived_batch(self):
+        calls = []
+        def count(callback):
+            def counted(config):
+                calls.append(callback.__name__)
+                return callback(config)
+            return counted
+        def derived_sum(config):
+            return {'p5': config['p1'] + config['p3']}
+        (c1, c2, c3, c_sum) = (count(derived_callback), count(derived_callback2), count(derived_callback3), count(derived_sum))
+
+        class MockModelWithDiamond(MockProgModel):
+            # p1 -> p2 -> p3 -> p5, and p1 -> p5. Registered out of dependency order
+            param_callbacks = {
+                'p3': [c_sum],
+                'p1': [c_sum, c1],
+                'p2': [c2, c3]
+            }
+        m = MockModelWithDiamond()
+        self.assertAlmostEqual(m.parameters['p5'], 2.4, 5)
+
+        # Each callback runs once, after those it depends on
+        calls.clear()
+        m.parameters['p1'] = 2
+        self.assertCountEqual(calls, ['derived_callback', 'derived_callback2', 'derived_callback3', 'derived_sum'])
+        self.assertLess(calls.index('derived_callback'), calls.index('derived_callback2'))
+        self.assertLess(calls.index('derived_callback2'), calls.index('derived_sum'))
+        self.assertAlmostEqual(m.parameters['p4'], -4, 5)
+        self.assertAlmostEqual(m.parameters['p5'], 4, 5)
+
+        # Batch - resolved once at the end
+        calls.clear()
+        with m.parameters.batch():
+            m.parameters['p1'] = 3
+            m.parameters['p2'] = 7  # Overwritten by derived_callback at the end
+            with m.parameters.batch():  # Nested
+                m.parameters['p1'] = 4
+            self.assertListEqual(calls, [])
+            self.assertAlmostEqual(m.parameters['p3'], 2, 5)  # Not updated yet
+        self.assertEqual(len(calls), 4)
+        self.assertAlmostEqual(m.parameters['p3'], 4, 5)
+        self.assertAlmostEqual(m.parameters['p5'], 8, 5)
+
+        # Update is batched
+        calls.clear()
+        m.parameters.update({'p1': 1, 'p2': 1})
+        self.assertEqual(len(calls), 4)
+        self.assertAlmostEqual(m.parameters['p5'], 2, 5)
+
+        # New callback
+        m.parameters.register_derived_callback('p5', lambda config: {'p6': 2*config['p5']})
+        self.assertAlmostEqual(m.parameters['p6'], 4, 5)
+        m.parameters['p1'] = 2
+        self.assertAlmostEqual(m.parameters['p6'], 8, 5)
+
+        # Circular dependency
+        class MockModelWithCycle(MockProgModel):
+            param_callbacks = {
+                'p1': [derived_callback],
+                'p2': [lambda config: {'p1': config['p2']}]
+            }
+        try:
+            MockModelWithCycle()
+            self.fail("Should have failed- circular dependency")
+        except ProgModelException:
+            pass
+
     def test_broken_models(self):
 
         class missing_states(prognostics_model.PrognosticsModel):
@@ -261,6 +410,45 @@ class TestModels(unittest.TestCase):
     def test_measurement_noise(self):
         self.__noise_test('measurement_noise', 'measurement_noise_dist', MockProgModel.outputs)
 
+    def test_noise_modified_in_place(self):
+        m = MockProgModel(process_noise = 0.5, measurement_noise = 0.5)
+        x = m.initialize()
+        z = m.output(x)
+        self.assertNotEqual(m.apply_process_noise(x), x)
+        self.assertNotEqual(m.apply_measurement_noise(z), z)
+
+        # Noise removed in place, then applied directly (e.g., by a state estimator)
+        for key in m.states:
+            m.parameters['process_noise'][key] = 0
+        m.parameters['measurement_noise']['o1'] = 0
+        self.assertEqual(m.apply_process_noise(x), x)
+        self.assertEqual(m.apply_measurement_noise(z), z)
+
+        # Noise added back in place
+        m.parameters['process_noise']['a'] = 5
+        m.parameters['measurement_noise']['o1'] = 5
+        x2 = m.apply_process_noise(x)
+        self.assertNotEqual(x2['a'], x['a'])
+        self.assertEqual(x2['b'], x['b'])
+        self.assertNotEqual(m.apply_measurement_noise(z), z)
+
+        # Modified in place after cloning (i.e., after copy-on-write)
+        m2 = m.clone()
+        m.parameters['process_noise']['a'] = 0
+        m2.parameters['process_noise']['b'] = 5
+        self.assertEqual(m.apply_process_noise(x), x)
+        x2 = m2.apply_process_noise(x)
+        self.assertNotEqual(x2['a'], x['a'])
+        self.assertNotEqual(x2['b'], x['b'])
+
+        # Modified in place between simulations
+        m.parameters['process_noise']['a'] = 5
+        (_, _, states, _, _) = m.simulate_to(2, mock_load, {"o1": 0.8}, dt = 1)
+        self.assertNotEqual(states[-1]['a'], 3)
+        m.parameters['process_noise']['a'] = 0
+        (_, _, states, _, _) = m.simulate_to(2, mock_load, {"o1": 0.8}, dt = 1)
+        self.assertEqual(states[-1]['a'], 3)
+
     def test_prog_model(self):
         m = MockProgModel() # Should work- sets default
         m = MockProgModel(process_noise = 0.0)
@@ -562,6 +750,189 @@ class TestModels(unittest.TestCase):
         except ProgModelInputException:
             pass
 
+    def test_sim_to_thresh_batch(self):
+        def load(t, x=None):
+            return {'i1': 1, 'i2': 2.1}
+
+        class MockVectorizedModel(MockProgModel):
+            is_vectorized = True
+
+            def next_state(self, x, u, dt):
+                return {
+                    'a': x['a'] + u['i1']*dt,
+                    'b': x['b'],
+                    'c': x['c'] - u['i2'],
+                    't': x['t'] + dt
+                }
+
+            def event_state(self, x):
+                return {
+                    'e1': np.maximum(1-x['t']/5.0, 0),
+                    'e2': np.maximum(1-x['t']/15.0, 0)
+                }
+
+            def threshold_met(self, x):
+                return {
+                    'e1': x['t'] >= 5.0 - 1e-6,
+                    'e2': x['t'] >= 15.0 - 1e-6
+                }
+
+        # Outputs and event states of simulate_to_threshold are calculated for every saved state at once
+        (_, _, _, outputs, event_states) = MockProgModel(process_noise = 0.0).simulate_to_threshold(load, {'o1': 0.8}, dt = 0.5, save_freq = 1)
+        for columnar in [False, True]:
+            m = MockVectorizedModel(process_noise = 0.0)
+            (_, _, _, outputs2, event_states2) = m.simulate_to_threshold(load, {'o1': 0.8}, dt = 0.5, save_freq = 1, columnar = columnar)
+            np.testing.assert_array_almost_equal(event_states2.column('e1'), [es['e1'] for es in event_states])
+            for (z, z2) in zip(outputs, outputs2):
+                self.assertAlmostEqual(z['o1'], z2['o1'])
+
+        for m in [MockProgModel(process_noise = 0.0), MockVectorizedModel(process_noise = 0.0)]:
+            x0 = np.array([[1, 5, -3.2, t0] for t0 in [0, -1, 2]])
+
+            # Any event
+            (time_of_event, states, saved) = m.simulate_to_threshold_batch(load, x0, dt = 0.5)
+            for (toe, expected) in zip(time_of_event['e1'], [5.0, 6.0, 3.0]):
+                self.assertAlmostEqual(toe, expected, 5)
+            self.assertTrue(all(np.isnan(time_of_event['e2'])))
+            self.assertIsNone(saved)
+            self.assertEqual(states.shape, (3, 4))
+
+            # Finished samples are frozen at their final state
+            for (a, expected) in zip(states[:, 0], [6.0, 7.0, 4.0]):
+                self.assertAlmostEqual(a, expected, 5)
+            for t in states[:, 3]:
+                self.assertAlmostEqual(t, 5.0, 5)
+
+            # Only event 2, with horizon
+            (time_of_event, states, saved) = m.simulate_to_threshold_batch(load, x0, threshold_keys=['e2'], dt = 0.5, horizon = 14.0, save_trajectories = True, save_freq = 1.0)
+            for (toe, expected) in zip(time_of_event['e2'], [np.nan, np.nan, 13.0]):
+                self.assertTrue((np.isnan(toe) and np.isnan(expected)) or abs(toe-expected) < 1e-5)
+            for (toe, expected) in zip(time_of_event['e1'], [5.0, 6.0, 3.0]):
+                self.assertAlmostEqual(toe, expected, 5)
+            self.assertAlmostEqual(saved.times[-1], 14.0, 5)
+            self.assertEqual(saved[0].shape, (3, 4))
+            self.assertAlmostEqual(saved[-1][0, 3], 14.0, 5)
+            self.assertAlmostEqual(saved[-1][2, 3], 15.0, 5)
+
+        # Process noise is independent for each sample
+        m = MockVectorizedModel(process_noise = 1.0)
+        (_, states, _) = m.simulate_to_threshold_batch(load, np.zeros((10, 4)), dt = 0.5, horizon = 1)
+        self.assertGreater(np.std(states[:, 1]), 0)
+
+        try:
+            m.simulate_to_threshold_batch(load, np.zeros((10, 3)))
+            self.fail("Should fail- x0 has wrong number of states")
+        except ProgModelInputException:
+            pass
+
+        try:
+            m.simulate_to_threshold_batch(load, x0, threshold_keys=['e3'])
+            self.fail("Should fail- extra threshold key")
+        except ProgModelInputException:
+            pass
+
+    def test_integration_methods(self):
+        from math import exp
+        keys = {
+            'states': ['x'],
+            'inputs': [],
+            'outputs': ['x']
+        }
+        def initialize(u, z):
+            return {'x': 1.0}
+        def dx(x, u):
+            return {'x': -x['x']}  # Exponential decay
+        def output(x):
+            return {'x': x['x']}
+        m = prognostics_model.PrognosticsModel.generate_model(keys, initialize, output, dx_eqn=dx, config={'process_noise': 0})
+        self.assertTrue(m.is_continuous())
+        def load(t, x=None):
+            return {}
+
+        # Integrators must define step
+        from prog_models.integrators import Integrator
+        with self.assertRaises(TypeError):
+            Integrator(m)
+
+        errors = {}
+        for method in ['euler', 'rk4', 'rk45', 'RK45']:
+            (times, _, states, _, _) = m.simulate_to(2, load, {'x': 1.0}, dt = 0.5, save_freq = 0.5, integration_method = method)
+            self.assertAlmostEqual(times[-1], 2.0, 5)
+            errors[method] = max(abs(x['x'] - exp(-t)) for (t, x) in zip(times, states))
+        self.assertGreater(errors['euler'], 1e-2)
+        self.assertLess(errors['rk4'], 1e-3)
+        self.assertLess(errors['rk45'], 1e-5)
+        self.assertLess(errors['RK45'], 1e-5)
+
+        # Coarser tolerance is less accurate
+        (times, _, states, _, _) = m.simulate_to(2, load, {'x': 1.0}, dt = 0.5, integration_method = 'rk45', rtol = 1e-2, atol = 1e-2)
+        self.assertLess(abs(states[-1]['x'] - exp(-2)), 1e-1)
+
+        # Tolerances that cannot be met fail, instead of shrinking the substep forever
+        with self.assertRaises(ProgModelException):
+            m.simulate_to(2, load, {'x': 1.0}, dt = 0.5, integration_method = 'rk45', rtol = 1e-14, atol = 1e-14, max_substeps = 10)
+        m_nan = prognostics_model.PrognosticsModel.generate_model(keys, initialize, output, dx_eqn = lambda x, u: {'x': float('nan') if x['x'] < 0.5 else -x['x']}, config = {'process_noise': 0})
+        with self.assertRaises(ProgModelException):
+            m_nan.simulate_to(2, load, {'x': 1.0}, dt = 0.5, integration_method = 'rk45')
+
+        # Only supported for continuous models
+        m = MockProgModel(process_noise = 0.0)
+        self.assertFalse(m.is_continuous())
+        try:
+            m.simulate_to(2, load, {'o1': 0.8}, integration_method = 'rk4')
+            self.fail("Should have failed- model does not define dx")
+        except ProgModelInputException:
+            pass
+
+        try:
+            m.simulate_to(2, load, {'o1': 0.8}, integration_method = 'invalid')
+            self.fail("Should have failed- unsupported integration method")
+        except ProgModelInputException:
+            pass
+
+    def test_event_localization(self):
+        keys = {
+            'states': ['x'],
+            'inputs': [],
+            'outputs': ['x'],
+            'events': ['empty']
+        }
+        def initialize(u, z):
+            return {'x': 10.5}
+        def dx(x, u):
+            return {'x': -1}
+        def output(x):
+            return {'x': x['x']}
+        def event_state(x):
+            return {'empty': x['x']/10.5}
+        def threshold_met(x):
+            return {'empty': x['x'] <= 0}
+        m = prognostics_model.PrognosticsModel.generate_model(keys, initialize, output, dx_eqn=dx, event_state_eqn=event_state, threshold_eqn=threshold_met, config={'process_noise': 0})
+        def load(t, x=None):
+            return {}
+
+        # Without localization, time of event is at the end of the step
+        (times, _, states, _, _) = m.simulate_to_threshold(load, {'x': 10.5}, dt = 1)
+        self.assertAlmostEqual(times[-1], 11)
+
+        (times, _, states, _, event_states) = m.simulate_to_threshold(load, {'x': 10.5}, dt = 1, event_localization = 'bisect', event_tol = 1e-6)
+        self.assertAlmostEqual(times[-1], 10.5, 5)
+        self.assertLessEqual(states[-1]['x'], 0)
+        self.assertAlmostEqual(states[-1]['x'], 0, 5)
+        self.assertAlmostEqual(event_states[-1]['empty'], 0, 5)
+        self.assertEqual(times[-2], 10)  # Save points unaffected
+
+        (times, _, states, _, _) = m.simulate_to_threshold(load, {'x': 10.5}, dt = 1, event_localization = 'interpolate')
+        self.assertAlmostEqual(times[-1], 10.5)
+        self.assertAlmostEqual(states[-1]['x'], 0)
+
+        for config in [{'event_localization': 'invalid'}, {'event_localization': 'bisect', 'event_tol': 0}, {'event_tol': '1'}]:
+            try:
+                m.simulate_to_threshold(load, {'x': 10.5}, **config)
+                self.fail("Should have failed- invalid event localization config {}".format(config))
+            except ProgModelInputException:
+                pass
+
     def test_sim_past_thresh(self):
         m = MockProgModel(process_noise = 0.0)
         def load(t, x=None):
@@ -570,6 +941,366 @@ class TestModels(unittest.TestCase):
         (times, inputs, states, outputs, event_states) = m.simulate_to(6, load, {'o1': 0.8}, **{'dt': 0.5, 'save_freq': 1.0})
         self.assertAlmostEqual(times[-1], 6.0, 5)
         
+    def test_sim_iter(self):
+        m = MockProgModel(process_noise = 0.0)
+        def load(t, x=None):
+            return {'i1': 1, 'i2': 2.1}
+
+        # Same result as simulate_to_threshold
+        (times, inputs, states, _, _) = m.simulate_to_threshold(load, {'o1': 0.8}, dt = 0.5, save_freq = 1.0, save_pts = [1.5])
+        sim = m.simulate_iter(load, {'o1': 0.8}, dt = 0.5, save_freq = 1.0, save_pts = [1.5])
+        results = list(sim)
+        self.assertEqual(len(results), len(times))
+        for ((t, u, x), t_i, u_i, x_i) in zip(results, times, inputs, states):
+            self.assertAlmostEqual(t, t_i)
+            self.assertEqual(u, u_i)
+            self.assertEqual(x, x_i)
+
+        # Columnar result
+        (times, inputs2, states2, outputs2, _) = m.simulate_to_threshold(load, {'o1': 0.8}, dt = 0.5, save_freq = 1.0, save_pts = [1.5], columnar = True)
+        self.assertIsInstance(states2, ColumnarSimResult)
+        self.assertListEqual(list(states2), list(states))
+        self.assertListEqual(list(inputs2), list(inputs))
+        np.testing.assert_array_equal(states2.column('t'), [x['t'] for x in states])
+        self.assertDictEqual(outputs2[-1], m.output(states[-1]))
+
+        # Stop early
+        for (t, u, x) in m.simulate_iter(load, {'o1': 0.8}, dt = 0.5, save_freq = 1.0):
+            if t >= 3:
+                break
+        self.assertAlmostEqual(t, 3)
+
+        # Long horizon - nothing is accumulated
+        sim = m.simulate_iter(load, {'o1': 0.8}, dt = 0.5, save_freq = 1e3, horizon = 1e5, thresholds_met_eqn = lambda thresholds: False)
+        self.assertEqual(sum(1 for _ in sim), 101)
+
+        # Configuration is validated when called, before iterating
+        try:
+            m.simulate_iter(load, {'o1': 0.8}, dt = -1)
+            self.fail("Should have failed- dt must be positive")
+        except ProgModelInputException:
+            pass
+
+    def test_memoized(self):
+        class MemoizedModel(MockProgModel):
+            calls = 0
+            def output(self, x):
+                self.calls += 1
+                return {'o1': x['a'] + x['b'] + x['c']}
+            def event_state(self, x):
+                es = MockProgModel.event_state(self, x)
+                es['e2'] = self.memoized(x, 'output', self.output)['o1']
+                return es
+            def threshold_met(self, x):
+                return {key : value < 1e-6 for (key, value) in self.event_state(x).items()}
+        m = MemoizedModel(process_noise = 0.0)
+        events_states = []
+        def load(t, x=None):
+            if x is not None:
+                events_states.append(m.event_state(x)['e2'])
+            return {'i1': 1, 'i2': 2.1}
+
+        # Once per step, shared by threshold_met and the loading equation
+        (times, _, states, _, _) = m.simulate_to_threshold(load, {'o1': 0.8}, dt = 0.5, save_freq = 0.5, threshold_keys = ['e1'])
+        self.assertAlmostEqual(times[-1], 5)
+        self.assertEqual(m.calls, 11)  # Initial state, then each step
+        self.assertEqual(len(events_states), 10)
+        self.assertAlmostEqual(events_states[-1], m.output(states[-2])['o1'])
+
+        # Calculated as normal outside of simulation, for other states, or after parameters change
+        m.calls = 0
+        x = m.initialize()
+        m.event_state(x)
+        m.event_state(x)
+        self.assertEqual(m.calls, 2)
+        for (t, u, x) in m.simulate_iter(load, {'o1': 0.8}, dt = 0.5, save_freq = 1.0, threshold_keys = ['e1']):
+            m.calls = 0
+            m.event_state(x)  # Copy of the simulated state
+            self.assertEqual(m.calls, 1)
+        m.calls = 0
+        def load(t, x=None):
+            m.parameters['p1'] = t
+            if x is not None:
+                m.event_state(x)
+            return {'i1': 1, 'i2': 2.1}
+        m.simulate_to_threshold(load, {'o1': 0.8}, dt = 0.5, save_freq = 1.0, threshold_keys = ['e1'])
+        self.assertEqual(m.calls, 20)
+
+    def test_sim_ensemble(self):
+        m = MockProgModel(process_noise = 0.1)
+        rng = m.rng
+        (time_of_event, states) = m.simulate_ensemble(20, mock_load, {'o1': 0.8}, threshold_keys = ['e1'], workers = 1, seed = 42, dt = 0.1)
+        self.assertIs(m.rng, rng)  # Model generator restored
+        self.assertSetEqual(set(time_of_event.keys()), set(m.events))
+        self.assertEqual(states.shape, (20, len(m.states)))
+        self.assertTrue(np.all(np.isnan(time_of_event['e2'])))  # Not met
+        self.assertTrue(np.all(time_of_event['e1'] > 2))
+        self.assertGreater(np.std(time_of_event['e1']), 0)  # Each sample has independent noise
+        
+        # Reproducible, independent of the number of workers
+        (time_of_event2, states2) = m.simulate_ensemble(20, mock_load, {'o1': 0.8}, threshold_keys = ['e1'], workers = 2, seed = 42, dt = 0.1)
+        np.testing.assert_array_equal(time_of_event['e1'], time_of_event2['e1'])
+        np.testing.assert_array_equal(states, states2)
+
+        (time_of_event2, _) = m.simulate_ensemble(20, mock_load, {'o1': 0.8}, threshold_keys = ['e1'], workers = 1, seed = 43, dt = 0.1)
+        self.assertFalse(np.array_equal(time_of_event['e1'], time_of_event2['e1']))
+
+        # Without seed, derived from the model's generator
+        results = [MockProgModel(process_noise = 0.1, seed = 1).simulate_ensemble(5, mock_load, {'o1': 0.8}, threshold_keys = ['e1'], workers = 1, dt = 0.1) for _ in range(2)]
+        np.testing.assert_array_equal(results[0][0]['e1'], results[1][0]['e1'])
+
+        # Event that does not stop the simulation - time first met
+        m0 = MockProgModel(process_noise = 0)
+        (time_of_event, _) = m0.simulate_ensemble(2, mock_load, {'o1': 0.8}, threshold_keys = ['e2'], workers = 1, dt = 0.5)
+        np.testing.assert_array_almost_equal(time_of_event['e1'], [5, 5])
+        np.testing.assert_array_almost_equal(time_of_event['e2'], [15, 15])
+        (batch_time_of_event, _, _) = m0.simulate_to_threshold_batch(mock_load, [m0.initialize()[key] for key in m0.states], threshold_keys = ['e2'], dt = 0.5)
+        np.testing.assert_array_almost_equal(time_of_event['e1'][:1], batch_time_of_event['e1'])
+        (time_of_event, _) = m0.simulate_ensemble(1, mock_load, {'o1': 0.8}, threshold_keys = ['e2'], workers = 1, dt = 0.3, event_localization = 'bisect')
+        self.assertAlmostEqual(time_of_event['e1'][0], 5.1)  # End of step
+        self.assertAlmostEqual(time_of_event['e2'][0], 15, delta = 1e-4)  # Refined
+
+        # Horizon
+        (time_of_event, states) = m.simulate_ensemble(3, mock_load, {'o1': 0.8}, workers = 1, horizon = 1)
+        self.assertTrue(np.all(np.isnan(time_of_event['e1'])))
+
+        for (n_samples, workers, config) in [(0, 1, {}), (2.5, 1, {}), (2, 0, {}), (2, 1, {'dt': -1})]:
+            try:
+                m.simulate_ensemble(n_samples, mock_load, {'o1': 0.8}, workers = workers, **config)
+                self.fail("Should have failed- invalid input")
+            except ProgModelInputException:
+                pass
+
+    def test_pickle(self):
+        import pickle
+        import multiprocessing
+
+        # Built-in model
+        m = BatteryCircuit(qMax = 7000, process_noise = 1e-3, seed = 5)
+        m2 = pickle.loads(pickle.dumps(m))
+        self.assertIsInstance(m2, BatteryCircuit)
+        self.assertDictEqual(dict(m2.parameters), dict(m.parameters))
+        self.assertLess(len(pickle.dumps(m)), 2000)  # Compact
+        z0 = {'t': 18.95, 'v': 4.183}
+        load = lambda t, x = None: {'i': 2}
+        self.assertDictEqual(m2.simulate_to(100, load, z0)[2][-1], m.simulate_to(100, load, z0)[2][-1])  # Same generator state
+
+        # Derived parameter set directly, and custom noise function
+        m = BatteryElectroChem(qMobile = 7000)
+        m.parameters['qSMax'] = 1000
+        offset = 2
+        m.parameters['process_noise'] = lambda self, x, dt = 1: {key: x[key] + offset for key in x}
+        m2 = pickle.loads(pickle.dumps(m))
+        self.assertEqual(m2.parameters['qSMax'], 1000)
+        self.assertEqual(m2.parameters['qMobile'], 7000)
+        self.assertAlmostEqual(m2.parameters['qMax'], m.parameters['qMax'])
+        x = m.initialize()
+        self.assertDictEqual(m2.apply_process_noise(x), m.apply_process_noise(x))
+
+        # Restored without calling __init__ (e.g., required arguments), with registered callbacks
+        class ModelWithArgs(MockProgModel):
+            inits = 0
+            def __init__(self, scale, **kwargs):
+                ModelWithArgs.inits += 1
+                super().__init__(**kwargs)
+        m = ModelWithArgs(2, p1 = 3)
+        m.parameters.register_derived_callback('p1', lambda params: {'p2': 2*params['p1']})
+        m.parameters.register_derived_callback('p2', lambda params: {'p3': params['p2'] + 1})
+        m2 = pickle.loads(pickle.dumps(m))
+        self.assertEqual(ModelWithArgs.inits, 1)
+        self.assertDictEqual(dict(m2.parameters), dict(m.parameters))
+        m2.parameters['p1'] = 4
+        self.assertEqual(m2.parameters['p3'], 9)
+        self.assertEqual(m.parameters['p3'], 7)
+
+        # Static methods, class methods and properties
+        class ModelWithDescriptors(MockProgModel):
+            @staticmethod
+            def double(value):
+                return 2*value
+            @classmethod
+            def n_states(cls):
+                return len(cls.states)
+            @property
+            def p1_doubled(self):
+                return self.double(self.parameters['p1'])
+            def output(self, x):
+                return {'o1': self.p1_doubled + self.n_states()}
+        m_descriptors = ModelWithDescriptors(p1 = 3)
+        m2 = pickle.loads(pickle.dumps(m_descriptors))
+        self.assertEqual(m2.p1_doubled, 6)
+        self.assertDictEqual(m2.output(m2.initialize()), {'o1': 10})
+        self.assertIsInstance(type(m2).__dict__['double'], staticmethod)
+        self.assertNotIn('_class_token', vars(ModelWithDescriptors))  # Class not modified
+
+        # Mutual recursion
+        def is_even(n):
+            return True if n == 0 else is_odd(n - 1)
+        def is_odd(n):
+            return False if n == 0 else is_even(n - 1)
+        is_even2 = pickle.loads(pickle.dumps(by_value(is_even)))
+        self.assertTrue(is_even2(10))
+        self.assertFalse(is_even2(7))
+
+        # Generated model, with lambdas, closures, globals and recursion
+        scale = 2
+        def factorial(n):
+            return 1 if n <= 1 else n*factorial(n-1)
+        keys = {'inputs': ['u1'], 'states': ['x1'], 'outputs': ['z1'], 'events': ['e1']}
+        m = prognostics_model.PrognosticsModel.generate_model(
+            keys, 
+            lambda u, z = None: {'x1': 0}, 
+            lambda x: {'z1': np.sqrt(x['x1'])*scale*factorial(3)}, 
+            next_state_eqn = lambda x, u, dt: {'x1': x['x1'] + u['u1']*dt}, 
+            event_state_eqn = lambda x: {'e1': 1 - x['x1']/10}, 
+            threshold_eqn = lambda x: {'e1': x['x1'] >= 10}, 
+            config = {'process_noise': 0})
+        m2 = pickle.loads(pickle.dumps(m))
+        self.assertListEqual(m2.events, ['e1'])
+        self.assertDictEqual(m2.output({'x1': 4}), {'z1': 24})
+        self.assertIs(type(pickle.loads(pickle.dumps(m))), type(m2))  # Class created once
+
+        # In another process
+        load = lambda t, x = None: {'u1': 1}
+        with multiprocessing.get_context('spawn').Pool(1) as pool:
+            z = pool.apply(call_model, (m, 'output', {'x1': 4}))
+            (times, _, states, _, _) = pool.apply(call_model, (m, 'simulate_to_threshold', by_value(load), {'z1': 0}))
+            self.assertDictEqual(pool.apply(call_model, (m_descriptors, 'output', m_descriptors.initialize())), {'o1': 10})
+            self.assertTrue(pool.apply(by_value(is_even), (10,)))
+        self.assertDictEqual(z, {'z1': 24})
+        self.assertEqual(times[-1], 10)
+        (time_of_event, _) = m.simulate_ensemble(2, load, {'z1': 0}, workers = 2)
+        np.testing.assert_array_equal(time_of_event['e1'], [10, 10])
+
+    def test_sweep(self):
+        m = MockProgModel(process_noise = 0)
+        x0 = m.parameters['x0']
+
+        # Explicit sets of parameters
+        points = [{'x0': dict(x0, t = t), 'p1': p1} for (t, p1) in ((0, 1), (2, 2), (4, 3))]
+        results = m.sweep(points, mock_load, {'o1': 0.8}, metrics = ['a'], threshold_keys = ['e1'], dt = 0.5, workers = 1)
+        self.assertEqual(results.shape, (3,))
+        self.assertEqual(results.dtype.names, ('parameters', 'time_of_event', 'metrics'))
+        self.assertIs(results['parameters']['x0'][1], points[1]['x0'])
+        np.testing.assert_array_equal(results['parameters']['p1'], [1, 2, 3])
+        np.testing.assert_array_equal(results['time_of_event']['e1'], [5, 3, 1])
+        self.assertTrue(np.isnan(results['time_of_event']['e2']).all())  # Not met
+        np.testing.assert_array_equal(results['metrics']['a'], [6, 4, 2])
+        self.assertEqual(m.parameters['x0'], x0)  # Model not changed
+
+        # Event that does not stop the simulation - time first met
+        results = m.sweep(points, mock_load, {'o1': 0.8}, threshold_keys = ['e2'], dt = 0.5, workers = 1)
+        np.testing.assert_array_equal(results['time_of_event']['e1'], [5, 3, 1])
+        np.testing.assert_array_equal(results['time_of_event']['e2'], [15, 13, 11])
+
+        # Grid, divided between workers, with metric functions
+        metrics = {'ab': lambda x: x['a'] + x['b']}
+        results = m.sweep({'p1': [1, 2], 'x0': [dict(x0, t = 0), dict(x0, t = 2), dict(x0, t = 4)]}, mock_load, {'o1': 0.8}, metrics = metrics, threshold_keys = ['e1'], dt = 0.5, workers = 2)
+        np.testing.assert_array_equal(results['parameters']['p1'], [1, 1, 1, 2, 2, 2])
+        np.testing.assert_array_equal(results['time_of_event']['e1'], [5, 3, 1]*2)
+        np.testing.assert_array_equal(results['metrics']['ab'], [11, 9, 7]*2)
+        self.assertEqual(results.dtype['metrics'].names, ('ab',))
+
+        # Reproducible, and independent of workers
+        m = MockProgModel(process_noise = 0.1)
+        (results1, results2) = (m.sweep({'p1': np.arange(4)}, mock_load, {'o1': 0.8}, workers = workers, seed = 3, dt = 0.5) for workers in (1, 2))
+        np.testing.assert_array_equal(results1['metrics']['a'], results2['metrics']['a'])
+        self.assertEqual(results1.dtype['metrics'].names, tuple(m.states))  # Default metrics
+
+        # Bad configuration
+        for (param_grid, config) in (([], {}), ({'p9': [1]}, {}), ([{'p1': 1}, {'x0': x0}], {}), ({'p1': [1]}, {'metrics': ['o1']}), ({'p1': [1]}, {'workers': 0})):
+            with self.assertRaises(ProgModelInputException):
+                m.sweep(param_grid, mock_load, {'o1': 0.8}, **config)
+
+    def test_estimate_params(self):
+        keys = {
+            'inputs': ['u1'],
+            'states': ['x1'],
+            'outputs': ['z1'],
+        }
+        def initialize(u, z):
+            return {'x1': 0}
+        def dx(x, u):
+            return {'x1': m.parameters['rate']*u['u1']}
+        def output(x):
+            return {'z1': x['x1'] + m.parameters['offset']}
+        m = PrognosticsModel.generate_model(keys, initialize, output, dx_eqn = dx, config = {'rate': 1, 'offset': 0})
+        times = list(range(6))
+        runs = [(times, [{'u1': u}]*6, [{'z1': 2*u*t + 1} for t in times]) for u in (1, 2, 3)]
+        bounds = {'rate': (0, 5), 'offset': (-5, 5)}
+
+        # Serial and divided between workers
+        for workers in (1, 2):
+            m.parameters.update(rate = 1, offset = 0)
+            m.estimate_params(runs, ['rate', 'offset'], dt = 1, workers = workers)
+            self.assertAlmostEqual(m.parameters['rate'], 2, 4)
+            self.assertAlmostEqual(m.parameters['offset'], 1, 4)
+            self.assertEqual(m.parameters['process_noise']['x1'], 0.1)  # Noise restored
+
+            m.parameters.update(rate = 1, offset = 0)
+            m.estimate_params(runs, ['rate', 'offset'], dt = 1, workers = workers, method = 'differential_evolution', bounds = bounds, options = {'seed': 1, 'tol': 1e-10})
+            self.assertAlmostEqual(m.parameters['rate'], 2, 4)
+            self.assertAlmostEqual(m.parameters['offset'], 1, 4)
+
+        # Bounds with other methods
+        m.estimate_params(runs, ['rate'], dt = 1, method = 'L-BFGS-B', bounds = [(0, 1.5)], options = {})
+        self.assertAlmostEqual(m.parameters['rate'], 1.5)
+
+        # Cache
+        from prog_models.cache import ErrorCache
+        cache = ErrorCache(keep_outputs = True)
+        m.parameters.update(rate = 1, offset = 0)
+        m.estimate_params(runs, ['rate', 'offset'], dt = 1, cache = cache)
+        self.assertAlmostEqual(m.parameters['rate'], 2, 4)
+        self.assertEqual(cache.stats['entries'], cache.stats['misses'])
+        misses = cache.misses
+        m.parameters.update(rate = 1, offset = 0)
+        m.estimate_params(runs, ['rate', 'offset'], dt = 1, cache = cache)  # Same evaluations, none simulated
+        self.assertEqual(cache.misses, misses)
+        self.assertGreater(cache.stats['hits'], 0)
+        self.assertAlmostEqual(m.parameters['rate'], 2, 4)
+        outputs = cache.outputs([m.parameters['rate'], m.parameters['offset']], 2, 1)
+        np.testing.assert_allclose(outputs[:, 0], [z['z1'] for z in runs[2][2]], atol = 1e-3)
+        m.parameters.update(rate = 1, offset = 0)
+        m.estimate_params(runs, ['rate', 'offset'], dt = 1, cache = False)
+        self.assertAlmostEqual(m.parameters['rate'], 2, 4)
+
+        # Cache is opt-in
+        calls = []
+        def initialize_count(u, z):
+            calls.append(1)
+            return {'x1': 0}
+        m_count = PrognosticsModel.generate_model(keys, initialize_count, lambda x: {'z1': x['x1'] + m_count.parameters['offset']}, dx_eqn = lambda x, u: {'x1': m_count.parameters['rate']*u['u1']}, config = {'rate': 1, 'offset': 0})
+        cache = ErrorCache()
+        m_count.estimate_params(runs, ['rate', 'offset'], dt = 1, cache = cache)
+        calls.clear()
+        m_count.parameters.update(rate = 1, offset = 0)
+        m_count.estimate_params(runs, ['rate', 'offset'], dt = 1, cache = cache)
+        self.assertEqual(len(calls), 0)  # Every run memoized
+        m_count.parameters.update(rate = 1, offset = 0)
+        m_count.estimate_params(runs, ['rate', 'offset'], dt = 1)
+        self.assertEqual(len(calls), cache.misses)  # Default is not memoized
+
+        # Cache - rounding, LRU order, and memory budget
+        cache = ErrorCache(max_bytes = 2000, significant_digits = 6)
+        self.assertEqual(cache.key([1.0000001], 0, 1), cache.key([1], 0, 1))
+        self.assertNotEqual(cache.key([1], 0, 1), cache.key([1], 1, 1))
+        self.assertIsNone(cache.get(cache.key([1], 0, 1)))
+        for value in range(100):
+            cache.put(cache.key([value], 0, 1), value)
+            self.assertEqual(cache.get(cache.key([0], 0, 1)).error, 0)  # Most recently used, so kept
+        self.assertLessEqual(cache.bytes, 2000)
+        self.assertGreater(cache.stats['evictions'], 0)
+        self.assertIsNone(cache.get(cache.key([1], 0, 1)))
+        self.assertEqual(cache.get(cache.key([99], 0, 1)).error, 99)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+        # Bad configuration
+        for config in ({'workers': 0}, {'workers': 1.5}, {'method': 'differential_evolution'}, {'bounds': [(0, 1)]}, {'cache': 1}):
+            with self.assertRaises(ProgModelInputException):
+                m.estimate_params(runs, ['rate', 'offset'], **config)
+
     def test_sim_prog(self):
         m = MockProgModel(process_noise = 0.0)
         def load(t, x=None):
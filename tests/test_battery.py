@@ -1,7 +1,11 @@
 # Copyright © 2020 United States Government as represented by the Administrator of the National Aeronautics and Space Administration.  All Rights Reserved.
 
 import unittest
+import numpy as np
+from math import log
+from prog_models import ProgModelInputException
 from prog_models.models import BatteryCircuit, BatteryElectroChem, BatteryElectroChemEOL, BatteryElectroChemEOD, BatteryElectroChemEODEOL
+from prog_models.models.battery_electrochem import interpolate_table, interpolate_table_array
 
 def future_loading(t, x=None):
     # Variable (piece-wise) future loading scheme 
@@ -27,14 +31,132 @@ class TestBattery(unittest.TestCase):
         (times, inputs, states, outputs, event_states) = batt.simulate_to(200, future_loading, {'t': 18.95, 'v': 4.183})
         self.assertEqual(BatteryElectroChem, BatteryElectroChemEODEOL)
 
+    def test_battery_electrochem_state_parameters(self):
+        batt = BatteryElectroChem()
+        params = dict(batt.parameters)
+        (times, inputs, states, outputs, event_states) = batt.simulate_to(200, future_loading, {'t': 18.95, 'v': 4.183})
+        self.assertDictEqual(dict(batt.parameters), params)  # Health states do not modify parameters
+
+        # Health parameters (and parameters derived from them) from state
+        x = dict(states[-1])
+        x['qMax'] = 7000
+        p = batt.parameters_at(x)
+        self.assertEqual(p.qMobile, 7000)
+        self.assertEqual(p.Ro, x['Ro'])
+        self.assertEqual(p.tDiffusion, x['D'])
+        batt_eod = BatteryElectroChemEOD(qMobile = 7000, Ro = x['Ro'], tDiffusion = x['D'])
+        for key in ['qMax', 'qSMax', 'qnMax', 'qpSMin']:
+            self.assertAlmostEqual(getattr(p, key), batt_eod.parameters[key])
+        self.assertIs(batt.parameters_at(x), p)  # Cached
+        self.assertEqual(batt.parameters_at(states[-1]).qMobile, states[-1]['qMax'])
+        z = batt.output(x)
+        z_eod = batt_eod.output(x)
+        self.assertAlmostEqual(z['v'], z_eod['v'])
+        self.assertAlmostEqual(batt.event_state(x)['EOD'], batt_eod.event_state(x)['EOD'])
+
     def test_battery_electrochem_EOD(self):
         batt = BatteryElectroChemEOD()
         (times, inputs, states, outputs, event_states) = batt.simulate_to(200, future_loading, {'t': 18.95, 'v': 4.183})
 
+    def test_battery_electrochem_potentials(self):
+        batt = BatteryElectroChemEOD()
+        F = 96487
+        def redlich_kister(A, x):
+            # Expansion term by term
+            return sum(a*((2*x-1)**(k+1) - (2*k*x*(1-x)*(2*x-1)**(k-1) if k else 0))/F for (k, a) in enumerate(A))
+        tb = 292.1
+        xs = np.linspace(0.01, 0.99, 99)
+        (Ven, Vep) = batt.electrode_potentials(xs, xs[::-1], tb)  # Vectorized
+        self.assertEqual(Ven.shape, (99,))
+        for (i, x) in enumerate(xs):
+            self.assertAlmostEqual(Ven[i], batt.parameters['U0n'] + 8.3144621*tb/F*log((1-x)/x) + redlich_kister(batt.parameters['An'], x), 10)
+            self.assertAlmostEqual(Vep[i], batt.parameters['U0p'] + 8.3144621*tb/F*log(x/(1-x)) + redlich_kister(batt.parameters['Ap'], 1-x), 10)
+            self.assertAlmostEqual(batt.electrode_potentials(x, 1-x, tb)[1], Vep[i], 12)
+
+        # Coefficients updated with Redlich-Kister parameters
+        x = dict(batt.initialize(), qnS = 300, qpS = 1000)
+        v = batt.output(x)['v']
+        batt.parameters['An'] = [86.19, 10] + [0]*11
+        xnS = 300/batt.parameters['qSMax']
+        self.assertAlmostEqual(batt.output(x)['v'], v - 10*((2*xnS-1)**2 - 2*xnS*(1-xnS))/F, 12)
+
+        # Trajectory in one call
+        (_, _, states, outputs, _) = batt.simulate_to(200, future_loading, {'t': 18.95, 'v': 4.183})
+        z = batt.output({key: np.array([x[key] for x in states]) for key in batt.states})
+        np.testing.assert_allclose(z['v'], [z_i['v'] for z_i in outputs], rtol = 1e-12)
+
+    def test_battery_electrochem_ocv_table(self):
+        exact = BatteryElectroChemEOD(process_noise = 0)
+        batt = BatteryElectroChemEOD(ocv_grid = 1000, process_noise = 0)
+        self.assertGreater(batt.parameters['ocv_max_error'], 0)
+        self.assertLess(batt.parameters['ocv_max_error'], 1e-3)
+        self.assertEqual(exact.parameters['ocv_max_error'], 0)
+        xs = np.linspace(0.01, 0.99, 97)
+        for (V, V_exact) in zip(batt.electrode_potentials(xs, xs[::-1], 292.1), exact.electrode_potentials(xs, xs[::-1], 292.1)):
+            self.assertLessEqual(np.abs(V - V_exact).max(), batt.parameters['ocv_max_error'])
+        for x in (1e-9, 0.5, 1 - 1e-9):  # Ends of table
+            self.assertAlmostEqual(batt.electrode_potentials(0.5, x, 292.1)[1], exact.electrode_potentials(0.5, x, 292.1)[1], 3)
+
+        # Outside of table (e.g., overcharged), extrapolated from the first or last interval
+        table = batt.parameters['ocv_tables'][1]
+        (scale, values, slopes) = table
+        outside = [-0.5, -0.01, -1e-9, 0, 1, 1 + 1e-9, 1.01, 1.5]
+        expected = [values[0] + slopes[0]*x*scale if x <= 0 else values[-1] + slopes[-1]*(x - 1)*scale for x in outside]
+        for (x, value) in zip(outside, expected):
+            self.assertAlmostEqual(interpolate_table(table, x), value)
+        np.testing.assert_allclose(interpolate_table_array(table, np.array(outside)), expected)
+
+        # Finer grid, more accurate
+        error = batt.parameters['ocv_max_error']
+        batt.parameters['ocv_grid'] = 10000
+        self.assertLess(batt.parameters['ocv_max_error'], error/10)
+
+        # Table updated with Redlich-Kister parameters
+        batt.parameters['U0p'] = 4.1
+        batt.parameters['Ap'] = [a*1.1 for a in batt.parameters['Ap']]
+        exact.parameters.update(U0p = 4.1, Ap = batt.parameters['Ap'])
+        self.assertAlmostEqual(batt.electrode_potentials(0.2, 0.7, 300)[1], exact.electrode_potentials(0.2, 0.7, 300)[1], 4)
+
+        (times, _, _, _, _) = batt.simulate_to_threshold(future_loading, {'t': 18.95, 'v': 4.183}, dt = 1)
+        (times_exact, _, _, _, _) = exact.simulate_to_threshold(future_loading, {'t': 18.95, 'v': 4.183}, dt = 1)
+        self.assertAlmostEqual(times[-1], times_exact[-1], delta = 2)
+
+        # Back to exact
+        batt.parameters['ocv_grid'] = None
+        self.assertEqual(batt.electrode_potentials(0.2, 0.7, 300), exact.electrode_potentials(0.2, 0.7, 300))
+        for grid in (1, 2.5, 'fine'):
+            with self.assertRaises(ProgModelInputException):
+                batt.parameters['ocv_grid'] = grid
+
     def test_battery_electrochem_EOL(self):
         batt = BatteryElectroChemEOL()
         (times, inputs, states, outputs, event_states) = batt.simulate_to(200, future_loading, {'t': 18.95, 'v': 4.183})
 
+    def test_battery_vectorized(self):
+        for (model, dt) in ((BatteryCircuit, 1), (BatteryElectroChemEOD, 1), (BatteryElectroChemEOL, 1000)):
+            batt = model(process_noise = 0)
+            self.assertTrue(batt.is_vectorized)
+            x0 = batt.initialize()
+            samples = np.array([[x0[key]*scale for key in batt.states] for scale in (1, 0.99, 0.98)])
+            (time_of_event, states, _) = batt.simulate_to_threshold_batch(future_loading, samples, dt = dt)
+
+            # Same as simulating each sample
+            z0 = batt.output(x0)
+            for (i, sample) in enumerate(samples):
+                x = dict(zip(batt.states, sample))
+                (times, _, sample_states, _, _) = batt.simulate_to_threshold(future_loading, z0, x = x, dt = dt)
+                self.assertEqual(time_of_event[batt.events[0]][i], times[-1])
+                for (j, key) in enumerate(batt.states):
+                    self.assertAlmostEqual(states[i, j], sample_states[-1][key])
+
+                # Equations at many states at once
+                batch = {key: states[:, j] for (j, key) in enumerate(batt.states)}
+                for (key, value) in batt.output(sample_states[-1]).items():
+                    self.assertAlmostEqual(batt.output(batch)[key][i], value)
+                for (key, value) in batt.event_state(sample_states[-1]).items():
+                    self.assertAlmostEqual(batt.event_state(batch)[key][i], value)
+        self.assertFalse(BatteryElectroChemEODEOL.is_vectorized)
+
 # This allows the module to be executed directly
 def run_tests():
     unittest.main()
@@ -149,6 +149,9 @@ class TestCentrifugalPump(unittest.TestCase):
         pump.parameters['x0']['wThrust'] = 1e-10
         (times, inputs, states, outputs, event_states) = pump.simulate_to_threshold(future_loading, pump.output(pump.initialize(future_loading(0),{})))
         self.assertAlmostEqual(times[-1], 23891)
+        # Wear states are read from the state, without modifying parameters
+        self.assertEqual(pump.parameters['wA'], CentrifugalPumpWithWear.default_parameters['wA'])
+        self.assertEqual(pump.parameters_at(states[-1]).wA, 1e-2)
 
     def test_centrifugal_pump(self):
         self.assertEqual(CentrifugalPump,CentrifugalPumpWithWear)
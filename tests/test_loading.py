@@ -0,0 +1,107 @@
+# Copyright © 2021 United States Government as represented by the Administrator of the National Aeronautics and Space Administration.  All Rights Reserved.
+
+import unittest
+import numpy as np
+from prog_models import ProgModelInputException
+from prog_models.loading import PiecewiseConstantLoad, PiecewiseLinearLoad, SampledLoad
+from prog_models.models import BatteryCircuit
+
+
+class TestLoading(unittest.TestCase):
+    def test_piecewise_constant(self):
+        def future_loading(t, x=None):
+            if (t < 600):
+                i = 2
+            elif (t < 900):
+                i = 1
+            else:
+                i = 4
+            return {'i': i}
+
+        for load in [PiecewiseConstantLoad([600, 900], [{'i': 2}, {'i': 1}, {'i': 4}]), PiecewiseConstantLoad([600, 900], {'i': [2, 1, 4]})]:
+            times = [0, 599.9, 600, 899, 900, 1e6, 10, 750]  # Including out of order
+            for t in times:
+                self.assertDictEqual(load(t), future_loading(t))
+            np.testing.assert_array_equal(load.evaluate(times)['i'], [future_loading(t)['i'] for t in times])
+
+        for (times, values) in [([600, 900], {'i': [2, 1]}), ([900, 600], {'i': [2, 1, 4]}), ([600], [])]:
+            try:
+                PiecewiseConstantLoad(times, values)
+                self.fail("Should have failed- invalid profile")
+            except ProgModelInputException:
+                pass
+
+    def test_piecewise_linear(self):
+        load = PiecewiseLinearLoad([10, 20, 40], {'i': [1, 3, 2], 'j': [0, 0, 1]})
+        times = [0, 10, 15, 20, 30, 40, 50, 12]
+        expected_i = [1, 1, 2, 3, 2.5, 2, 2, 1.4]
+        expected_j = [0, 0, 0, 0, 0.5, 1, 1, 0]
+        for (t, i, j) in zip(times, expected_i, expected_j):
+            u = load(t)
+            self.assertAlmostEqual(u['i'], i)
+            self.assertAlmostEqual(u['j'], j)
+        u = load.evaluate(times)
+        np.testing.assert_array_almost_equal(u['i'], expected_i)
+        np.testing.assert_array_almost_equal(u['j'], expected_j)
+
+        try:
+            PiecewiseLinearLoad([10, 20], {'i': [1]})
+            self.fail("Should have failed- one value per time")
+        except ProgModelInputException:
+            pass
+
+    def test_sampled(self):
+        load = SampledLoad({'i': [1, 3, 2]}, dt = 10, t0 = 5)
+        times = [0, 5, 14.9, 15, 25, 100]
+        expected = [1, 1, 1, 3, 2, 2]
+        for (t, i) in zip(times, expected):
+            self.assertEqual(load(t)['i'], i)
+        np.testing.assert_array_equal(load.evaluate(times)['i'], expected)
+
+        load = SampledLoad([{'i': 1}, {'i': 3}, {'i': 2}], dt = 10, interpolation = 'linear')
+        times = [-1, 0, 5, 10, 17.5, 20, 30]
+        expected = [1, 1, 2, 3, 2.25, 2, 2]
+        for (t, i) in zip(times, expected):
+            self.assertAlmostEqual(load(t)['i'], i)
+        np.testing.assert_array_almost_equal(load.evaluate(times)['i'], expected)
+
+        for config in [{'dt': 0}, {'dt': 1, 'interpolation': 'invalid'}]:
+            try:
+                SampledLoad({'i': [1, 2]}, **config)
+                self.fail("Should have failed- invalid configuration")
+            except ProgModelInputException:
+                pass
+
+    def test_simulate(self):
+        m = BatteryCircuit(process_noise = 0)
+        def future_loading(t, x=None):
+            return {'i': 2 if t < 600 else 3}
+        load = PiecewiseConstantLoad([600], {'i': [2, 3]})
+        z0 = {'t': 18.95, 'v': 4.183}
+        (times, inputs, _, outputs, _) = m.simulate_to(1000, future_loading, z0, dt = 0.5)
+        (times2, inputs2, _, outputs2, _) = m.simulate_to(1000, load, z0, dt = 0.5)
+        self.assertListEqual(list(times), list(times2))
+        self.assertListEqual(list(inputs), list(inputs2))
+        self.assertDictEqual(outputs[-1], outputs2[-1])
+
+        # Batch simulation - loads are evaluated for many steps at once
+        x0 = np.array([[m.parameters['x0'][key] for key in m.states]]*2)
+        (toe, states, _) = m.simulate_to_threshold_batch(future_loading, x0, dt = 0.5, horizon = 1000)
+        (toe2, states2, _) = m.simulate_to_threshold_batch(load, x0, dt = 0.5, horizon = 1000)
+        np.testing.assert_array_equal(states, states2)
+
+# This allows the module to be executed directly
+def run_tests():
+    unittest.main()
+    
+def main():
+    l = unittest.TestLoader()
+    runner = unittest.TextTestRunner()
+    print("\n\nTesting Loading")
+    result = runner.run(l.loadTestsFromTestCase(TestLoading)).wasSuccessful()
+
+    if not result:
+        raise Exception("Failed test")
+
+if __name__ == '__main__':
+    main()
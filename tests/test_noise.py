@@ -0,0 +1,173 @@
+# Copyright © 2021 United States Government as represented by the Administrator of the National Aeronautics and Space Administration.  All Rights Reserved.
+
+import unittest
+import numpy as np
+from prog_models import ProgModelTypeError
+from prog_models.noise import BlockNoise, CorrelatedBlockNoise
+from prog_models.models import BatteryCircuit
+
+
+class TestNoise(unittest.TestCase):
+    def test_block_noise(self):
+        keys = ['a', 'b', 'c']
+        scale = {'a': 0, 'b': 1, 'c': 5}
+        rng = np.random.default_rng(0)
+        for dist in ['normal', 'Gaussian', 'uniform', 'triangular']:
+            sampler = BlockNoise(keys, scale, dist, rng = rng)
+            self.assertFalse(sampler.is_zero)
+            samples = np.array([sampler.sample() for _ in range(5000)])
+            self.assertEqual(samples.shape, (5000, 3))
+            self.assertTrue(np.all(samples[:, 0] == 0))
+            self.assertAlmostEqual(np.mean(samples[:, 2]), 0, delta = 0.3)
+            self.assertAlmostEqual(np.std(samples[:, 2])/np.std(samples[:, 1]), 5, delta = 0.5)
+            if dist != 'normal' and dist != 'Gaussian':
+                self.assertTrue(np.all(np.abs(samples[:, 2]) <= 5))
+            self.assertEqual(sampler.sample_batch(10).shape, (3, 10))
+
+        # Reset discards values drawn in advance
+        sampler = BlockNoise(keys, scale, rng = np.random.default_rng(1))
+        first = sampler.sample()
+        self.assertNotEqual(sampler.sample(), first)
+        sampler.reset(np.random.default_rng(1))
+        self.assertEqual(sampler.sample(), first)
+
+        # Scale updated on reset
+        scale['b'] = 0
+        scale['c'] = 0
+        self.assertFalse(sampler.is_zero)
+        sampler.reset()
+        self.assertTrue(sampler.is_zero)
+
+        try:
+            BlockNoise(keys, scale, 'invalid')
+            self.fail("Should have failed- unsupported distribution")
+        except ProgModelTypeError:
+            pass
+
+    def test_correlated_noise(self):
+        keys = ['a', 'b', 'c']
+        covariance = np.array([[4, 1.2, 0], [1.2, 1, 0], [0, 0, 0]])
+        sampler = CorrelatedBlockNoise(keys, covariance, rng = np.random.default_rng(0))
+        self.assertFalse(sampler.is_zero)
+        samples = np.array([sampler.sample() for _ in range(20000)])
+        self.assertTrue(np.all(samples[:, 2] == 0))
+        self.assertTrue(np.allclose(np.cov(samples.T), covariance, atol = 0.1))
+        batch = sampler.sample_batch(20000)
+        self.assertEqual(batch.shape, (3, 20000))
+        self.assertTrue(np.allclose(np.cov(batch), covariance, atol = 0.1))
+
+        # Factor cached while unchanged, updated on reset if modified in place
+        factor = sampler.factor
+        sampler.reset()
+        self.assertIs(sampler.factor, factor)
+        covariance[2, 2] = 1
+        sampler.reset()
+        self.assertIsNot(sampler.factor, factor)
+        self.assertTrue(np.allclose(sampler.factor @ sampler.factor.T, covariance))
+        covariance[:] = 0
+        sampler.reset()
+        self.assertTrue(sampler.is_zero)
+
+        # Invalid
+        for (cov, dist) in [
+                ([[1, 0], [0, 1]], 'normal'),  # Wrong shape
+                ([[1, 0.5, 0], [0, 1, 0], [0, 0, 1]], 'normal'),  # Not symmetric
+                ([[1, 2, 0], [2, 1, 0], [0, 0, 1]], 'normal'),  # Not positive semi-definite
+                (np.eye(3), 'uniform')]:
+            try:
+                CorrelatedBlockNoise(keys, cov, dist)
+                self.fail("Should have failed- invalid covariance")
+            except ProgModelTypeError:
+                pass
+
+        # In model
+        m = BatteryCircuit(seed = 2)
+        n = len(m.states)
+        covariance = np.diag(np.arange(1, n + 1)*1e-3)
+        covariance[0, 1] = covariance[1, 0] = 1e-3
+        m.parameters['process_noise'] = covariance
+        x = m.initialize()
+        dx = np.array([[x2[key] - x[key] for key in m.states] for x2 in [m.apply_process_noise(x) for _ in range(20000)]])
+        self.assertTrue(np.allclose(np.cov(dx.T), covariance, atol = 2e-4))
+        m.parameters['measurement_noise'] = [[1e-2, 0], [0, 1e-2]]
+        z = {'t': 18.95, 'v': 4.183}
+        self.assertNotEqual(m.apply_measurement_noise(z), z)
+        try:
+            m.parameters['process_noise'] = np.eye(n + 1)
+            self.fail("Should have failed- wrong shape")
+        except ProgModelTypeError:
+            pass
+
+    def test_model_noise(self):
+        def future_loading(t, x=None):
+            return {'i': 2}
+        z0 = {'t': 18.95, 'v': 4.183}
+
+        # Reproducible with seed
+        results = []
+        for _ in range(2):
+            m = BatteryCircuit(process_noise = 1e-3, seed = 5)
+            (_, _, states, _, _) = m.simulate_to(100, future_loading, z0)
+            results.append(states[-1])
+        self.assertDictEqual(results[0], results[1])
+
+        # Setting the generator
+        for _ in range(2):
+            m.rng = np.random.default_rng(6)
+            (_, _, states, _, _) = m.simulate_to(100, future_loading, z0)
+            results.append(states[-1])
+        self.assertDictEqual(results[2], results[3])
+        self.assertNotEqual(results[0], results[2])
+        m2 = BatteryCircuit(process_noise = 1e-3, rng = np.random.default_rng(6))
+        (_, _, states, _, _) = m2.simulate_to(100, future_loading, z0)
+        self.assertDictEqual(states[-1], results[2])
+
+        try:
+            m.rng = 5
+            self.fail("Should have failed- rng must be a generator")
+        except ProgModelTypeError:
+            pass
+
+        # Spawned generators are independent and reproducible
+        rngs = BatteryCircuit(seed = 7).spawn(3)
+        rngs2 = BatteryCircuit(seed = 7).spawn(3)
+        values = [rng.random() for rng in rngs]
+        self.assertEqual(len(set(values)), 3)
+        self.assertListEqual(values, [rng.random() for rng in rngs2])
+        m = BatteryCircuit(seed = 7)
+        self.assertNotEqual(m.spawn(1)[0].random(), m.spawn(1)[0].random())  # New each call
+
+        # Zero noise
+        m = BatteryCircuit(process_noise = 0, measurement_noise = 0)
+        x = m.initialize()
+        self.assertDictEqual(m.apply_process_noise(x), x)
+        z = {'t': 18.95, 'v': 4.183}
+        self.assertDictEqual(m.apply_measurement_noise(z), z)
+        
+        # Change distribution
+        m.parameters['process_noise_dist'] = 'uniform'
+        m.parameters['process_noise'] = 2
+        x2 = m.apply_process_noise(x)
+        self.assertTrue(all(0 < abs(x2[key] - x[key]) <= 2 for key in m.states))
+
+        # Custom noise function, then back to distribution
+        m.parameters['process_noise'] = lambda self, x, dt = 1: {key: x[key] + 1 for key in x}
+        self.assertDictEqual(m.apply_process_noise(x), {key: x[key] + 1 for key in x})
+        m.parameters['process_noise'] = 0
+        self.assertDictEqual(m.apply_process_noise(x), x)
+
+# This allows the module to be executed directly
+def run_tests():
+    unittest.main()
+    
+def main():
+    l = unittest.TestLoader()
+    runner = unittest.TextTestRunner()
+    print("\n\nTesting Noise")
+    result = runner.run(l.loadTestsFromTestCase(TestNoise)).wasSuccessful()
+
+    if not result:
+        raise Exception("Failed test")
+
+if __name__ == '__main__':
+    main()
@@ -133,6 +133,9 @@ class TestPneumaticValve(unittest.TestCase):
         config = {'dt': 0.01, 'horizon': 800, 'save_freq': 60}
         (times, inputs, states, outputs, event_states) = m.simulate_to_threshold(future_loading, m.output(m.initialize(future_loading(0))), **config)# , 'save_freq': 60
         self.assertAlmostEqual(times[-1], 782.53, 0)
+        # Wear states are read from the state, without modifying parameters
+        self.assertEqual(m.parameters['wr'], PneumaticValveWithWear.default_parameters['wr'])
+        self.assertEqual(m.parameters_at(states[-1]).wr, states[-1]['wr'])
 
     def test_pneumatic_valve_base(self):
         # Test using PneumaticValveBase
@@ -0,0 +1,95 @@
+# Copyright © 2021 United States Government as represented by the Administrator of the National Aeronautics and Space Administration.  All Rights Reserved.
+
+import unittest
+import numpy as np
+from prog_models import PrognosticsModel, ProgModelInputException
+from prog_models.sensitivity import SobolAnalysis, sobol_indices, morris
+
+
+class MockTimerModel(PrognosticsModel):
+    # Time of event e1 is a + 2*b*c. For a, b, c uniform on (0, 1): first-order indices 0.3 (each), total indices 0.3 (a) and 0.4 (b, c)
+    inputs = []
+    states = ['t']
+    outputs = []
+    events = ['e1', 'e2']
+    default_parameters = {'a': 0.5, 'b': 0.5, 'c': 0.5, 'd': 0.5, 'process_noise': 0}
+
+    def initialize(self, u = None, z = None):
+        return {'t': 0}
+
+    def next_state(self, x, u, dt):
+        return {'t': x['t'] + dt}
+
+    def output(self, x):
+        return {}
+
+    def threshold_met(self, x):
+        p = self.parameters
+        return {'e1': x['t'] >= p['a'] + 2*p['b']*p['c'], 'e2': False}
+
+
+def load(t, x = None):
+    return {}
+
+
+class TestSensitivity(unittest.TestCase):
+    def setUp(self):
+        self.m = MockTimerModel()
+        self.bounds = {'a': (0, 1), 'b': (0, 1), 'c': (0, 1), 'd': (0, 1)}
+
+    def test_sobol(self):
+        results = sobol_indices(self.m, self.bounds, load, {}, batch_size = 128, max_samples = 1024, tol = 0.03, threshold_keys = ['e1'], dt = 0.01, seed = 1, workers = 1)
+        self.assertTrue(results['converged'])
+        self.assertLess(results['n_samples'], 1024)
+        for (key, first_order, total) in (('a', 0.3, 0.3), ('b', 0.3, 0.4), ('c', 0.3, 0.4), ('d', 0, 0)):
+            self.assertAlmostEqual(results['first_order']['e1'][key], first_order, delta = 0.05)
+            self.assertAlmostEqual(results['total']['e1'][key], total, delta = 0.05)
+        self.assertAlmostEqual(self.m.parameters['a'], 0.5)  # Model not changed
+
+        # Incremental, reproducible, and independent of workers
+        analyses = [SobolAnalysis(self.m, self.bounds, load, {}, threshold_keys = ['e1'], dt = 0.01, seed = 2, workers = workers) for workers in (1, 2)]
+        for analysis in analyses:
+            self.assertEqual(analysis.run(32), np.inf)
+            self.assertLess(analysis.run(32), 1)
+            self.assertEqual(analysis.n_samples, 64)
+        np.testing.assert_array_equal(analyses[0].total_array, analyses[1].total_array)
+
+        # Events never met
+        analysis = SobolAnalysis(self.m, dict(self.bounds, a = (5, 6)), load, {}, threshold_keys = ['e1'], horizon = 1, dt = 0.01)
+        analysis.run(20)
+        self.assertTrue(np.isnan(analysis.first_order_array).all())
+
+    def test_morris(self):
+        results = morris(self.m, self.bounds, load, {}, n_trajectories = 20, threshold_keys = ['e1'], dt = 0.001, seed = 1, workers = 1)
+        self.assertAlmostEqual(results['mu']['e1']['a'], 1, delta = 0.05)
+        self.assertAlmostEqual(results['sigma']['e1']['a'], 0, delta = 0.05)
+        self.assertGreater(results['sigma']['e1']['b'], 0.3)  # Interaction with c
+        self.assertAlmostEqual(results['mu_star']['e1']['d'], 0)
+
+    def test_bad_configuration(self):
+        for bounds in ({}, {'x': (0, 1)}, {'a': (1, 0)}, [(0, 1)]):
+            with self.assertRaises(ProgModelInputException):
+                SobolAnalysis(self.m, bounds, load, {})
+            with self.assertRaises(ProgModelInputException):
+                morris(self.m, bounds, load, {})
+        with self.assertRaises(ProgModelInputException):
+            SobolAnalysis(self.m, self.bounds, load, {}).run(0)
+        for config in ({'n_trajectories': 1}, {'levels': 3}):
+            with self.assertRaises(ProgModelInputException):
+                morris(self.m, self.bounds, load, {}, **config)
+
+# This allows the module to be executed directly
+def run_tests():
+    unittest.main()
+
+def main():
+    l = unittest.TestLoader()
+    runner = unittest.TextTestRunner()
+    print("\n\nTesting Sensitivity")
+    result = runner.run(l.loadTestsFromTestCase(TestSensitivity)).wasSuccessful()
+
+    if not result:
+        raise Exception("Failed test")
+
+if __name__ == '__main__':
+    main()
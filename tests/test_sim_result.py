@@ -1,7 +1,8 @@
 # Copyright © 2021 United States Government as represented by the Administrator of the National Aeronautics and Space Administration.  All Rights Reserved.
 
 import unittest
-from prog_models.sim_result import SimResult, LazySimResult
+from prog_models.sim_result import SimResult, LazySimResult, ColumnarSimResult
+import numpy as np
 
 class TestSimResult(unittest.TestCase):
     def test_sim_result(self):
@@ -53,6 +54,118 @@ class TestSimResult(unittest.TestCase):
         except IndexError:
             pass
 
+    def test_vectorized_lazy_sim_result(self):
+        calls = []
+        def f(x):
+            calls.append(x)
+            return {'a': x['x'] * 2, 'b': x['x'] + 1, 'c': 3}
+        NUM_ELEMENTS = 5
+        time = list(range(NUM_ELEMENTS))
+        states = [{'x': i * 2.5} for i in range(NUM_ELEMENTS)]
+        for states_i in [states, ColumnarSimResult(time, states)]:
+            calls.clear()
+            result = LazySimResult(f, time, states_i, vectorized = True)
+            self.assertFalse(result.is_cached())
+            np.testing.assert_array_equal(result.column('a'), [i * 5 for i in range(NUM_ELEMENTS)])
+            self.assertTrue(result.is_cached())
+            self.assertEqual(len(calls), 1)  # All states at once
+            np.testing.assert_array_equal(result.column('c'), [3]*NUM_ELEMENTS)
+            self.assertListEqual(result.keys, ['a', 'b', 'c'])
+            self.assertEqual(result.to_numpy(['b', 'a']).shape, (NUM_ELEMENTS, 2))
+            for i in range(NUM_ELEMENTS):
+                self.assertDictEqual(result[i], {'a': i * 5, 'b': i * 2.5 + 1, 'c': 3})
+            self.assertEqual(len(calls), 1)
+
+        # Not vectorized
+        result = LazySimResult(lambda x: {'a': x['x'] * 2}, time, states)
+        np.testing.assert_array_equal(result.column('a'), [i * 5 for i in range(NUM_ELEMENTS)])
+
+    def test_columnar_sim_result(self):
+        NUM_ELEMENTS = 50  # More than initial capacity
+        time = list(range(NUM_ELEMENTS))
+        data = [{'a': i * 2.5, 'b': -i} for i in range(NUM_ELEMENTS)]
+        result = ColumnarSimResult(time, data)
+        self.assertListEqual(result.keys, ['a', 'b'])
+        self.assertEqual(len(result), NUM_ELEMENTS)
+        self.assertListEqual(list(result), data)
+        self.assertListEqual(list(result.times), time)
+        self.assertEqual(result, SimResult(time, data))
+        for i in range(NUM_ELEMENTS):
+            self.assertEqual(result.time(i), time[i])
+            self.assertDictEqual(result[i], data[i])
+        self.assertDictEqual(result[-1], data[-1])
+        self.assertListEqual(result[1:3], data[1:3])
+
+        # Columns
+        np.testing.assert_array_equal(result.column('a'), [i * 2.5 for i in range(NUM_ELEMENTS)])
+        self.assertTrue(np.shares_memory(result.column('a'), result.to_numpy()))  # View, not copy
+        np.testing.assert_array_equal(result.to_numpy(['b', 'a'])[3], [-3, 7.5])
+        self.assertEqual(result.to_numpy().shape, (NUM_ELEMENTS, 2))
+
+        # Add points, as dict or array
+        result.add_point(NUM_ELEMENTS, {'a': 1, 'b': 2, 'c': 3})
+        result.add_point(NUM_ELEMENTS + 1, [4, 5])
+        self.assertEqual(len(result), NUM_ELEMENTS + 2)
+        self.assertDictEqual(result[-2], {'a': 1, 'b': 2})
+        self.assertDictEqual(result[-1], {'a': 4, 'b': 5})
+        self.assertEqual(result.time(-1), NUM_ELEMENTS + 1)
+
+        # Read-only, except for add_point (list methods would not update the array)
+        for (method, args) in (('append', ({'a': 3, 'b': 4},)), ('extend', ([{'a': 3, 'b': 4}],)), ('insert', (0, {'a': 3, 'b': 4})), ('pop', ()), ('remove', (result[0],)), ('clear', ()), ('reverse', ()), ('sort', ()), ('__setitem__', (0, {'a': 3, 'b': 4})), ('__delitem__', (0,))):
+            with self.assertRaises(TypeError):
+                getattr(result, method)(*args)
+        with self.assertRaises(TypeError):
+            result += [{'a': 3, 'b': 4}]
+        self.assertEqual(len(result), NUM_ELEMENTS + 2)
+        self.assertEqual(len(list(result)), NUM_ELEMENTS + 2)
+        self.assertEqual(len(result.column('a')), NUM_ELEMENTS + 2)
+
+        # From array
+        result = ColumnarSimResult([0, 1], np.array([[1, 2], [3, 4]]), keys = ['a', 'b'])
+        self.assertListEqual(result.data, [{'a': 1, 'b': 2}, {'a': 3, 'b': 4}])
+        result.add_point(2, [5, 6])
+        self.assertDictEqual(result[2], {'a': 5, 'b': 6})
+
+        try:
+            ColumnarSimResult([0, 1], np.array([[1, 2], [3, 4]]))
+            self.fail("Should have failed- keys are required for array")
+        except ValueError:
+            pass
+
+        try:
+            tmp = result[3]
+            self.fail("Should be out of range error")
+        except IndexError:
+            pass
+
+    def test_save_load(self):
+        import tempfile
+        from os.path import join
+        NUM_ELEMENTS = 5
+        time = [i * 0.5 for i in range(NUM_ELEMENTS)]
+        data = [{'a': i * 2.5, 'b': -i} for i in range(NUM_ELEMENTS)]
+        results = [
+            SimResult(time, data), 
+            ColumnarSimResult(time, data), 
+            LazySimResult(lambda x: {'a': x['x'] * 2.5, 'b': -x['x']}, time, [{'x': i} for i in range(NUM_ELEMENTS)])]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for (i, result) in enumerate(results):
+                path = join(tmp_dir, str(i))
+                result.save(path)
+                for mmap in [True, False]:
+                    loaded = SimResult.load(path, mmap = mmap)
+                    self.assertIsInstance(loaded, ColumnarSimResult)
+                    self.assertEqual(loaded, result)
+                    self.assertListEqual(loaded.keys, ['a', 'b'])
+                    np.testing.assert_array_equal(loaded.column('b'), [-i for i in range(NUM_ELEMENTS)])
+                    self.assertEqual(loaded.to_numpy().flags.writeable, not mmap)  # Memory-mapped read only
+                    del loaded  # Release memory map
+
+            # Empty
+            path = join(tmp_dir, 'empty')
+            SimResult([], []).save(path)
+            self.assertEqual(len(SimResult.load(path)), 0)
+
 # This allows the module to be executed directly
 def run_tests():
     unittest.main()
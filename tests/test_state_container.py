@@ -0,0 +1,58 @@
+# Copyright © 2021 United States Government as represented by the Administrator of the National Aeronautics and Space Administration.  All Rights Reserved.
+
+import unittest
+from copy import deepcopy
+import numpy as np
+from prog_models.state_container import StateContainer
+
+class TestStateContainer(unittest.TestCase):
+    def test_state_container(self):
+        keys = ['a', 'b', 'c']
+        x = StateContainer(keys, {'c': 3, 'a': 1, 'b': 2, 'd': 4})
+        self.assertListEqual(list(x.keys()), keys)  # Fixed key order, extra keys dropped
+        self.assertEqual(x['a'], 1)
+        self.assertDictEqual(x, {'a': 1, 'b': 2, 'c': 3})
+
+        x['a'] += 1
+        self.assertEqual(x['a'], 2)
+
+        # Copies are independent
+        for x2 in [x.copy(), deepcopy(x)]:
+            self.assertIsInstance(x2, StateContainer)
+            x2['b'] = -1
+            self.assertEqual(x['b'], 2)
+
+        # Arrays
+        data = x.to_array()
+        self.assertIsInstance(data, np.ndarray)
+        self.assertListEqual(list(data), [2, 2, 3])
+        x2 = StateContainer.from_array(keys, data)
+        self.assertDictEqual(x2, x)
+
+        try:
+            x = StateContainer(keys, {'a': 1, 'b': 2})
+            self.fail("Should have failed- missing key")
+        except KeyError:
+            pass
+
+        try:
+            x = StateContainer(keys, [1, 2])
+            self.fail("Should have failed- missing value")
+        except ValueError:
+            pass
+
+# This allows the module to be executed directly
+def run_tests():
+    unittest.main()
+    
+def main():
+    l = unittest.TestLoader()
+    runner = unittest.TextTestRunner()
+    print("\n\nTesting State Container")
+    result = runner.run(l.loadTestsFromTestCase(TestStateContainer)).wasSuccessful()
+
+    if not result:
+        raise Exception("Failed test")
+
+if __name__ == '__main__':
+    main()